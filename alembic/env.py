@@ -17,7 +17,7 @@ from app.database import Base
 from app.models.user import User, Company, Department, Position, WorkStatus
 from app.models.vehicle import Vehicle
 from app.models.checklist import ChecklistTemplate
-from app.models.p2h import P2HReport, P2HDetail, P2HDailyTracker
+from app.models.p2h import P2HReport, P2HDetail, P2HDailyTracker, P2HDailyStat
 from app.models.notification import TelegramNotification
 
 # this is the Alembic Config object
@@ -0,0 +1,49 @@
+"""add p2h_daily_stats rollup
+
+Revision ID: 5c1e7a2b9d44
+Revises: 98a0e7fba3a3
+Create Date: 2026-10-18 09:10:12.418305+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a2b9d44'
+down_revision = '98a0e7fba3a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('p2h_daily_stats',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('vehicle_type', postgresql.ENUM(name='vehicletype', create_type=False), nullable=False),
+    sa.Column('kategori_unit', postgresql.ENUM(name='unitkategori', create_type=False), nullable=False),
+    sa.Column('shift_number', sa.Integer(), nullable=False),
+    sa.Column('overall_status', postgresql.ENUM(name='inspectionstatus', create_type=False), nullable=False),
+    sa.Column('report_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date', 'vehicle_type', 'kategori_unit', 'shift_number', 'overall_status', name='uq_p2h_daily_stats_key')
+    )
+    op.create_index(op.f('ix_p2h_daily_stats_date'), 'p2h_daily_stats', ['date'], unique=False)
+    
+    # Backfill rollup dari seluruh histori p2h_reports
+    op.execute("""
+        INSERT INTO p2h_daily_stats
+            (id, date, vehicle_type, kategori_unit, shift_number, overall_status, report_count, updated_at)
+        SELECT gen_random_uuid(), r.submission_date, v.vehicle_type, v.kategori_unit,
+               r.shift_number, r.overall_status, COUNT(r.id), now()
+        FROM p2h_reports r
+        JOIN vehicles v ON v.id = r.vehicle_id
+        GROUP BY r.submission_date, v.vehicle_type, v.kategori_unit, r.shift_number, r.overall_status
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_p2h_daily_stats_date'), table_name='p2h_daily_stats')
+    op.drop_table('p2h_daily_stats')
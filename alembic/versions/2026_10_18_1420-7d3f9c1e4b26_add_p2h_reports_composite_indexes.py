@@ -0,0 +1,33 @@
+"""add p2h_reports composite indexes
+
+Revision ID: 7d3f9c1e4b26
+Revises: 5c1e7a2b9d44
+Create Date: 2026-10-18 14:20:37.106512+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f9c1e4b26'
+down_revision = '5c1e7a2b9d44'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_p2h_reports_vehicle_id_submission_date', 'p2h_reports', ['vehicle_id', 'submission_date'], unique=False)
+    op.create_index('ix_p2h_reports_overall_status_submission_date', 'p2h_reports', ['overall_status', 'submission_date'], unique=False)
+    op.create_index(
+        'ix_p2h_reports_submission_date_time_desc',
+        'p2h_reports',
+        [sa.text('submission_date DESC'), sa.text('submission_time DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_p2h_reports_submission_date_time_desc', table_name='p2h_reports')
+    op.drop_index('ix_p2h_reports_overall_status_submission_date', table_name='p2h_reports')
+    op.drop_index('ix_p2h_reports_vehicle_id_submission_date', table_name='p2h_reports')
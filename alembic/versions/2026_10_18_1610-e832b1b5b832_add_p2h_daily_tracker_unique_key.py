@@ -0,0 +1,57 @@
+"""add p2h_daily_tracker unique key
+
+Revision ID: e832b1b5b832
+Revises: 7d3f9c1e4b26
+Create Date: 2026-10-18 16:10:52.480913+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e832b1b5b832'
+down_revision = '7d3f9c1e4b26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Gabungkan tracker duplikat (hasil race get-or-create lama) ke baris dengan id terkecil
+    op.execute("""
+        UPDATE p2h_daily_tracker t SET
+            shift_1_done = agg.shift_1_done,
+            shift_1_report_id = agg.shift_1_report_id,
+            shift_2_done = agg.shift_2_done,
+            shift_2_report_id = agg.shift_2_report_id,
+            shift_3_done = agg.shift_3_done,
+            shift_3_report_id = agg.shift_3_report_id,
+            submission_count = agg.submission_count
+        FROM (
+            SELECT
+                min(id::text) AS keep_id,
+                coalesce(bool_or(shift_1_done), false) AS shift_1_done,
+                (array_agg(shift_1_report_id) FILTER (WHERE shift_1_report_id IS NOT NULL))[1] AS shift_1_report_id,
+                coalesce(bool_or(shift_2_done), false) AS shift_2_done,
+                (array_agg(shift_2_report_id) FILTER (WHERE shift_2_report_id IS NOT NULL))[1] AS shift_2_report_id,
+                coalesce(bool_or(shift_3_done), false) AS shift_3_done,
+                (array_agg(shift_3_report_id) FILTER (WHERE shift_3_report_id IS NOT NULL))[1] AS shift_3_report_id,
+                coalesce(sum(submission_count), 0) AS submission_count
+            FROM p2h_daily_tracker
+            GROUP BY vehicle_id, date
+            HAVING count(*) > 1
+        ) agg
+        WHERE t.id::text = agg.keep_id
+    """)
+    op.execute("""
+        DELETE FROM p2h_daily_tracker t
+        USING p2h_daily_tracker k
+        WHERE t.vehicle_id = k.vehicle_id
+          AND t.date = k.date
+          AND t.id::text > k.id::text
+    """)
+    op.create_unique_constraint('uq_p2h_daily_tracker_vehicle_date', 'p2h_daily_tracker', ['vehicle_id', 'date'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_p2h_daily_tracker_vehicle_date', 'p2h_daily_tracker', type_='unique')
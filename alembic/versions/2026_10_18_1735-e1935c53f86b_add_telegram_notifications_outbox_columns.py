@@ -0,0 +1,34 @@
+"""add telegram_notifications outbox columns
+
+Revision ID: e1935c53f86b
+Revises: e832b1b5b832
+Create Date: 2026-10-18 17:35:21.904517+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1935c53f86b'
+down_revision = 'e832b1b5b832'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('telegram_notifications', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('telegram_notifications', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_telegram_notifications_pending',
+        'telegram_notifications',
+        ['next_attempt_at'],
+        unique=False,
+        postgresql_where=sa.text('is_sent = false')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_telegram_notifications_pending', table_name='telegram_notifications', postgresql_where=sa.text('is_sent = false'))
+    op.drop_column('telegram_notifications', 'next_attempt_at')
+    op.drop_column('telegram_notifications', 'attempts')
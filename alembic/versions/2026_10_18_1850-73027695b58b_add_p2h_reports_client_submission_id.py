@@ -0,0 +1,26 @@
+"""add p2h_reports client_submission_id
+
+Revision ID: 73027695b58b
+Revises: e1935c53f86b
+Create Date: 2026-10-18 18:50:44.215093+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '73027695b58b'
+down_revision = 'e1935c53f86b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('p2h_reports', sa.Column('client_submission_id', sa.String(length=64), nullable=True))
+    op.create_index('uq_p2h_reports_user_client_submission', 'p2h_reports', ['user_id', 'client_submission_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_p2h_reports_user_client_submission', table_name='p2h_reports')
+    op.drop_column('p2h_reports', 'client_submission_id')
@@ -0,0 +1,26 @@
+"""add checklist_templates tag gin indexes
+
+Revision ID: b4e6d2a81f37
+Revises: 73027695b58b
+Create Date: 2026-10-18 19:25:13.640281+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e6d2a81f37'
+down_revision = '73027695b58b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_checklist_templates_vehicle_tags_gin', 'checklist_templates', ['vehicle_tags'], unique=False, postgresql_using='gin')
+    op.create_index('ix_checklist_templates_applicable_shifts_gin', 'checklist_templates', ['applicable_shifts'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_checklist_templates_applicable_shifts_gin', table_name='checklist_templates', postgresql_using='gin')
+    op.drop_index('ix_checklist_templates_vehicle_tags_gin', table_name='checklist_templates', postgresql_using='gin')
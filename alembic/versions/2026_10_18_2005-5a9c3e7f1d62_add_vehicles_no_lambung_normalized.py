@@ -0,0 +1,41 @@
+"""add vehicles no_lambung_normalized
+
+Revision ID: 5a9c3e7f1d62
+Revises: b4e6d2a81f37
+Create Date: 2026-10-18 20:05:37.118402+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9c3e7f1d62'
+down_revision = 'b4e6d2a81f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('vehicles', sa.Column('no_lambung_normalized', sa.String(length=50), nullable=True))
+    # Sama dengan normalize_hull_number(): hanya alfanumerik, uppercase, kosong -> NULL
+    op.execute("""
+        UPDATE vehicles
+        SET no_lambung_normalized = nullif(upper(regexp_replace(no_lambung, '[^a-zA-Z0-9]', '', 'g')), '')
+        WHERE no_lambung IS NOT NULL
+    """)
+    # Nomor lambung yang bentrok setelah normalisasi (mis. P.309 dan P 309): yang
+    # tertua tetap bisa di-scan, sisanya NULL sampai admin memperbaiki datanya
+    op.execute("""
+        UPDATE vehicles v
+        SET no_lambung_normalized = NULL
+        FROM vehicles k
+        WHERE v.no_lambung_normalized = k.no_lambung_normalized
+          AND (k.created_at, k.id::text) < (v.created_at, v.id::text)
+    """)
+    op.create_index(op.f('ix_vehicles_no_lambung_normalized'), 'vehicles', ['no_lambung_normalized'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_vehicles_no_lambung_normalized'), table_name='vehicles')
+    op.drop_column('vehicles', 'no_lambung_normalized')
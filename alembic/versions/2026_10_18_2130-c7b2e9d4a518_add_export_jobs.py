@@ -0,0 +1,60 @@
+"""add export_jobs
+
+Revision ID: c7b2e9d4a518
+Revises: 5a9c3e7f1d62
+Create Date: 2026-10-18 21:30:12.442871+08:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7b2e9d4a518'
+down_revision = '5a9c3e7f1d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('export_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('export_type', sa.String(length=20), nullable=False),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('filters', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'DONE', 'FAILED', name='exportjobstatus'), nullable=False),
+    sa.Column('total_rows', sa.Integer(), nullable=True),
+    sa.Column('processed_rows', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('file_path', sa.String(length=500), nullable=True),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('file_size', sa.BigInteger(), nullable=True),
+    sa.Column('created_by', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_export_jobs_status'), 'export_jobs', ['status'], unique=False)
+    op.create_index(op.f('ix_export_jobs_created_by'), 'export_jobs', ['created_by'], unique=False)
+    op.create_index(op.f('ix_export_jobs_expires_at'), 'export_jobs', ['expires_at'], unique=False)
+    op.create_index(
+        'ix_export_jobs_pending',
+        'export_jobs',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_export_jobs_pending', table_name='export_jobs', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index(op.f('ix_export_jobs_expires_at'), table_name='export_jobs')
+    op.drop_index(op.f('ix_export_jobs_created_by'), table_name='export_jobs')
+    op.drop_index(op.f('ix_export_jobs_status'), table_name='export_jobs')
+    op.drop_table('export_jobs')
+    sa.Enum(name='exportjobstatus').drop(op.get_bind(), checkfirst=True)
@@ -3,6 +3,8 @@ from typing import List
 from pathlib import Path
 import os
 
+from app.constants import DatabaseSettings
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 ENV_FILE = BASE_DIR / ".env"
 
@@ -20,6 +22,15 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
     SECRET_KEY: str
+    
+    # Database connection pool - berlaku per engine (sync & async) per worker:
+    # total koneksi = workers x 2 x (DB_POOL_SIZE + DB_MAX_OVERFLOW), harus < max_connections
+    DB_POOL_SIZE: int = DatabaseSettings.POOL_SIZE
+    DB_MAX_OVERFLOW: int = DatabaseSettings.MAX_OVERFLOW
+    DB_POOL_TIMEOUT: int = DatabaseSettings.POOL_TIMEOUT
+    DB_POOL_RECYCLE: int = DatabaseSettings.POOL_RECYCLE
+    DB_STATEMENT_TIMEOUT_MS: int = DatabaseSettings.STATEMENT_TIMEOUT_MS
+    DB_ECHO: bool = False  # Log semua SQL (debug)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
     
@@ -32,6 +43,12 @@ class Settings(BaseSettings):
     APP_VERSION: str = "1.0.0"
     TIMEZONE: str = "Asia/Makassar" # WITA - Sesuai lokasi Bontang
     
+    # Foto bukti P2H (arahkan ke persistent volume di production)
+    PHOTO_STORAGE_DIR: str = "uploads/photos"
+    
+    # Hasil export job (disk lokal, dibersihkan otomatis setelah JOB_RETENTION_HOURS)
+    EXPORT_STORAGE_DIR: str = "uploads/exports"
+    
     # CORS - Support both JSON array and comma-separated string
     CORS_ORIGINS: str = '["http://localhost:5173","http://127.0.0.1:5173"]'
     
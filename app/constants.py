@@ -88,6 +88,18 @@ class FileUploadSettings:
     ALLOWED_IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
     ALLOWED_DOCUMENT_EXTENSIONS = [".pdf"]
     UPLOAD_DIR = "uploads"
+    
+    # Foto bukti P2H (POST /p2h/photos) - foto HP umumnya 4-8 MB
+    MAX_PHOTO_SIZE = 15 * 1024 * 1024  # 15MB in bytes
+    PHOTO_WRITE_BUFFER = 1024 * 1024  # 1MB - hash & tulis ke disk per blok di thread
+    PHOTO_CONTENT_TYPES = {"image/jpeg": ".jpg", "image/png": ".png"}
+    MAX_PHOTO_PIXELS = 64 * 1024 * 1024  # ~67 MP, cukup untuk kamera HP 64 MP (decompression bomb)
+    THUMBNAIL_MAX_SIZE = 320  # px, sisi terpanjang
+    THUMBNAIL_QUALITY = 75
+    THUMBNAIL_WORKERS = 2  # process pool untuk resize (di luar event loop)
+    PHOTO_CACHE_MAX_AGE = 365 * 24 * 3600  # URL berbasis hash isi - tidak pernah berubah
+    PHOTO_ID_PATTERN = r"^[0-9a-f]{64}\.(jpg|png)$"  # "<sha256>.<ext>"
+    PHOTO_URL_PREFIX = "/p2h/photos/"
 
 
 # Password Settings
@@ -111,8 +123,12 @@ class TokenSettings:
 class DatabaseSettings:
     POOL_SIZE = 5
     MAX_OVERFLOW = 10
+    POOL_TIMEOUT = 30  # seconds menunggu koneksi bebas sebelum TimeoutError
     POOL_RECYCLE = 3600  # 1 hour
     POOL_PRE_PING = True
+    STATEMENT_TIMEOUT_MS = 30000  # 0 = tanpa batas
+    METRICS_WINDOW = 1000  # Sampel latency checkout terakhir untuk avg/p95
+    SLOW_CHECKOUT_MS = 100  # Checkout selambat ini dihitung sebagai slow_checkouts
 
 
 # Telegram Notification Settings
@@ -120,6 +136,15 @@ class TelegramSettings:
     MAX_MESSAGE_LENGTH = 4096
     RETRY_COUNT = 3
     RETRY_DELAY = 2  # seconds
+    
+    # Outbox dispatcher (app/services/notification_dispatcher.py)
+    OUTBOX_CONCURRENCY = 5  # Pengiriman paralel maksimum ke Telegram API
+    OUTBOX_BATCH_SIZE = 20  # Baris yang di-claim per putaran
+    OUTBOX_POLL_SECONDS = 10  # Interval cek outbox jika tidak ada wake-up
+    OUTBOX_LEASE_SECONDS = 300  # Claim ditahan selama pengiriman (> total retry send_message)
+    OUTBOX_MAX_ATTEMPTS = 5  # Setelah itu menunggu job retry per jam
+    OUTBOX_RETRY_BACKOFF_SECONDS = 60  # Backoff antar percobaan: 1, 2, 4, 8 menit
+    OUTBOX_MAX_AGE_HOURS = 24  # Notifikasi lebih lama dari ini tidak dikirim lagi
 
 
 # P2H Report Settings
@@ -132,6 +157,11 @@ class P2HSettings:
     
     # Maximum items per P2H checklist
     MAX_CHECKLIST_ITEMS = 100
+    
+    # Submit batch offline (POST /p2h/submit-batch)
+    MAX_BATCH_REPORTS = 50  # Laporan per request
+    OFFLINE_MAX_AGE_HOURS = 24  # Laporan yang diisi lebih lama dari ini ditolak
+    OFFLINE_CLOCK_SKEW_MINUTES = 5  # Toleransi jam perangkat yang lebih cepat dari server
 
 
 # Cache Settings (if using Redis)
@@ -139,6 +169,43 @@ class CacheSettings:
     DEFAULT_TTL = 300  # 5 minutes
     STATISTICS_TTL = 600  # 10 minutes
     USER_DATA_TTL = 1800  # 30 minutes
+    
+    # In-process dashboard cache (app/utils/cache.py)
+    DASHBOARD_TTL = 60  # 1 minute - juga di-invalidate saat ada submit P2H / perubahan kendaraan
+    DASHBOARD_MAX_ENTRIES = 256
+    
+    # Form checklist P2H (app/services/checklist_service.py) - di-invalidate saat checklist berubah,
+    # TTL membatasi data basi di worker lain
+    CHECKLIST_TTL = 300  # 5 minutes
+    CHECKLIST_MAX_ENTRIES = 64
+
+
+# Dashboard live stream (Server-Sent Events - /dashboard/stream)
+class DashboardStreamSettings:
+    CHANNEL = "dashboard_events"  # Channel Postgres LISTEN/NOTIFY antar worker
+    LISTEN_RECONNECT_SECONDS = 5  # Jeda sambung ulang koneksi LISTEN yang putus
+    QUEUE_SIZE = 100  # Event tertahan per koneksi sebelum client diminta resync
+    KEEPALIVE_SECONDS = 15  # Komentar keep-alive agar proxy tidak menutup koneksi
+    RETRY_MS = 5000  # Jeda reconnect EventSource di sisi client
+
+
+# Export Settings (app/routers/export.py)
+class ExportSettings:
+    YIELD_PER = 1000  # Baris per fetch dari server-side cursor
+    CSV_CHUNK_BYTES = 64 * 1024  # Potongan CSV yang dikirim ke client
+
+    # PDF dirender per potongan baris (satu Table per potongan) lalu digabung
+    PDF_ROWS_PER_CHUNK = 500  # ~15 halaman landscape per potongan
+    PDF_WORKERS = 2  # process pool render PDF (di luar proses web)
+    PDF_MAX_PENDING_CHUNKS = 4  # Potongan yang antre di pool - membatasi baris di memory
+    
+    # Export job di background (POST /export/jobs)
+    JOB_WORKERS = 2  # Export yang berjalan bersamaan per proses API
+    JOB_POLL_SECONDS = 10  # Interval cek antrian jika tidak ada wake-up
+    JOB_STALE_MINUTES = 10  # Job RUNNING tanpa heartbeat selama ini dianggap gagal
+    JOB_RETENTION_HOURS = 24  # File hasil (dan job) dihapus setelah ini
+    JOB_MAX_STORAGE_MB = 2048  # Total file hasil di disk; yang terlama dihapus lebih dulu
+    JOB_LIST_LIMIT = 20  # GET /export/jobs
 
 
 # Logging Settings
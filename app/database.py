@@ -1,18 +1,74 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import AsyncIterator
 from app.config import settings
+from app.utils.pool_metrics import TimedQueuePool, TimedAsyncAdaptedQueuePool, instrument_pool
 
-# Create database engine
+# Ukuran pool & timeout dari settings (lihat DB_* di config.py)
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,  # Verify connections before using
+    echo=settings.DB_ECHO
+)
+
+# Create database engine (sync/psycopg2) - dipakai Alembic, seeds, scripts
+# dan router berbasis `def` yang dijalankan FastAPI di threadpool
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using
-    echo=not settings.is_production  # Log SQL in development
+    poolclass=TimedQueuePool,
+    connect_args=(
+        {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+        if settings.DB_STATEMENT_TIMEOUT_MS else {}
+    ),
+    **POOL_OPTIONS
 )
+instrument_pool(engine.pool, "sync")
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(url: str) -> URL:
+    """
+    Ubah DATABASE_URL (postgres://, postgresql://, postgresql+psycopg2://)
+    menjadi URL driver asyncpg.
+    
+    asyncpg tidak mengenal parameter `sslmode` milik libpq, sehingga
+    dipetakan ke parameter `ssl` dengan nilai yang sama.
+    """
+    async_url = make_url(url.replace("postgres://", "postgresql://", 1) if url.startswith("postgres://") else url)
+    async_url = async_url.set(drivername="postgresql+asyncpg")
+    
+    if "sslmode" in async_url.query:
+        query = dict(async_url.query)
+        query["ssl"] = query.pop("sslmode")
+        async_url = async_url.set(query=query)
+    
+    return async_url
+
+
+# Async engine (asyncpg) - dipakai router async agar query tidak memblokir event loop
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    poolclass=TimedAsyncAdaptedQueuePool,
+    connect_args=(
+        {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        if settings.DB_STATEMENT_TIMEOUT_MS else {}
+    ),
+    **POOL_OPTIONS
+)
+instrument_pool(async_engine.sync_engine.pool, "async")
+
+# expire_on_commit=False: atribut tetap bisa dibaca setelah commit tanpa
+# lazy-load (lazy-load implisit tidak didukung AsyncSession)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -28,3 +84,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency function to get an async database session.
+    Yields an AsyncSession and closes it after use.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
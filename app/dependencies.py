@@ -1,10 +1,10 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import uuid
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
 from app.utils.jwt import decode_access_token
 
@@ -12,10 +12,10 @@ from app.utils.jwt import decode_access_token
 # auto_error=False agar kita bisa menangani error secara kustom (misal jika token ada di cookie)
 security = HTTPBearer(auto_error=False)
 
-def get_current_user(
+async def get_current_user(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Dependency untuk mendapatkan user yang sedang login.
@@ -60,7 +60,7 @@ def get_current_user(
     
     # 5. Ambil user dari database
     try:
-        user = db.query(User).filter(User.id == uuid.UUID(user_id)).first()
+        user = await db.get(User, uuid.UUID(user_id))
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,6 +53,28 @@ class ValidationException(BaseAPIException):
         super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, message=message, detail=detail)
 
 
+class ChecklistValidationException(BaseAPIException):
+    """Checklist items in a P2H submission are invalid (per-item errors)"""
+    def __init__(self, errors: list):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            message=f"{len(errors)} item checklist tidak valid untuk unit/shift ini"
+        )
+        self.detail["errors"] = errors
+
+
+class PayloadTooLargeException(BaseAPIException):
+    """Request body exceeds the allowed size"""
+    def __init__(self, message: str):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, message=message)
+
+
+class UnsupportedMediaTypeException(BaseAPIException):
+    """Uploaded content type is not accepted"""
+    def __init__(self, message: str):
+        super().__init__(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, message=message)
+
+
 class InternalServerException(BaseAPIException):
     """Internal server error exception"""
     def __init__(self, message: str = ResponseMessages.INTERNAL_ERROR, detail: str = None):
@@ -11,8 +11,14 @@ from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
 from app.config import settings
-from app.database import engine
+from app.database import engine, async_engine
 from app.utils.response import base_response
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.telegram_service import telegram_service
+from app.services.photo_service import photo_service
+from app.services.export_service import export_service
+from app.services.export_job_service import export_job_service
+from app.services.dashboard_events import dashboard_events
 
 # Alembic Imports
 from alembic.config import Config
@@ -120,10 +126,28 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Failed to start scheduler: {str(e)}")
 
+    # Telegram outbox dispatcher (kirim notifikasi di luar request)
+    notification_dispatcher.start()
+
+    # Live dashboard: LISTEN event submit dari semua worker
+    dashboard_events.start()
+
+    # Export job worker (POST /export/jobs)
+    export_job_service.start()
+
     yield
 
     # ---------------- SHUTDOWN ----------------
     logger.info("🛑 Shutting down P2H System API...")
+    from app.scheduler.scheduler import stop_scheduler
+    stop_scheduler()
+    await notification_dispatcher.stop()
+    await dashboard_events.stop()
+    await export_job_service.stop()
+    await telegram_service.close()
+    photo_service.shutdown()
+    export_service.shutdown()
+    await async_engine.dispose()
 
 # =========================================================
 # FASTAPI APP
@@ -216,12 +240,15 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     message = exc.detail
+    payload = None
     if isinstance(exc.detail, dict):
         message = exc.detail.get("message", str(exc.detail))
+        if "errors" in exc.detail:
+            payload = {"details": exc.detail["errors"]}
 
     return base_response(
         message=message,
-        payload=None,
+        payload=payload,
         status_code=exc.status_code
     )
 
@@ -12,12 +12,14 @@ from app.models.p2h import (
     P2HReport, 
     P2HDetail, 
     P2HDailyTracker, 
+    P2HDailyStat,
     InspectionStatus, 
     FinalStatus
 )
 
 # Jika Anda memiliki model notifikasi (seperti yang ada di struktur folder Anda)
 from app.models.notification import TelegramNotification
+from app.models.export_job import ExportJob, ExportJobStatus
 
 # __all__ memastikan bahwa saat kita import * dari models, 
 # semua class ini akan ikut terbawa.
@@ -29,7 +31,10 @@ __all__ = [
     "P2HReport",
     "P2HDetail",
     "P2HDailyTracker",
+    "P2HDailyStat",
     "InspectionStatus",
     "FinalStatus",
-    "TelegramNotification"
+    "TelegramNotification",
+    "ExportJob",
+    "ExportJobStatus"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, Enum as SQLEnum, DateTime
+from sqlalchemy import Column, String, Integer, Boolean, Enum as SQLEnum, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID, ARRAY  # Tambahkan ARRAY untuk tagging
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -10,7 +10,12 @@ from app.models.vehicle import VehicleType
 class ChecklistTemplate(Base):
     """Checklist template model - Diperbarui tanpa menghapus kolom lama"""
     __tablename__ = "checklist_templates"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # GIN index untuk filter tag (`@>`) pada form checklist
+        Index("ix_checklist_templates_vehicle_tags_gin", "vehicle_tags", postgresql_using="gin"),
+        Index("ix_checklist_templates_applicable_shifts_gin", "applicable_shifts", postgresql_using="gin"),
+        {'extend_existing': True},
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -0,0 +1,63 @@
+from sqlalchemy import Column, String, Integer, BigInteger, Enum as SQLEnum, DateTime, ForeignKey, Text, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+import uuid
+import enum
+
+from app.database import Base
+
+
+class ExportJobStatus(str, enum.Enum):
+    """Status export job (POST /export/jobs)"""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ExportJob(Base):
+    """
+    Export users / vehicles / laporan P2H yang dijalankan di background.
+    Tabel ini sekaligus antrian: worker di setiap proses API meng-claim job
+    PENDING, lalu hasilnya disimpan di disk lokal sampai expires_at.
+    """
+    __tablename__ = "export_jobs"
+    __table_args__ = (
+        # Antrian: hanya job yang belum diambil worker yang di-scan
+        Index(
+            "ix_export_jobs_pending",
+            "created_at",
+            postgresql_where=text("status = 'PENDING'")
+        ),
+        {'extend_existing': True}
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    # Permintaan export: users / vehicles / p2h-reports, excel / csv / pdf, filter mentah
+    export_type = Column(String(20), nullable=False)
+    format = Column(String(10), nullable=False)
+    filters = Column(JSONB, nullable=False, default=dict)
+    
+    # Progress
+    status = Column(SQLEnum(ExportJobStatus), nullable=False, default=ExportJobStatus.PENDING, index=True)
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, default=0, server_default="0", nullable=False)
+    error_message = Column(Text, nullable=True)
+    
+    # Hasil (disk lokal, EXPORT_STORAGE_DIR)
+    file_path = Column(String(500), nullable=True)
+    filename = Column(String(255), nullable=True)
+    file_size = Column(BigInteger, nullable=True)
+    
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    
+    # Timestamps (UTC)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Diperbarui worker selama RUNNING
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)  # File & job dihapus setelah ini
+    
+    def __repr__(self):
+        return f"<ExportJob {self.export_type}.{self.format} - {self.status}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, Integer, Enum as SQLEnum, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -25,7 +25,15 @@ class TelegramNotification(Base):
     Berfungsi sebagai audit log untuk memastikan alert sampai ke stakeholder.
     """
     __tablename__ = "telegram_notifications"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Antrian outbox: hanya baris yang belum terkirim yang di-scan dispatcher
+        Index(
+            "ix_telegram_notifications_pending",
+            "next_attempt_at",
+            postgresql_where=text("is_sent = false")
+        ),
+        {'extend_existing': True}
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -46,6 +54,10 @@ class TelegramNotification(Base):
     sent_at = Column(DateTime, nullable=True) # Kapan pesan berhasil terkirim
     error_message = Column(Text, nullable=True) # Catatan jika terjadi error (misal: bot diblokir)
     
+    # Outbox: jumlah percobaan kirim & kapan boleh dicoba lagi (NULL = segera)
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    next_attempt_at = Column(DateTime, nullable=True)
+    
     # Audit Trail
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Date, Time, Boolean, Enum as SQLEnum, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Date, Time, Boolean, Enum as SQLEnum, DateTime, ForeignKey, Text, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -6,6 +6,7 @@ import uuid
 import enum
 
 from app.database import Base
+from app.models.vehicle import VehicleType, UnitKategori
 
 # --- 1. ENUMS ---
 
@@ -29,7 +30,20 @@ class P2HReport(Base):
     Menyimpan informasi utama siapa, kapan, dan kendaraan apa.
     """
     __tablename__ = "p2h_reports"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Composite index untuk filter per unit / per status dalam rentang tanggal
+        Index("ix_p2h_reports_vehicle_id_submission_date", "vehicle_id", "submission_date"),
+        Index("ix_p2h_reports_overall_status_submission_date", "overall_status", "submission_date"),
+        # Urutan "laporan terbaru" (ORDER BY submission_date DESC, submission_time DESC)
+        Index(
+            "ix_p2h_reports_submission_date_time_desc",
+            text("submission_date DESC"),
+            text("submission_time DESC")
+        ),
+        # Idempotency key submit offline, unik per user
+        Index("uq_p2h_reports_user_client_submission", "user_id", "client_submission_id", unique=True),
+        {'extend_existing': True}
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     vehicle_id = Column(UUID(as_uuid=True), ForeignKey("vehicles.id"), nullable=False, index=True)
@@ -43,6 +57,9 @@ class P2HReport(Base):
     submission_date = Column(Date, nullable=False, index=True) 
     submission_time = Column(Time, nullable=False)
     
+    # Idempotency key dari aplikasi untuk submit batch offline (NULL untuk submit online)
+    client_submission_id = Column(String(64), nullable=True)
+    
     # --- AUDIT TRAIL & SOFT DELETE ---
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -83,7 +100,11 @@ class P2HDailyTracker(Base):
     Mencegah query berat ke p2h_reports untuk pengecekan status harian.
     """
     __tablename__ = "p2h_daily_tracker"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Satu tracker per unit per tanggal operasional (target UPSERT submit P2H)
+        UniqueConstraint("vehicle_id", "date", name="uq_p2h_daily_tracker_vehicle_date"),
+        {'extend_existing': True}
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     vehicle_id = Column(UUID(as_uuid=True), ForeignKey("vehicles.id"), nullable=False, index=True)
@@ -106,4 +127,32 @@ class P2HDailyTracker(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship
-    vehicle = relationship("Vehicle", back_populates="daily_trackers")
\ No newline at end of file
+    vehicle = relationship("Vehicle", back_populates="daily_trackers")
+
+class P2HDailyStat(Base):
+    """
+    Rollup harian jumlah laporan P2H untuk Dashboard.
+    Satu baris per tanggal x tipe kendaraan x kategori x shift x status,
+    diperbarui di dalam transaksi submit P2H sehingga dashboard tidak perlu
+    menghitung ulang seluruh p2h_reports.
+    """
+    __tablename__ = "p2h_daily_stats"
+    __table_args__ = (
+        UniqueConstraint(
+            "date", "vehicle_type", "kategori_unit", "shift_number", "overall_status",
+            name="uq_p2h_daily_stats_key"
+        ),
+        {'extend_existing': True}
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    date = Column(Date, nullable=False, index=True) # Sama dengan submission_date laporan
+    
+    # Dimensi (snapshot saat laporan disubmit)
+    vehicle_type = Column(SQLEnum(VehicleType, values_callable=lambda x: [e.value for e in x]), nullable=False)
+    kategori_unit = Column(SQLEnum(UnitKategori), nullable=False)
+    shift_number = Column(Integer, nullable=False)
+    overall_status = Column(SQLEnum(InspectionStatus), nullable=False)
+    
+    report_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,11 +1,12 @@
 from sqlalchemy import Column, String, Date, Boolean, Enum as SQLEnum, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 import uuid
 import enum
 
 from app.database import Base
+from app.utils.vehicle_utils import normalize_hull_number
 
 class VehicleType(enum.Enum):
     """Tipe kendaraan yang tersedia di sistem"""
@@ -37,6 +38,9 @@ class Vehicle(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     no_lambung = Column(String(50), unique=True, nullable=True, index=True)
+    # Bentuk ternormalisasi (P.309 / p 309 -> P309) untuk lookup scan driver,
+    # diisi otomatis setiap no_lambung di-set (lihat _sync_no_lambung_normalized)
+    no_lambung_normalized = Column(String(50), unique=True, nullable=True, index=True)
     warna_no_lambung = Column(String(20), nullable=True)
     plat_nomor = Column(String(20), nullable=False, index=True)
     lokasi_kendaraan = Column(String(100), nullable=True)
@@ -65,4 +69,10 @@ class Vehicle(Base):
     daily_trackers = relationship("P2HDailyTracker", back_populates="vehicle")
     
     # Referensi string harus tepat dengan nama kelas di notification.py
-    notifications = relationship("TelegramNotification", back_populates="vehicle")
\ No newline at end of file
+    notifications = relationship("TelegramNotification", back_populates="vehicle")
+    
+    @validates("no_lambung")
+    def _sync_no_lambung_normalized(self, key, value):
+        """Keep no_lambung_normalized in sync (create, update, bulk upload)"""
+        self.no_lambung_normalized = normalize_hull_number(value) or None
+        return value
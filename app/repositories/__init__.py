@@ -15,10 +15,18 @@ from .base import BaseRepository
 from .p2h_repository import P2HRepository
 from .dashboard_repository import DashboardRepository
 from .vehicle_repository import VehicleRepository
+from .daily_stats_repository import DailyStatsRepository
+from .notification_repository import NotificationRepository
+from .export_repository import ExportRepository
+from .export_job_repository import ExportJobRepository
 
 __all__ = [
     'BaseRepository',
     'P2HRepository',
     'DashboardRepository',
     'VehicleRepository',
+    'DailyStatsRepository',
+    'NotificationRepository',
+    'ExportRepository',
+    'ExportJobRepository',
 ]
@@ -2,13 +2,80 @@
 Base Repository - Common database operations for all repositories
 """
 
-from sqlalchemy.orm import Session, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import DateTime, Select, select, tuple_
 from typing import TypeVar, Generic, Type, Optional, List
+from datetime import date, timedelta
 from uuid import UUID
 
 ModelType = TypeVar("ModelType")
 
 
+def date_range_filter(
+    column,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> list:
+    """
+    Build index-friendly (sargable) predicates for an inclusive date range.
+    
+    Kolom dibandingkan langsung tanpa dibungkus fungsi (misalnya func.date),
+    sehingga index B-tree pada kolom tersebut tetap bisa dipakai.
+    Untuk kolom DateTime batas akhir ditulis sebagai `< end_date + 1 hari`
+    agar seluruh hari terakhir ikut terhitung.
+    
+    Args:
+        column: Date or DateTime column to filter on
+        start_date: Optional inclusive start date
+        end_date: Optional inclusive end date
+        
+    Returns:
+        List of predicates for Select.where(*predicates)
+    """
+    conditions = []
+    if start_date is not None:
+        conditions.append(column >= start_date)
+    if end_date is not None:
+        if isinstance(column.type, DateTime):
+            conditions.append(column < end_date + timedelta(days=1))
+        else:
+            conditions.append(column <= end_date)
+    return conditions
+
+
+def keyset_paginate(
+    query: Select,
+    columns: list,
+    limit: int,
+    after: Optional[tuple] = None,
+    descending: bool = True
+) -> Select:
+    """
+    Apply keyset (cursor) pagination to a query.
+    
+    Halaman berikutnya dimulai setelah baris `after` menggunakan row
+    comparison `(col1, col2, ...) < (v1, v2, ...)`, sehingga biaya tiap
+    halaman tidak bergantung pada kedalaman halaman seperti OFFSET.
+    Kolom terakhir harus unik (misalnya id) agar urutan stabil.
+    
+    Args:
+        query: Base select statement
+        columns: Sort key columns, unique as a whole
+        limit: Page size (query fetches limit + 1 to detect next page)
+        after: Key values of the last row of the previous page
+        descending: Sort direction for all key columns
+        
+    Returns:
+        Select with keyset filter, ordering and limit applied
+    """
+    if after is not None:
+        key = tuple_(*columns)
+        query = query.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    
+    order = [c.desc() for c in columns] if descending else [c.asc() for c in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
 class BaseRepository(Generic[ModelType]):
     """
     Base repository with common CRUD operations.
@@ -16,39 +83,40 @@ class BaseRepository(Generic[ModelType]):
     Principles:
     - Accept clean, typed parameters
     - No conditional checking of parameters
-    - Return raw data or Query objects
+    - Return raw data or Select statements
     - Let caller handle business logic
     """
     
     def __init__(self, model: Type[ModelType]):
         self.model = model
     
-    def get_by_id(self, db: Session, id: UUID) -> Optional[ModelType]:
+    async def get_by_id(self, db: AsyncSession, id: UUID) -> Optional[ModelType]:
         """Get single record by ID"""
-        return db.query(self.model).filter(self.model.id == id).first()
+        return await db.get(self.model, id)
     
-    def get_all(self, db: Session, skip: int = 0, limit: int = 100) -> List[ModelType]:
+    async def get_all(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[ModelType]:
         """Get all records with pagination"""
-        return db.query(self.model).offset(skip).limit(limit).all()
+        result = await db.scalars(select(self.model).offset(skip).limit(limit))
+        return list(result.all())
     
-    def create(self, db: Session, obj: ModelType) -> ModelType:
+    async def create(self, db: AsyncSession, obj: ModelType) -> ModelType:
         """Create new record"""
         db.add(obj)
-        db.commit()
-        db.refresh(obj)
+        await db.commit()
+        await db.refresh(obj)
         return obj
     
-    def update(self, db: Session, obj: ModelType) -> ModelType:
+    async def update(self, db: AsyncSession, obj: ModelType) -> ModelType:
         """Update existing record"""
-        db.commit()
-        db.refresh(obj)
+        await db.commit()
+        await db.refresh(obj)
         return obj
     
-    def delete(self, db: Session, obj: ModelType) -> None:
+    async def delete(self, db: AsyncSession, obj: ModelType) -> None:
         """Delete record"""
-        db.delete(obj)
-        db.commit()
+        await db.delete(obj)
+        await db.commit()
     
-    def get_query(self, db: Session) -> Query:
-        """Get base query for the model"""
-        return db.query(self.model)
+    def get_query(self) -> Select:
+        """Get base select statement for the model"""
+        return select(self.model)
@@ -0,0 +1,237 @@
+"""
+Daily Stats Repository - Database operations for the p2h_daily_stats rollup
+
+Pure database queries - NO business logic
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, literal_column, delete, select
+from sqlalchemy.dialects.postgresql import insert
+from typing import Optional, List, Dict
+from datetime import date, datetime
+
+from app.models.p2h import P2HReport, P2HDailyStat, InspectionStatus
+from app.models.vehicle import Vehicle
+from .base import date_range_filter
+
+
+class DailyStatsRepository:
+    """Repository for the P2H daily statistics rollup"""
+    
+    async def increment(self, db: AsyncSession, vehicle: Vehicle, report: P2HReport) -> None:
+        """
+        Tambah 1 laporan ke baris rollup yang sesuai (UPSERT).
+        
+        Tidak melakukan commit - dipanggil di dalam transaksi submit P2H
+        sehingga rollup dan laporan tersimpan (atau gagal) bersamaan.
+        
+        Args:
+            db: Database session
+            vehicle: Vehicle of the report
+            report: Newly created (flushed) P2H report
+        """
+        stmt = insert(P2HDailyStat).values(
+            date=report.submission_date,
+            vehicle_type=vehicle.vehicle_type,
+            kategori_unit=vehicle.kategori_unit,
+            shift_number=report.shift_number,
+            overall_status=report.overall_status,
+            report_count=1,
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_p2h_daily_stats_key",
+            set_={
+                "report_count": P2HDailyStat.report_count + 1,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        await db.execute(stmt)
+    
+    def rebuild(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """
+        Hitung ulang rollup dari p2h_reports (backfill / perbaikan data).
+        
+        Baris rollup pada rentang tanggal dihapus lalu diisi ulang dengan
+        satu INSERT ... SELECT ... GROUP BY. Commit dilakukan oleh caller.
+        Dipanggil dari scripts (backfill), sehingga memakai Session sync.
+        
+        Args:
+            db: Database session (sync)
+            start_date: Optional inclusive start date (default: all history)
+            end_date: Optional inclusive end date (default: all history)
+        
+        Returns:
+            Number of rollup rows written
+        """
+        stat_conditions = date_range_filter(P2HDailyStat.date, start_date, end_date)
+        report_conditions = date_range_filter(P2HReport.submission_date, start_date, end_date)
+        
+        db.execute(delete(P2HDailyStat).where(*stat_conditions))
+        
+        source = select(
+            func.gen_random_uuid(),
+            P2HReport.submission_date,
+            Vehicle.vehicle_type,
+            Vehicle.kategori_unit,
+            P2HReport.shift_number,
+            P2HReport.overall_status,
+            func.count(P2HReport.id),
+            func.now()
+        ).select_from(P2HReport).join(
+            Vehicle, Vehicle.id == P2HReport.vehicle_id
+        ).where(*report_conditions).group_by(
+            P2HReport.submission_date,
+            Vehicle.vehicle_type,
+            Vehicle.kategori_unit,
+            P2HReport.shift_number,
+            P2HReport.overall_status
+        )
+        
+        result = db.execute(
+            insert(P2HDailyStat).from_select(
+                [
+                    "id", "date", "vehicle_type", "kategori_unit",
+                    "shift_number", "overall_status", "report_count", "updated_at"
+                ],
+                source
+            )
+        )
+        return result.rowcount or 0
+    
+    async def get_status_aggregates(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        vehicle_type: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Aggregate P2H status counts from the daily rollup in one query.
+        
+        Args:
+            db: Database session
+            start_date: Optional start date filter for status counts
+            end_date: Optional end date filter for status counts
+            vehicle_type: Optional vehicle type filter
+        
+        Returns:
+            Dict with keys: normal, abnormal, warning, total
+        """
+        def sum_where(*conditions):
+            total = func.sum(P2HDailyStat.report_count)
+            if conditions:
+                total = total.filter(and_(*conditions))
+            return func.coalesce(total, 0)
+        
+        columns = [
+            sum_where(P2HDailyStat.overall_status == InspectionStatus.NORMAL).label("normal"),
+            sum_where(P2HDailyStat.overall_status == InspectionStatus.ABNORMAL).label("abnormal"),
+            sum_where(P2HDailyStat.overall_status == InspectionStatus.WARNING).label("warning"),
+            sum_where().label("total"),
+        ]
+        
+        query = select(*columns).select_from(P2HDailyStat).where(
+            *date_range_filter(P2HDailyStat.date, start_date, end_date)
+        )
+        
+        if vehicle_type is not None:
+            query = query.where(P2HDailyStat.vehicle_type == vehicle_type)
+        
+        row = (await db.execute(query)).one()
+        
+        return {
+            "normal": int(row.normal),
+            "abnormal": int(row.abnormal),
+            "warning": int(row.warning),
+            "total": int(row.total),
+        }
+    
+    async def get_monthly_status_counts(
+        self,
+        db: AsyncSession,
+        start_date: date,
+        end_date: date,
+        vehicle_type: Optional[str] = None,
+        group_by_vehicle_type: bool = False
+    ) -> List[tuple]:
+        """
+        Get monthly status counts from the daily rollup.
+        
+        Args:
+            db: Database session
+            start_date: Inclusive lower bound of the rollup date
+            end_date: Exclusive upper bound of the rollup date
+            vehicle_type: Optional vehicle type filter
+            group_by_vehicle_type: Also group rows by vehicle type
+        
+        Returns:
+            List of rows (month, [vehicle_type,] overall_status, total)
+        """
+        month = func.date_trunc(literal_column("'month'"), P2HDailyStat.date).label("month")
+        group_columns = [month]
+        if group_by_vehicle_type:
+            group_columns.append(P2HDailyStat.vehicle_type)
+        group_columns.append(P2HDailyStat.overall_status)
+        
+        query = select(
+            *group_columns,
+            func.sum(P2HDailyStat.report_count).label("total")
+        ).where(
+            P2HDailyStat.date >= start_date,
+            P2HDailyStat.date < end_date
+        )
+        
+        if vehicle_type is not None:
+            query = query.where(P2HDailyStat.vehicle_type == vehicle_type)
+        
+        return list((await db.execute(query.group_by(*group_columns))).all())
+
+    
+    async def get_status_counts_by_vehicle_type(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        kategori_unit: Optional[str] = None
+    ) -> List[tuple]:
+        """
+        Get status counts for every vehicle type in one grouped query.
+        
+        Args:
+            db: Database session
+            start_date: Optional inclusive start date
+            end_date: Optional inclusive end date
+            kategori_unit: Optional unit category filter
+        
+        Returns:
+            List of rows (vehicle_type, overall_status, total)
+        """
+        query = select(
+            P2HDailyStat.vehicle_type,
+            P2HDailyStat.overall_status,
+            func.sum(P2HDailyStat.report_count).label("total")
+        ).where(
+            *date_range_filter(P2HDailyStat.date, start_date, end_date)
+        )
+        
+        if kategori_unit is not None:
+            query = query.where(P2HDailyStat.kategori_unit == kategori_unit)
+        
+        result = await db.execute(
+            query.group_by(
+                P2HDailyStat.vehicle_type,
+                P2HDailyStat.overall_status
+            )
+        )
+        return list(result.all())
+
+
+# Singleton instance
+daily_stats_repository = DailyStatsRepository()
@@ -4,15 +4,18 @@ Dashboard Repository - Database operations for dashboard statistics
 Pure database queries - NO business logic
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_
-from typing import Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import Optional, Dict, Any, List
 from datetime import date
 from uuid import UUID
 
-from app.models.p2h import P2HReport
-from app.models.vehicle import Vehicle
+from app.constants import MONTH_NAMES_ID
+from app.utils.cache import cached, dashboard_cache
+from app.models.p2h import P2HReport, InspectionStatus
+from app.models.vehicle import Vehicle, VehicleType
 from .p2h_repository import P2HRepository
+from .daily_stats_repository import DailyStatsRepository
 
 
 class DashboardRepository:
@@ -20,10 +23,11 @@ class DashboardRepository:
     
     def __init__(self):
         self.p2h_repo = P2HRepository()
+        self.daily_stats_repo = DailyStatsRepository()
     
-    def get_statistics(
+    async def get_statistics(
         self,
-        db: Session,
+        db: AsyncSession,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         vehicle_type: Optional[str] = None
@@ -31,6 +35,9 @@ class DashboardRepository:
         """
         Get dashboard statistics with optional date and vehicle type filters.
         
+        Status counts and total come from a single aggregate query over the
+        p2h_daily_stats rollup.
+        
         Args:
             db: Database session
             start_date: Start date for filtering (already parsed date object)
@@ -41,32 +48,27 @@ class DashboardRepository:
             Dictionary with statistics
         """
         # Total vehicles with optional vehicle_type filter
-        vehicle_query = db.query(func.count(Vehicle.id))
+        vehicle_query = select(func.count(Vehicle.id))
         if vehicle_type:
-            vehicle_query = vehicle_query.filter(Vehicle.vehicle_type == vehicle_type)
-        total_vehicles = vehicle_query.scalar() or 0
-        
-        # P2H counts by status with date and vehicle_type filter
-        total_normal = self.p2h_repo.count_by_status(db, 'normal', start_date, end_date, vehicle_type)
-        total_abnormal = self.p2h_repo.count_by_status(db, 'abnormal', start_date, end_date, vehicle_type)
-        total_warning = self.p2h_repo.count_by_status(db, 'warning', start_date, end_date, vehicle_type)
+            vehicle_query = vehicle_query.where(Vehicle.vehicle_type == vehicle_type)
+        total_vehicles = await db.scalar(vehicle_query) or 0
         
-        # Total completed P2H with vehicle_type filter
-        total_completed = self.p2h_repo.get_reports_query(
+        # Semua hitungan status dalam satu query
+        counts = await self.daily_stats_repo.get_status_aggregates(
             db, start_date, end_date, vehicle_type
-        ).count() or 0
+        )
         
         return {
             "total_vehicles": total_vehicles,
-            "total_normal": total_normal,
-            "total_abnormal": total_abnormal,
-            "total_warning": total_warning,
-            "total_completed_p2h": total_completed,
+            "total_normal": counts["normal"],
+            "total_abnormal": counts["abnormal"],
+            "total_warning": counts["warning"],
+            "total_completed_p2h": counts["total"],
         }
     
-    def get_monthly_reports(
+    async def get_monthly_reports(
         self,
-        db: Session,
+        db: AsyncSession,
         year: int,
         vehicle_type: Optional[str] = None
     ) -> Dict[str, list]:
@@ -81,29 +83,74 @@ class DashboardRepository:
         Returns:
             Dictionary with monthly data {month_name: [normal, abnormal, warning]}
         """
-        month_names = [
-            "Januari", "Februari", "Maret", "April", "Mei", "Juni",
-            "Juli", "Agustus", "September", "Oktober", "November", "Desember"
-        ]
-        
-        monthly_data = {}
-        
-        for month_num in range(1, 13):
-            counts = self.p2h_repo.get_monthly_counts(
-                db, year, month_num, vehicle_type
-            )
-            month_name = month_names[month_num - 1]
-            monthly_data[month_name] = [
-                counts["normal"],
-                counts["abnormal"],
-                counts["warning"]
-            ]
-        
-        return monthly_data
+        breakdown = await self.get_monthly_breakdown(db, [year], vehicle_type)
+        return breakdown[year]["monthly_data"]
+    
+    async def get_monthly_breakdown(
+        self,
+        db: AsyncSession,
+        years: List[int],
+        vehicle_type: Optional[str] = None,
+        by_vehicle_type: bool = False
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Get monthly P2H report counts for one or more years in a single query.
+        
+        Args:
+            db: Database session
+            years: Years to get reports for
+            vehicle_type: Optional vehicle type filter
+            by_vehicle_type: Also build a monthly series per vehicle type
+            
+        Returns:
+            Dictionary keyed by year:
+            {year: {"monthly_data": {month_name: [normal, abnormal, warning]},
+                    "vehicle_type_data": {vehicle_type: {month_name: [...]}}}}
+            "vehicle_type_data" is only present when by_vehicle_type is True.
+        """
+        status_index = {
+            InspectionStatus.NORMAL: 0,
+            InspectionStatus.ABNORMAL: 1,
+            InspectionStatus.WARNING: 2,
+        }
+        
+        def empty_series() -> Dict[str, list]:
+            return {month_name: [0, 0, 0] for month_name in MONTH_NAMES_ID}
+        
+        breakdown = {}
+        for year in years:
+            breakdown[year] = {"monthly_data": empty_series()}
+            if by_vehicle_type:
+                breakdown[year]["vehicle_type_data"] = {}
+        
+        rows = await self.daily_stats_repo.get_monthly_status_counts(
+            db,
+            date(min(years), 1, 1),
+            date(max(years) + 1, 1, 1),
+            vehicle_type,
+            group_by_vehicle_type=by_vehicle_type
+        )
+        
+        for row in rows:
+            if row.month.year not in breakdown:
+                continue
+            
+            year_data = breakdown[row.month.year]
+            month_name = MONTH_NAMES_ID[row.month.month - 1]
+            idx = status_index[InspectionStatus(row.overall_status)]
+            year_data["monthly_data"][month_name][idx] += row.total
+            
+            if by_vehicle_type:
+                vt = row.vehicle_type.value if hasattr(row.vehicle_type, 'value') else str(row.vehicle_type)
+                series = year_data["vehicle_type_data"].setdefault(vt, empty_series())
+                series[month_name][idx] += row.total
+        
+        return breakdown
     
-    def get_vehicle_type_status(
+    @cached(dashboard_cache)
+    async def get_vehicle_type_status(
         self,
-        db: Session,
+        db: AsyncSession,
         vehicle_type: str,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
@@ -120,30 +167,53 @@ class DashboardRepository:
         Returns:
             Dictionary with counts by status
         """
-        # Base query with vehicle type join
-        query = db.query(P2HReport).join(Vehicle).filter(
-            Vehicle.vehicle_type == vehicle_type
+        counts = await self.daily_stats_repo.get_status_aggregates(
+            db, start_date, end_date, vehicle_type
         )
         
-        # Apply date filters
-        if start_date is not None:
-            query = query.filter(func.date(P2HReport.submission_date) >= start_date)
-        
-        if end_date is not None:
-            query = query.filter(func.date(P2HReport.submission_date) <= end_date)
+        return {
+            "normal": counts["normal"],
+            "abnormal": counts["abnormal"],
+            "warning": counts["warning"]
+        }
+    
+    async def get_all_vehicle_type_status(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        kategori_unit: Optional[str] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Get P2H status counts for all vehicle types at once.
         
-        # Count by status
-        normal = query.filter(P2HReport.overall_status == 'normal').count() or 0
-        abnormal = query.filter(P2HReport.overall_status == 'abnormal').count() or 0
-        warning = query.filter(P2HReport.overall_status == 'warning').count() or 0
+        Semua tipe pada enum VehicleType selalu ada di hasil (0 jika belum
+        ada laporan) sehingga frontend tidak perlu request per tipe.
         
-        return {
-            "normal": normal,
-            "abnormal": abnormal,
-            "warning": warning
+        Args:
+            db: Database session
+            start_date: Optional start date filter
+            end_date: Optional end date filter
+            kategori_unit: Optional unit category filter
+            
+        Returns:
+            Dictionary {vehicle_type: {"normal", "abnormal", "warning"}}
+        """
+        result = {
+            vehicle_type.value: {"normal": 0, "abnormal": 0, "warning": 0}
+            for vehicle_type in VehicleType
         }
+        
+        rows = await self.daily_stats_repo.get_status_counts_by_vehicle_type(
+            db, start_date, end_date, kategori_unit
+        )
+        for vehicle_type, overall_status, total in rows:
+            result[vehicle_type.value][overall_status.value] = int(total)
+        
+        return result
     
-    def get_vehicle_types(self, db: Session) -> list:
+    @cached(dashboard_cache)
+    async def get_vehicle_types(self, db: AsyncSession) -> list:
         """
         Get all distinct vehicle types from database.
         
@@ -153,8 +223,8 @@ class DashboardRepository:
         Returns:
             List of vehicle type strings
         """
-        result = db.query(Vehicle.vehicle_type).distinct().all()
-        return [row[0] for row in result if row[0]]
+        result = await db.scalars(select(Vehicle.vehicle_type).distinct())
+        return [vehicle_type for vehicle_type in result.all() if vehicle_type]
 
 
 # Singleton instance
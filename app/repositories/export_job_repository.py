@@ -0,0 +1,176 @@
+"""
+Export Job Repository - Database operations for background export jobs
+
+Tabel export_jobs berfungsi sebagai antrian: job ditulis oleh POST
+/export/jobs (status PENDING) lalu di-claim oleh worker export.
+
+Method async dipakai router & worker loop (AsyncSession); method yang
+menerima Session (sync) dipakai thread yang menjalankan export, karena
+query export membaca lewat server-side cursor psycopg2.
+
+Pure database queries - NO business logic
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.engine import Row
+from typing import List, Optional
+from datetime import datetime
+from uuid import UUID
+
+from app.models.export_job import ExportJob, ExportJobStatus
+from .base import BaseRepository
+
+
+class ExportJobRepository(BaseRepository[ExportJob]):
+    """Repository for export job operations"""
+    
+    def __init__(self):
+        super().__init__(ExportJob)
+    
+    async def get_recent_by_user(self, db: AsyncSession, user_id: UUID, limit: int) -> List[ExportJob]:
+        """Get the newest jobs created by a user"""
+        result = await db.scalars(
+            select(ExportJob).where(
+                ExportJob.created_by == user_id
+            ).order_by(ExportJob.created_at.desc()).limit(limit)
+        )
+        return list(result.all())
+    
+    async def claim_pending(self, db: AsyncSession, limit: int) -> List[Row]:
+        """
+        Claim the oldest pending jobs (FOR UPDATE SKIP LOCKED).
+        
+        Job yang di-claim langsung ditandai RUNNING, sehingga worker di
+        proses lain tidak mengambil job yang sama. Commit dilakukan oleh caller.
+        
+        Args:
+            db: Database session
+            limit: Maximum jobs to claim
+        
+        Returns:
+            Rows of (id, export_type, format, filters)
+        """
+        rows = (await db.execute(
+            select(
+                ExportJob.id,
+                ExportJob.export_type,
+                ExportJob.format,
+                ExportJob.filters
+            ).where(
+                ExportJob.status == ExportJobStatus.PENDING
+            ).order_by(
+                ExportJob.created_at
+            ).limit(limit).with_for_update(skip_locked=True)
+        )).all()
+        
+        if rows:
+            now = datetime.utcnow()
+            await db.execute(
+                update(ExportJob).where(
+                    ExportJob.id.in_([row.id for row in rows])
+                ).values(
+                    status=ExportJobStatus.RUNNING,
+                    started_at=now,
+                    heartbeat_at=now
+                ).execution_options(synchronize_session=False)
+            )
+        
+        return rows
+    
+    async def fail_stale(self, db: AsyncSession, heartbeat_before: datetime, expires_at: datetime) -> int:
+        """
+        Mark running jobs whose worker stopped reporting as failed (no commit).
+        
+        Args:
+            db: Database session
+            heartbeat_before: Jobs with an older heartbeat are considered dead
+            expires_at: When the failed job row may be deleted
+        
+        Returns:
+            Number of failed jobs
+        """
+        result = await db.execute(
+            update(ExportJob).where(
+                ExportJob.status == ExportJobStatus.RUNNING,
+                ExportJob.heartbeat_at < heartbeat_before
+            ).values(
+                status=ExportJobStatus.FAILED,
+                error_message="Export terhenti karena worker berhenti, silakan buat ulang",
+                finished_at=datetime.utcnow(),
+                expires_at=expires_at
+            ).execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
+    async def get_expired(self, db: AsyncSession, now: datetime) -> List[Row]:
+        """Get finished jobs past their retention: rows of (id, file_path)"""
+        result = await db.execute(
+            select(ExportJob.id, ExportJob.file_path).where(ExportJob.expires_at <= now)
+        )
+        return result.all()
+    
+    async def get_stored_files(self, db: AsyncSession) -> List[Row]:
+        """Get jobs with a stored file, newest first: rows of (id, file_path, file_size)"""
+        result = await db.execute(
+            select(ExportJob.id, ExportJob.file_path, ExportJob.file_size).where(
+                ExportJob.status == ExportJobStatus.DONE,
+                ExportJob.file_path.is_not(None)
+            ).order_by(ExportJob.finished_at.desc())
+        )
+        return result.all()
+    
+    async def delete_by_ids(self, db: AsyncSession, job_ids: List[UUID]) -> None:
+        """Delete job rows (no commit)"""
+        if not job_ids:
+            return
+        await db.execute(
+            delete(ExportJob).where(ExportJob.id.in_(job_ids)).execution_options(synchronize_session=False)
+        )
+    
+    def set_progress(self, db: Session, job_id: UUID, processed_rows: int, total_rows: Optional[int] = None) -> None:
+        """Update progress & heartbeat of a running job (commit)"""
+        values = {"processed_rows": processed_rows, "heartbeat_at": datetime.utcnow()}
+        if total_rows is not None:
+            values["total_rows"] = total_rows
+        db.execute(update(ExportJob).where(ExportJob.id == job_id).values(**values))
+        db.commit()
+    
+    def mark_done(
+        self,
+        db: Session,
+        job_id: UUID,
+        file_path: str,
+        filename: str,
+        file_size: int,
+        expires_at: datetime
+    ) -> None:
+        """Record the finished export file (commit)"""
+        db.execute(
+            update(ExportJob).where(ExportJob.id == job_id).values(
+                status=ExportJobStatus.DONE,
+                file_path=file_path,
+                filename=filename,
+                file_size=file_size,
+                finished_at=datetime.utcnow(),
+                expires_at=expires_at
+            )
+        )
+        db.commit()
+    
+    def mark_failed(self, db: Session, job_id: UUID, error_message: str, expires_at: datetime) -> None:
+        """Record a failed export (commit)"""
+        db.execute(
+            update(ExportJob).where(ExportJob.id == job_id).values(
+                status=ExportJobStatus.FAILED,
+                error_message=error_message,
+                finished_at=datetime.utcnow(),
+                expires_at=expires_at
+            )
+        )
+        db.commit()
+
+
+# Singleton instance
+export_job_repository = ExportJobRepository()
@@ -0,0 +1,195 @@
+"""
+Export Repository - Query data export (Users, Vehicles, P2H Reports)
+
+Pure database queries - NO business logic
+
+Setiap query hanya memilih kolom yang diekspor (diberi label) dan mengambil
+relasi lewat join eksplisit, sehingga satu export = satu SELECT yang
+menghasilkan Row tuple ringan, tanpa entity ORM dan tanpa lazy load per baris.
+"""
+
+from sqlalchemy import Select, or_, select
+from typing import Optional
+from datetime import date
+
+from app.models.user import User, UserRole, UserKategori, Department, Position
+from app.models.vehicle import Vehicle, UnitKategori, ShiftType
+from app.models.p2h import P2HReport, InspectionStatus
+from .base import date_range_filter
+
+
+class ExportRepository:
+    """Repository for export queries"""
+    
+    def get_users_export_query(
+        self,
+        role: Optional[UserRole] = None,
+        kategori: Optional[UserKategori] = None,
+        is_active: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> Select:
+        """
+        Get select statement for the users export.
+        
+        Department & position di-outer join (user tanpa department tetap ikut).
+        
+        Args:
+            role: Filter by role
+            kategori: Filter by kategori pengguna
+            is_active: Filter by active status
+            search: Search in name, email, phone
+        
+        Returns:
+            Select of labelled columns, newest first
+        """
+        query = select(
+            User.email.label("email"),
+            User.full_name.label("full_name"),
+            User.phone_number.label("phone_number"),
+            User.birth_date.label("birth_date"),
+            User.role.label("role"),
+            User.kategori_pengguna.label("kategori"),
+            Department.nama_department.label("department"),
+            Position.nama_posisi.label("position"),
+            User.is_active.label("is_active"),
+            User.created_at.label("created_at"),
+        ).select_from(User).outerjoin(
+            Department, User.department_id == Department.id
+        ).outerjoin(
+            Position, User.position_id == Position.id
+        )
+        
+        if role is not None:
+            query = query.where(User.role == role)
+        
+        if kategori is not None:
+            query = query.where(User.kategori_pengguna == kategori)
+        
+        if is_active is not None:
+            query = query.where(User.is_active == is_active)
+        
+        if search:
+            query = query.where(or_(
+                User.full_name.ilike(f"%{search}%"),
+                User.email.ilike(f"%{search}%"),
+                User.phone_number.ilike(f"%{search}%")
+            ))
+        
+        return query.order_by(User.created_at.desc())
+    
+    def get_vehicles_export_query(
+        self,
+        kategori: Optional[UnitKategori] = None,
+        vehicle_type: Optional[str] = None,
+        shift_type: Optional[ShiftType] = None,
+        is_active: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> Select:
+        """
+        Get select statement for the vehicles export.
+        
+        Args:
+            kategori: Filter by kategori unit
+            vehicle_type: Filter by vehicle type
+            shift_type: Filter by shift type
+            is_active: Filter by active status
+            search: Search in plat_nomor, no_lambung
+        
+        Returns:
+            Select of labelled columns, newest first
+        """
+        query = select(
+            Vehicle.plat_nomor.label("plat_nomor"),
+            Vehicle.no_lambung.label("no_lambung"),
+            Vehicle.vehicle_type.label("vehicle_type"),
+            Vehicle.kategori_unit.label("kategori"),
+            Vehicle.shift_type.label("shift_type"),
+            Vehicle.merk.label("merk"),
+            Vehicle.stnk_expiry.label("stnk_expiry"),
+            Vehicle.kir_expiry.label("kir_expiry"),
+            Vehicle.is_active.label("is_active"),
+            Vehicle.created_at.label("created_at"),
+        )
+        
+        if kategori is not None:
+            query = query.where(Vehicle.kategori_unit == kategori)
+        
+        if vehicle_type is not None:
+            query = query.where(Vehicle.vehicle_type == vehicle_type)
+        
+        if shift_type is not None:
+            query = query.where(Vehicle.shift_type == shift_type)
+        
+        if is_active is not None:
+            query = query.where(Vehicle.is_active == is_active)
+        
+        if search:
+            query = query.where(or_(
+                Vehicle.plat_nomor.ilike(f"%{search}%"),
+                Vehicle.no_lambung.ilike(f"%{search}%")
+            ))
+        
+        return query.order_by(Vehicle.created_at.desc())
+    
+    def get_reports_export_query(
+        self,
+        kategori: Optional[UnitKategori] = None,
+        status: Optional[InspectionStatus] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        search: Optional[str] = None
+    ) -> Select:
+        """
+        Get select statement for the P2H reports export.
+        
+        Kendaraan & pemeriksa di-join langsung (inner join, sama seperti
+        export sebelumnya).
+        
+        Args:
+            kategori: Filter by kategori unit kendaraan
+            status: Filter by overall status
+            start_date: Inclusive start (submission_date)
+            end_date: Inclusive end (submission_date)
+            search: Search in vehicle plat or inspector name
+        
+        Returns:
+            Select of labelled columns, newest submission first
+        """
+        query = select(
+            P2HReport.submission_date.label("submission_date"),
+            P2HReport.submission_time.label("submission_time"),
+            P2HReport.shift_number.label("shift_number"),
+            Vehicle.plat_nomor.label("plat_nomor"),
+            Vehicle.no_lambung.label("no_lambung"),
+            Vehicle.vehicle_type.label("vehicle_type"),
+            Vehicle.kategori_unit.label("kategori"),
+            User.full_name.label("inspector_name"),
+            P2HReport.overall_status.label("overall_status"),
+        ).select_from(P2HReport).join(
+            Vehicle, P2HReport.vehicle_id == Vehicle.id
+        ).join(
+            User, P2HReport.user_id == User.id
+        ).where(
+            *date_range_filter(P2HReport.submission_date, start_date, end_date)
+        )
+        
+        if kategori is not None:
+            query = query.where(Vehicle.kategori_unit == kategori)
+        
+        if status is not None:
+            query = query.where(P2HReport.overall_status == status)
+        
+        if search:
+            query = query.where(or_(
+                Vehicle.plat_nomor.ilike(f"%{search}%"),
+                User.full_name.ilike(f"%{search}%")
+            ))
+        
+        return query.order_by(
+            P2HReport.submission_date.desc(),
+            P2HReport.submission_time.desc()
+        )
+
+
+# Singleton instance
+export_repository = ExportRepository()
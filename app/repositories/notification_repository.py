@@ -0,0 +1,144 @@
+"""
+Notification Repository - Database operations for the Telegram outbox
+
+Tabel telegram_notifications berfungsi sebagai outbox: baris ditulis di
+transaksi yang sama dengan laporan/job (is_sent = False) lalu dikirim oleh
+notification dispatcher.
+
+Pure database queries - NO business logic
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, update
+from typing import List, Tuple
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.models.notification import TelegramNotification
+from .base import BaseRepository
+
+
+class NotificationRepository(BaseRepository[TelegramNotification]):
+    """Repository for Telegram notification (outbox) operations"""
+    
+    def __init__(self):
+        super().__init__(TelegramNotification)
+    
+    async def claim_pending(
+        self,
+        db: AsyncSession,
+        limit: int,
+        lease: timedelta,
+        max_attempts: int,
+        created_after: datetime
+    ) -> List[Tuple[UUID, str, int]]:
+        """
+        Claim a batch of due notifications for sending.
+        
+        Baris dikunci dengan FOR UPDATE SKIP LOCKED lalu `next_attempt_at`
+        digeser sejauh `lease` dan `attempts` ditambah 1, sehingga worker
+        lain tidak mengambil baris yang sama selama pengiriman berlangsung.
+        Commit dilakukan oleh caller.
+        
+        Args:
+            db: Database session
+            limit: Maximum rows to claim
+            lease: How long the claim is held before the row is due again
+            max_attempts: Rows with this many attempts are no longer claimed
+            created_after: Ignore notifications older than this (UTC)
+        
+        Returns:
+            List of (id, message, attempt number of this claim)
+        """
+        now = datetime.utcnow()
+        rows = (await db.execute(
+            select(
+                TelegramNotification.id,
+                TelegramNotification.message,
+                TelegramNotification.attempts
+            ).where(
+                TelegramNotification.is_sent == False,
+                TelegramNotification.attempts < max_attempts,
+                TelegramNotification.created_at >= created_after,
+                or_(
+                    TelegramNotification.next_attempt_at.is_(None),
+                    TelegramNotification.next_attempt_at <= now
+                )
+            ).order_by(
+                TelegramNotification.created_at
+            ).limit(limit).with_for_update(skip_locked=True)
+        )).all()
+        
+        if rows:
+            await db.execute(
+                update(TelegramNotification).where(
+                    TelegramNotification.id.in_([row.id for row in rows])
+                ).values(
+                    attempts=TelegramNotification.attempts + 1,
+                    next_attempt_at=now + lease
+                ).execution_options(synchronize_session=False)
+            )
+        
+        return [(row.id, row.message, row.attempts + 1) for row in rows]
+    
+    async def mark_sent(self, db: AsyncSession, notification_ids: List[UUID]) -> None:
+        """Mark notifications as delivered (no commit)"""
+        if not notification_ids:
+            return
+        await db.execute(
+            update(TelegramNotification).where(
+                TelegramNotification.id.in_(notification_ids)
+            ).values(
+                is_sent=True,
+                sent_at=datetime.utcnow(),
+                next_attempt_at=None,
+                error_message=None
+            ).execution_options(synchronize_session=False)
+        )
+    
+    async def mark_failed(
+        self,
+        db: AsyncSession,
+        notification_id: UUID,
+        error_message: str,
+        retry_at: datetime
+    ) -> None:
+        """Record a failed attempt and schedule the next one (no commit)"""
+        await db.execute(
+            update(TelegramNotification).where(
+                TelegramNotification.id == notification_id
+            ).values(
+                error_message=error_message,
+                next_attempt_at=retry_at
+            ).execution_options(synchronize_session=False)
+        )
+    
+    async def requeue_exhausted(self, db: AsyncSession, max_attempts: int, created_after: datetime) -> int:
+        """
+        Reset attempts of notifications that gave up, for another retry round.
+        
+        Args:
+            db: Database session
+            max_attempts: Attempt limit used by the dispatcher
+            created_after: Only requeue notifications newer than this (UTC)
+        
+        Returns:
+            Number of requeued notifications
+        """
+        result = await db.execute(
+            update(TelegramNotification).where(
+                and_(
+                    TelegramNotification.is_sent == False,
+                    TelegramNotification.attempts >= max_attempts,
+                    TelegramNotification.created_at >= created_after
+                )
+            ).values(
+                attempts=0,
+                next_attempt_at=None
+            ).execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+# Singleton instance
+notification_repository = NotificationRepository()
@@ -4,14 +4,24 @@ P2H Repository - Database operations for P2H reports
 Pure database queries - NO business logic
 """
 
-from sqlalchemy.orm import Session, Query
-from sqlalchemy import func, and_, extract
-from typing import Optional, List
-from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload, aliased
+from sqlalchemy import func, and_, or_, case, exists, select, true, false, any_, bindparam, Select
+from sqlalchemy.dialects.postgresql import insert, ARRAY, UUID as PG_UUID
+from typing import Optional, List, Dict, Tuple
+from datetime import date, datetime
 from uuid import UUID
+import uuid
 
-from app.models.p2h import P2HReport, P2HDetail, P2HDailyTracker
-from .base import BaseRepository
+from app.models.p2h import P2HReport, P2HDetail, P2HDailyTracker, FinalStatus
+from app.models.vehicle import Vehicle, ShiftType
+from app.models.checklist import ChecklistTemplate
+from app.models.user import User
+from .base import BaseRepository, date_range_filter, keyset_paginate
+from .vehicle_repository import vehicle_keyset
+
+# Urutan "laporan terbaru" sekaligus key cursor pagination (id sebagai tie-breaker)
+REPORT_PAGE_KEY = [P2HReport.submission_date, P2HReport.submission_time, P2HReport.id]
 
 
 class P2HRepository(BaseRepository[P2HReport]):
@@ -22,134 +32,264 @@ class P2HRepository(BaseRepository[P2HReport]):
     
     def get_reports_query(
         self,
-        db: Session,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         vehicle_id: Optional[UUID] = None,
         status: Optional[str] = None,
         vehicle_type: Optional[str] = None
-    ) -> Query:
+    ) -> Select:
         """
-        Get base query for P2H reports with optional filters.
+        Get base select statement for P2H reports with optional filters.
+        
+        Statement belum dieksekusi, sehingga bisa dipakai AsyncSession
+        (router) maupun Session sync (scripts).
         
         Args:
-            db: Database session
             start_date: Filter by submission date >= start_date (already parsed)
             end_date: Filter by submission date <= end_date (already parsed)
             vehicle_id: Filter by vehicle ID
             status: Filter by overall status
             vehicle_type: Filter by vehicle type
-            
+        
         Returns:
-            SQLAlchemy Query object
+            SQLAlchemy Select statement
         """
-        query = db.query(P2HReport)
+        query = select(P2HReport)
         
         # Apply filters directly - no conditional checking
-        if start_date is not None:
-            query = query.filter(func.date(P2HReport.submission_date) >= start_date)
-        
-        if end_date is not None:
-            query = query.filter(func.date(P2HReport.submission_date) <= end_date)
+        query = query.where(*date_range_filter(P2HReport.submission_date, start_date, end_date))
         
         if vehicle_id is not None:
-            query = query.filter(P2HReport.vehicle_id == vehicle_id)
+            query = query.where(P2HReport.vehicle_id == vehicle_id)
         
         if status is not None:
-            query = query.filter(P2HReport.overall_status == status)
+            query = query.where(P2HReport.overall_status == status)
         
         if vehicle_type is not None:
-            from app.models.vehicle import Vehicle
-            query = query.join(Vehicle).filter(Vehicle.vehicle_type == vehicle_type)
+            query = query.join(Vehicle).where(Vehicle.vehicle_type == vehicle_type)
         
         return query
     
-    def count_by_status(
+    async def get_reports_page(
         self,
-        db: Session,
-        status: str,
+        db: AsyncSession,
+        limit: int,
+        after: Optional[tuple] = None,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
-        vehicle_type: Optional[str] = None
-    ) -> int:
+        status: Optional[str] = None,
+        vehicle_type: Optional[str] = None,
+        with_details: bool = False
+    ) -> List[P2HReport]:
         """
-        Count P2H reports by status with optional date and vehicle type filters.
+        Get one page of P2H reports ordered newest first (keyset pagination).
+        
+        Vehicle dan user di-load dengan joinedload (many-to-one, tidak
+        menggandakan baris), sedangkan details di-load dengan selectinload
+        agar LIMIT tetap diterapkan pada laporan, bukan pada baris detail.
         
         Args:
             db: Database session
-            status: Status to count ('normal', 'abnormal', 'warning')
-            start_date: Optional start date filter
-            end_date: Optional end date filter
+            limit: Page size (returns up to limit + 1 rows)
+            after: (submission_date, submission_time, id) of the previous page's last row
+            start_date: Optional inclusive start date
+            end_date: Optional inclusive end date
+            status: Optional overall status filter
             vehicle_type: Optional vehicle type filter
-            
+            with_details: Also load details, checklist items and the nested
+                vehicle/user relations of P2HReportListResponse
+        
         Returns:
-            Count of reports
+            List of P2HReport (limit + 1 rows if there is a next page)
         """
-        query = self.get_reports_query(db, start_date, end_date, status=status, vehicle_type=vehicle_type)
-        return query.count() or 0
+        options = [joinedload(P2HReport.vehicle), joinedload(P2HReport.user)]
+        if with_details:
+            # Relasi nested P2HReportListResponse (AsyncSession tidak bisa lazy-load)
+            options += [
+                selectinload(P2HReport.details).joinedload(P2HDetail.checklist_item),
+                joinedload(P2HReport.vehicle).joinedload(Vehicle.user),
+                joinedload(P2HReport.vehicle).joinedload(Vehicle.company),
+                *[joinedload(P2HReport.user).joinedload(rel) for rel in (
+                    User.company, User.department, User.position, User.work_status
+                )]
+            ]
+        
+        query = self.get_reports_query(
+            start_date, end_date, status=status, vehicle_type=vehicle_type
+        ).options(*options)
+        
+        result = await db.scalars(keyset_paginate(query, REPORT_PAGE_KEY, limit, after))
+        return list(result.all())
     
-    def get_monthly_counts(
-        self,
-        db: Session,
-        year: int,
-        month: int,
-        vehicle_type: Optional[str] = None
-    ) -> dict:
+    async def get_report_detail(self, db: AsyncSession, report_id: UUID) -> Optional[P2HReport]:
         """
-        Get P2H report counts by status for a specific month.
+        Get one report with details and their checklist items loaded.
+        
+        populate_existing memuat ulang laporan yang masih ada di session
+        (misalnya tepat setelah submit, saat details belum dimuat).
         
         Args:
             db: Database session
-            year: Year to filter
-            month: Month to filter (1-12)
-            vehicle_type: Optional vehicle type filter
-            
+            report_id: Report UUID
+        
         Returns:
-            Dict with counts: {"normal": int, "abnormal": int, "warning": int}
+            P2HReport or None
         """
-        from app.models.vehicle import Vehicle
-        
-        # Base query with month/year filter
-        query = db.query(P2HReport).filter(
-            and_(
-                extract('year', P2HReport.submission_date) == year,
-                extract('month', P2HReport.submission_date) == month
-            )
+        result = await db.scalars(
+            select(P2HReport).options(
+                selectinload(P2HReport.details).joinedload(P2HDetail.checklist_item)
+            ).where(P2HReport.id == report_id),
+            execution_options={"populate_existing": True}
         )
+        return result.first()
+    
+    async def get_active_checklist_items(
+        self,
+        db: AsyncSession,
+        vehicle_type: Optional[str] = None,
+        shift: Optional[str] = None
+    ) -> List[ChecklistTemplate]:
+        """
+        Get active checklist items, optionally tagged for a vehicle type / shift.
+        
+        Filter tag memakai operator array containment (`@>`) agar index GIN
+        pada vehicle_tags / applicable_shifts bisa dipakai (`= ANY(...)` tidak).
+        
+        Args:
+            db: Database session
+            vehicle_type: Vehicle type value (e.g. "Light Vehicle")
+            shift: Shift label (e.g. "Shift 1", "Long Shift", "No Shift")
+        
+        Returns:
+            List of ChecklistTemplate ordered for the form
+        """
+        query = select(ChecklistTemplate).where(ChecklistTemplate.is_active == True)
         
-        # Join with vehicle if vehicle_type filter is provided
         if vehicle_type is not None:
-            query = query.join(Vehicle).filter(Vehicle.vehicle_type == vehicle_type)
+            query = query.where(ChecklistTemplate.vehicle_tags.contains([vehicle_type]))
+            order = [ChecklistTemplate.section_name, ChecklistTemplate.item_order]
+        else:
+            order = [ChecklistTemplate.item_order]
+        
+        if shift is not None:
+            # applicable_shifts kosong = berlaku untuk semua shift (sama dengan validasi submit)
+            query = query.where(or_(
+                ChecklistTemplate.applicable_shifts.contains([shift]),
+                ChecklistTemplate.applicable_shifts == [],
+                ChecklistTemplate.applicable_shifts.is_(None)
+            ))
+        
+        result = await db.scalars(query.order_by(*order))
+        return list(result.all())
+    
+    async def get_checklist_applicability(
+        self,
+        db: AsyncSession,
+        item_ids: List[UUID],
+        vehicle_tag: str,
+        shift_label: str
+    ) -> Dict[UUID, dict]:
+        """
+        Fetch active/applicability flags of many checklist items in one query.
+        
+        Satu `WHERE id = ANY(:ids)`; kecocokan tag kendaraan dan shift
+        dihitung di SQL. vehicle_tags / applicable_shifts kosong berarti
+        item berlaku untuk semua.
+        
+        Args:
+            db: Database session
+            item_ids: Checklist item UUIDs from the submission
+            vehicle_tag: Vehicle type value (e.g. "Light Vehicle")
+            shift_label: Shift label as stored in applicable_shifts (e.g. "Shift 1")
+        
+        Returns:
+            Dict of item id -> {item_name, is_active, tag_ok, shift_ok} (missing ids are absent)
+        """
+        def applies(column, value):
+            return or_(
+                func.coalesce(func.cardinality(column), 0) == 0,
+                column.any(value)
+            )
         
-        # Count by status
-        normal = query.filter(P2HReport.overall_status == 'normal').count() or 0
-        abnormal = query.filter(P2HReport.overall_status == 'abnormal').count() or 0
-        warning = query.filter(P2HReport.overall_status == 'warning').count() or 0
+        rows = (await db.execute(
+            select(
+                ChecklistTemplate.id,
+                ChecklistTemplate.item_name,
+                ChecklistTemplate.is_active,
+                applies(ChecklistTemplate.vehicle_tags, vehicle_tag).label("tag_ok"),
+                applies(ChecklistTemplate.applicable_shifts, shift_label).label("shift_ok")
+            ).where(
+                ChecklistTemplate.id == any_(bindparam("item_ids", item_ids, type_=ARRAY(PG_UUID(as_uuid=True))))
+            )
+        )).all()
         
         return {
-            "normal": normal,
-            "abnormal": abnormal,
-            "warning": warning
+            row.id: {
+                "item_name": row.item_name,
+                "is_active": row.is_active,
+                "tag_ok": row.tag_ok,
+                "shift_ok": row.shift_ok
+            }
+            for row in rows
         }
     
-    def get_vehicles_reported_on_date(self, db: Session, report_date: date) -> int:
+    async def bulk_insert_details(self, db: AsyncSession, report_id: UUID, details: List[dict]) -> None:
         """
-        Count distinct vehicles that have reports on a specific date.
+        Insert all details of a report with one multi-row INSERT.
+        
+        Tidak melewati unit-of-work ORM dan tidak melakukan commit.
         
         Args:
             db: Database session
-            report_date: Date to check
-            
+            report_id: Flushed report UUID
+            details: Dicts with checklist_item_id, status, keterangan, image_url
+        """
+        await db.execute(
+            insert(P2HDetail).values([
+                {
+                    "id": uuid.uuid4(),
+                    "report_id": report_id,
+                    "checklist_item_id": d["checklist_item_id"],
+                    "status": d["status"],
+                    "keterangan": d.get("keterangan"),
+                    "image_url": d.get("image_url"),
+                    "is_deleted": False
+                }
+                for d in details
+            ])
+        )
+    
+    async def get_report_ids_by_client_ids(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        client_submission_ids: List[str]
+    ) -> Dict[str, UUID]:
+        """
+        Find reports already stored for the given idempotency keys.
+        
+        Args:
+            db: Database session
+            user_id: Owner of the keys
+            client_submission_ids: Idempotency keys from the client
+        
         Returns:
-            Count of distinct vehicles
+            Dict of client_submission_id -> report id
         """
-        return db.query(func.count(func.distinct(P2HReport.vehicle_id))).filter(
-            func.date(P2HReport.submission_date) == report_date
-        ).scalar() or 0
+        if not client_submission_ids:
+            return {}
+        
+        rows = (await db.execute(
+            select(P2HReport.client_submission_id, P2HReport.id).where(
+                P2HReport.user_id == user_id,
+                P2HReport.client_submission_id.in_(client_submission_ids)
+            )
+        )).all()
+        return {row.client_submission_id: row.id for row in rows}
     
-    def get_daily_tracker(
+    async def get_daily_tracker(
         self,
-        db: Session,
+        db: AsyncSession,
         vehicle_id: UUID,
         tracker_date: date
     ) -> Optional[P2HDailyTracker]:
@@ -160,40 +300,227 @@ class P2HRepository(BaseRepository[P2HReport]):
             db: Database session
             vehicle_id: Vehicle UUID
             tracker_date: Date to get tracker for
-            
+        
         Returns:
             P2HDailyTracker or None
         """
-        return db.query(P2HDailyTracker).filter(
+        result = await db.scalars(
+            select(P2HDailyTracker).where(
+                and_(
+                    P2HDailyTracker.vehicle_id == vehicle_id,
+                    P2HDailyTracker.date == tracker_date
+                )
+            )
+        )
+        return result.first()
+    
+    async def get_vehicle_with_tracker(
+        self,
+        db: AsyncSession,
+        shift_date: date,
+        non_shift_date: date,
+        vehicle_id: Optional[UUID] = None,
+        hull_number_normalized: Optional[str] = None
+    ) -> Optional[Tuple[Vehicle, Optional[P2HDailyTracker]]]:
+        """
+        Load a vehicle (with user & company) and its tracker for today in one query.
+        
+        Tanggal tracker dipilih per tipe shift di SQL: NON_SHIFT memakai
+        tanggal kalender (reset 00:00), lainnya tanggal operasional shift
+        (reset 05:00).
+        
+        Args:
+            db: Database session
+            shift_date: Operational date for SHIFT / LONG_SHIFT vehicles
+            non_shift_date: Operational date for NON_SHIFT vehicles
+            vehicle_id: Look up by vehicle id
+            hull_number_normalized: Look up by normalized hull number (unique index)
+        
+        Returns:
+            (vehicle, tracker or None), or None if the vehicle does not exist
+        """
+        tracker_date = case(
+            (Vehicle.shift_type == ShiftType.NON_SHIFT, non_shift_date),
+            else_=shift_date
+        )
+        query = select(Vehicle, P2HDailyTracker).outerjoin(
+            P2HDailyTracker,
             and_(
-                P2HDailyTracker.vehicle_id == vehicle_id,
+                P2HDailyTracker.vehicle_id == Vehicle.id,
                 P2HDailyTracker.date == tracker_date
             )
-        ).first()
+        ).options(
+            joinedload(Vehicle.user),
+            joinedload(Vehicle.company)
+        )
+        
+        if vehicle_id is not None:
+            query = query.where(Vehicle.id == vehicle_id)
+        else:
+            query = query.where(Vehicle.no_lambung_normalized == hull_number_normalized)
+        
+        row = (await db.execute(query)).first()
+        return (row[0], row[1]) if row else None
     
-    def create_daily_tracker(
+    async def lock_daily_tracker(
         self,
-        db: Session,
+        db: AsyncSession,
         vehicle_id: UUID,
         tracker_date: date
     ) -> P2HDailyTracker:
         """
-        Create new daily tracker.
+        Get or create the daily tracker and lock its row (UPSERT ... RETURNING).
+        
+        INSERT ... ON CONFLICT (vehicle_id, date) DO UPDATE selalu mengunci
+        baris tracker sampai transaksi selesai, sehingga submit bersamaan
+        untuk unit yang sama diproses bergantian dan cek quota tidak bisa
+        lolos dua kali. Tidak melakukan commit.
         
         Args:
             db: Database session
             vehicle_id: Vehicle UUID
-            tracker_date: Date for tracker
-            
+            tracker_date: Operational date of the tracker
+        
         Returns:
-            Created P2HDailyTracker
+            Locked P2HDailyTracker (state terbaru yang sudah di-commit)
         """
-        tracker = P2HDailyTracker(
+        stmt = insert(P2HDailyTracker).values(
             vehicle_id=vehicle_id,
             date=tracker_date,
-            submission_count=0
+            shift_1_done=False,
+            shift_2_done=False,
+            shift_3_done=False,
+            final_status=FinalStatus.RED,
+            submission_count=0,
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_p2h_daily_tracker_vehicle_date",
+            set_={"updated_at": stmt.excluded.updated_at}
+        ).returning(P2HDailyTracker)
+        
+        result = await db.scalars(stmt, execution_options={"populate_existing": True})
+        return result.one()
+    
+    def _pending_condition(
+        self,
+        operational_dates: Dict[ShiftType, date],
+        current_shifts: Optional[Dict[ShiftType, int]] = None
+    ):
+        """
+        Build the per-vehicle "pending" predicate (NOT EXISTS on the tracker).
+        
+        Tanggal tracker dan kolom shift_N_done yang dicek dipilih per
+        shift_type kendaraan dengan CASE, sehingga seluruh armada dievaluasi
+        dalam satu statement.
+        """
+        tracker_date = case(
+            *[(Vehicle.shift_type == shift_type, d) for shift_type, d in operational_dates.items()]
+        )
+        
+        if current_shifts is None:
+            # Tanpa shift berjalan (tanggal historis): cukup ada submit di hari itu
+            done = P2HDailyTracker.submission_count > 0
+        else:
+            done = case(
+                *[
+                    (Vehicle.shift_type == shift_type, getattr(P2HDailyTracker, f"shift_{n}_done"))
+                    for shift_type, n in current_shifts.items()
+                ],
+                else_=false()
+            )
+        
+        return ~exists().where(
+            P2HDailyTracker.vehicle_id == Vehicle.id,
+            P2HDailyTracker.date == tracker_date,
+            done
         )
-        return self.create(db, tracker)
+    
+    async def get_pending_fleet(
+        self,
+        db: AsyncSession,
+        operational_dates: Dict[ShiftType, date],
+        limit: int,
+        after: Optional[tuple] = None,
+        current_shifts: Optional[Dict[ShiftType, int]] = None,
+        vehicle_type: Optional[str] = None,
+        kategori_unit: Optional[str] = None
+    ) -> Tuple[List[Vehicle], Dict[str, int]]:
+        """
+        Get one page of active vehicles that have not done P2H, plus exact counts.
+        
+        Halaman kendaraan (keyset pada coalesce(no_lambung, ''), id) dan hitungan armada
+        diambil dalam satu round trip: subquery counts di-LEFT JOIN dengan
+        subquery halaman, sehingga counts tetap terisi walau halaman kosong.
+        
+        Args:
+            db: Database session
+            operational_dates: Operational (tracker) date per shift type
+            limit: Page size (returns up to limit + 1 vehicles); 0 fetches counts only
+            after: (coalesce(no_lambung, ''), id) of the previous page's last vehicle
+            current_shifts: Running shift number per shift type; None checks
+                for any submission on the operational date instead
+            vehicle_type: Optional vehicle type filter
+            kategori_unit: Optional unit category filter
+        
+        Returns:
+            (vehicles, counts) - counts has total_vehicles, total_pending and
+            pending_<shift_type> per shift type
+        """
+        is_pending = self._pending_condition(operational_dates, current_shifts)
+        
+        fleet_filters = [Vehicle.is_active == True]
+        if vehicle_type is not None:
+            fleet_filters.append(Vehicle.vehicle_type == vehicle_type)
+        if kategori_unit is not None:
+            fleet_filters.append(Vehicle.kategori_unit == kategori_unit)
+        
+        # Flag pending dihitung sekali per kendaraan, lalu diagregasi
+        fleet = select(
+            Vehicle.shift_type,
+            is_pending.label("is_pending")
+        ).where(*fleet_filters).subquery("fleet")
+        
+        counts = select(
+            func.count().label("total_vehicles"),
+            func.count().filter(fleet.c.is_pending).label("total_pending"),
+            *[
+                func.count().filter(
+                    and_(fleet.c.is_pending, fleet.c.shift_type == shift_type)
+                ).label(f"pending_{shift_type.value}")
+                for shift_type in ShiftType
+            ]
+        ).select_from(fleet).subquery("counts")
+        
+        if limit == 0:
+            rows = [(await db.execute(select(counts))).one()]
+        else:
+            page = keyset_paginate(
+                select(Vehicle).where(*fleet_filters, is_pending),
+                vehicle_keyset(),
+                limit,
+                after,
+                descending=False
+            ).subquery("page")
+            page_vehicle = aliased(Vehicle, page)
+            
+            rows = (await db.execute(
+                select(counts, page_vehicle).select_from(counts).outerjoin(
+                    page, true()
+                ).order_by(*vehicle_keyset(page_vehicle))
+            )).all()
+        
+        first = rows[0]
+        totals = {
+            "total_vehicles": first.total_vehicles,
+            "total_pending": first.total_pending,
+            **{
+                f"pending_{shift_type.value}": first._mapping[f"pending_{shift_type.value}"]
+                for shift_type in ShiftType
+            }
+        }
+        vehicles = [row[-1] for row in rows if limit and row[-1] is not None]
+        return vehicles, totals
 
 
 # Singleton instance
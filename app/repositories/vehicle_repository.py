@@ -4,8 +4,9 @@ Vehicle Repository - Database operations for vehicles
 Pure database queries - NO business logic
 """
 
-from sqlalchemy.orm import Session, Query
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import func, select, Select
 from typing import Optional, List
 from uuid import UUID
 
@@ -14,6 +15,20 @@ from app.utils.vehicle_utils import normalize_hull_number
 from .base import BaseRepository
 
 
+def vehicle_keyset(vehicle=Vehicle) -> list:
+    """
+    Keyset columns for paging vehicles: (coalesce(no_lambung, ''), id).
+    
+    no_lambung nullable; row comparison dengan NULL bernilai NULL sehingga
+    unit tanpa nomor lambung hilang setelah halaman pertama. Nilai cursor
+    disusun oleh app.utils.pagination.vehicle_key dengan aturan yang sama.
+    
+    Args:
+        vehicle: Vehicle entity or alias (e.g. aliased subquery)
+    """
+    return [func.coalesce(vehicle.no_lambung, ""), vehicle.id]
+
+
 class VehicleRepository(BaseRepository[Vehicle]):
     """Repository for Vehicle database operations"""
     
@@ -22,33 +37,54 @@ class VehicleRepository(BaseRepository[Vehicle]):
     
     def get_vehicles_query(
         self,
-        db: Session,
         vehicle_type: Optional[str] = None,
         is_active: Optional[bool] = None
-    ) -> Query:
+    ) -> Select:
         """
-        Get base query for vehicles with optional filters.
+        Get base select statement for vehicles with optional filters.
         
         Args:
-            db: Database session
             vehicle_type: Filter by vehicle type
             is_active: Filter by active status
             
         Returns:
-            SQLAlchemy Query object
+            SQLAlchemy Select statement
         """
-        query = db.query(Vehicle)
+        query = select(Vehicle)
         
         # Apply filters directly - no conditional checking
         if vehicle_type is not None:
-            query = query.filter(Vehicle.vehicle_type == vehicle_type)
+            query = query.where(Vehicle.vehicle_type == vehicle_type)
         
         if is_active is not None:
-            query = query.filter(Vehicle.is_active == is_active)
+            query = query.where(Vehicle.is_active == is_active)
         
         return query
     
-    def count_total(self, db: Session) -> int:
+    async def get_detail(self, db: AsyncSession, vehicle_id: UUID) -> Optional[Vehicle]:
+        """
+        Get vehicle by ID with user & company loaded (untuk VehicleResponse).
+        
+        populate_existing memuat ulang kendaraan yang sudah ada di session
+        (misalnya setelah update) beserta relasinya.
+        
+        Args:
+            db: Database session
+            vehicle_id: Vehicle UUID
+        
+        Returns:
+            Vehicle or None
+        """
+        result = await db.scalars(
+            select(Vehicle).options(
+                joinedload(Vehicle.user),
+                joinedload(Vehicle.company)
+            ).where(Vehicle.id == vehicle_id),
+            execution_options={"populate_existing": True}
+        )
+        return result.first()
+    
+    async def count_total(self, db: AsyncSession) -> int:
         """
         Count total vehicles.
         
@@ -58,9 +94,9 @@ class VehicleRepository(BaseRepository[Vehicle]):
         Returns:
             Total count
         """
-        return db.query(Vehicle).count() or 0
+        return await db.scalar(select(func.count(Vehicle.id))) or 0
     
-    def get_by_license_plate(self, db: Session, license_plate: str) -> Optional[Vehicle]:
+    async def get_by_license_plate(self, db: AsyncSession, license_plate: str) -> Optional[Vehicle]:
         """
         Get vehicle by license plate.
         
@@ -71,11 +107,12 @@ class VehicleRepository(BaseRepository[Vehicle]):
         Returns:
             Vehicle or None
         """
-        return db.query(Vehicle).filter(
-            Vehicle.license_plate == license_plate
-        ).first()
+        result = await db.scalars(
+            select(Vehicle).where(Vehicle.license_plate == license_plate)
+        )
+        return result.first()
     
-    def get_active_vehicles(self, db: Session) -> List[Vehicle]:
+    async def get_active_vehicles(self, db: AsyncSession) -> List[Vehicle]:
         """
         Get all active vehicles.
         
@@ -85,69 +122,82 @@ class VehicleRepository(BaseRepository[Vehicle]):
         Returns:
             List of active vehicles
         """
-        return self.get_vehicles_query(db, is_active=True).all()
+        result = await db.scalars(self.get_vehicles_query(is_active=True))
+        return list(result.all())
     
-    def get_by_hull_number(self, db: Session, hull_number: str) -> Optional[Vehicle]:
+    async def get_by_normalized_hull_number(
+        self,
+        db: AsyncSession,
+        hull_number: str,
+        exclude_id: Optional[UUID] = None
+    ) -> Optional[Vehicle]:
         """
-        Get vehicle by hull number (normalized search).
-        Mencari dengan normalisasi - mengabaikan spasi, titik, case, dll.
+        Get vehicle whose hull number equals `hull_number` after normalization
+        (untuk cek duplikat sebelum create/update).
         
         Args:
             db: Database session
-            hull_number: Hull number dalam format apapun (P309, P.309, p 309, dll)
-            
+            hull_number: Hull number dalam format apapun
+            exclude_id: Vehicle id to ignore (the vehicle being updated)
+        
         Returns:
             Vehicle or None
         """
-        # Normalize input untuk comparison
         normalized_input = normalize_hull_number(hull_number)
+        if not normalized_input:
+            return None
         
-        # Get all vehicles dan cari yang match setelah normalisasi
-        # Ini cara simple - untuk performa lebih baik bisa pakai SQL function
-        vehicles = db.query(Vehicle).filter(Vehicle.no_lambung.isnot(None)).all()
-        
-        for vehicle in vehicles:
-            if normalize_hull_number(vehicle.no_lambung) == normalized_input:
-                return vehicle
-        
-        return None
+        query = select(Vehicle).where(Vehicle.no_lambung_normalized == normalized_input)
+        if exclude_id is not None:
+            query = query.where(Vehicle.id != exclude_id)
+        return (await db.scalars(query)).first()
     
-    def search_vehicles(
+    async def search_vehicles(
         self,
-        db: Session,
+        db: AsyncSession,
         search_query: Optional[str] = None,
         vehicle_type: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
     ) -> List[Vehicle]:
         """
         Search vehicles dengan normalized hull number search.
         
+        User & company ikut dimuat (joinedload) untuk VehicleResponse;
+        pagination diterapkan di SQL.
+        
         Args:
             db: Database session
             search_query: Query untuk search (nomor lambung, plat nomor, dll)
             vehicle_type: Filter by vehicle type
             is_active: Filter by active status
+            skip: Number of rows to skip
+            limit: Maximum rows to return (None = semua)
             
         Returns:
             List of matching vehicles
         """
-        query = self.get_vehicles_query(db, vehicle_type, is_active)
+        query = self.get_vehicles_query(vehicle_type, is_active).options(
+            joinedload(Vehicle.user),
+            joinedload(Vehicle.company)
+        )
         
         if search_query and search_query.strip():
             # Normalize search query
             normalized_query = normalize_hull_number(search_query)
             
             # Search di multiple fields
-            # Untuk hull number, kita perlu normalize di database juga
-            # Menggunakan SQL REPLACE untuk hapus karakter khusus
-            query = query.filter(
-                (func.upper(func.replace(func.replace(func.replace(
-                    Vehicle.no_lambung, '.', ''), ' ', ''), ',', '')).like(f"%{normalized_query}%")) |
+            # Hull number dicocokkan ke kolom no_lambung_normalized (sudah uppercase alfanumerik)
+            query = query.where(
+                (Vehicle.no_lambung_normalized.like(f"%{normalized_query}%")) |
                 (func.upper(Vehicle.plat_nomor).like(f"%{search_query.upper()}%")) |
                 (func.upper(Vehicle.merk).like(f"%{search_query.upper()}%"))
             )
         
-        return query.all()
+        # Urutan stabil agar offset konsisten antar halaman
+        query = query.order_by(Vehicle.no_lambung, Vehicle.id).offset(skip).limit(limit)
+        return list((await db.scalars(query)).all())
 
 
 # Singleton instance
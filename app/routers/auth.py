@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.config import settings
 from app.schemas.user import UserResponse
 from app.services.auth_service import auth_service
@@ -16,14 +16,14 @@ router = APIRouter()
 @router.post("/login")
 async def login(
     data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint Login: Memvalidasi kredensial, membuat JWT, 
     dan menyimpannya di HttpOnly Cookie untuk keamanan Anti-XSS.
     """
     # 1. Validasi user melalui service
-    user = auth_service.authenticate_user(db, data.username, data.password)
+    user = await auth_service.authenticate_user(db, data.username, data.password)
     
     if not user:
         raise HTTPException(
@@ -66,13 +66,16 @@ async def login(
 
 @router.get("/me")
 async def get_current_user_info(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Endpoint Me: Mengambil profil user yang sedang aktif.
     Bergantung pada validasi token (baik dari Header maupun Cookie).
     """
-    user_data = UserResponse.model_validate(current_user).model_dump(mode='json')
+    # Muat ulang beserta relasi profil (company, department, dst.)
+    user = await auth_service.get_user_by_id(db, current_user.id)
+    user_data = UserResponse.model_validate(user).model_dump(mode='json')
     
     return base_response(
         message="Data profil berhasil diambil", 
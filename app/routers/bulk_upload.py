@@ -16,6 +16,8 @@ from app.schemas.bulk_upload import BulkUploadResponse, BulkUploadError
 from app.utils.password import hash_password
 from app.utils.response import base_response
 from app.repositories.vehicle_type_repository import VehicleTypeRepository
+from app.utils.cache import dashboard_cache
+from app.utils.vehicle_utils import normalize_hull_number
 
 router = APIRouter(
     prefix="/bulk-upload",
@@ -25,7 +27,7 @@ router = APIRouter(
 
 
 @router.post("/users", response_model=dict)
-async def bulk_upload_users(
+def bulk_upload_users(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -58,7 +60,7 @@ async def bulk_upload_users(
     
     try:
         # Read Excel file with converters to force phone number as string and preserve leading zeros
-        contents = await file.read()
+        contents = file.file.read()
         
         # Custom converter function to preserve leading zeros in phone numbers
         def phone_converter(value):
@@ -300,7 +302,7 @@ async def bulk_upload_users(
 
 
 @router.get("/templates/users")
-async def download_users_template(db: Session = Depends(get_db)):
+def download_users_template(db: Session = Depends(get_db)):
     """Download Excel template for bulk user upload - auto-generated with latest master data"""
     from fastapi.responses import StreamingResponse
     import openpyxl
@@ -427,7 +429,7 @@ async def download_users_template(db: Session = Depends(get_db)):
 
 
 @router.get("/templates/vehicles")
-async def download_vehicles_template(db: Session = Depends(get_db)):
+def download_vehicles_template(db: Session = Depends(get_db)):
     """Download Excel template for bulk vehicle upload - auto-generated with latest master data"""
     from fastapi.responses import StreamingResponse
     import openpyxl
@@ -532,7 +534,7 @@ async def download_vehicles_template(db: Session = Depends(get_db)):
 
 
 @router.post("/vehicles", response_model=dict)
-async def bulk_upload_vehicles(
+def bulk_upload_vehicles(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -564,7 +566,7 @@ async def bulk_upload_vehicles(
     
     try:
         # Read Excel file
-        contents = await file.read()
+        contents = file.file.read()
         df = pd.read_excel(io.BytesIO(contents))
         
         # Normalize column names
@@ -591,6 +593,9 @@ async def bulk_upload_vehicles(
         active_types = vehicle_type_repo.get_active()
         valid_type_names = {vt.name: vt.name for vt in active_types}
         
+        # Nomor lambung (ternormalisasi) yang sudah dipakai baris sebelumnya di file ini
+        seen_hull_numbers = set()
+        
         # Process each row
         for idx, row in df.iterrows():
             row_num = idx + 2
@@ -649,6 +654,18 @@ async def bulk_upload_vehicles(
                     ))
                     continue
                 
+                # Check for duplicate nomor lambung (dinormalisasi, termasuk duplikat di file yang sama)
+                no_lambung = str(row['nomor_lambung']).strip() if not pd.isna(row.get('nomor_lambung')) else None
+                hull_key = normalize_hull_number(no_lambung)
+                if hull_key and (hull_key in seen_hull_numbers or db.query(Vehicle.id).filter(Vehicle.no_lambung_normalized == hull_key).first()):
+                    errors.append(BulkUploadError(
+                        row=row_num,
+                        field='nomor_lambung',
+                        message=f'Nomor lambung {no_lambung} sudah terdaftar',
+                        data=row.to_dict()
+                    ))
+                    continue
+                
                 # Validate vehicle type against database
                 type_str = str(row['tipe_kendaraan']).strip()
                 if type_str not in valid_type_names:
@@ -730,7 +747,7 @@ async def bulk_upload_vehicles(
                 # Create vehicle
                 vehicle = Vehicle(
                     plat_nomor=plat,
-                    no_lambung=str(row['nomor_lambung']).strip() if not pd.isna(row.get('nomor_lambung')) else None,
+                    no_lambung=no_lambung,
                     vehicle_type=vehicle_type_value,
                     kategori_unit=kategori_str,
                     shift_type=shift_type,
@@ -740,6 +757,8 @@ async def bulk_upload_vehicles(
                 )
                 
                 db.add(vehicle)
+                if hull_key:
+                    seen_hull_numbers.add(hull_key)
                 success_count += 1
                 
             except Exception as e:
@@ -753,6 +772,7 @@ async def bulk_upload_vehicles(
         # Commit all successful inserts
         if success_count > 0:
             db.commit()
+            dashboard_cache.clear()
         
         # Prepare response
         response_data = BulkUploadResponse(
@@ -1,20 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
 from datetime import datetime
 from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
 from app.dependencies import get_current_user, require_role
 from app.utils.response import base_response
 from app.utils.datetime import get_current_datetime
 from app.services.dashboard_service import dashboard_service
 from app.repositories.dashboard_repository import dashboard_repository
+from app.repositories.p2h_repository import p2h_repository
+from app.utils.cache import dashboard_cache
+from app.services.dashboard_events import dashboard_events, format_sse
+from app.constants import DashboardStreamSettings
+from app.utils.pagination import (
+    decode_cursor,
+    build_page,
+    report_key,
+    vehicle_key,
+    REPORT_CURSOR_PARSERS,
+    VEHICLE_CURSOR_PARSERS
+)
 
 router = APIRouter(
     prefix="/dashboard", 
     tags=["Dashboard"],
-    dependencies=[Depends(require_role([UserRole.admin, UserRole.superadmin]))]
+    dependencies=[Depends(require_role(UserRole.admin, UserRole.superadmin))]
 )
 
 
@@ -23,7 +38,7 @@ async def get_dashboard_statistics(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     vehicle_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -59,7 +74,7 @@ async def get_dashboard_statistics(
             )
     
     # Service layer: Business logic & orchestration
-    stats = dashboard_service.get_dashboard_statistics(db, start_dt, end_dt, vehicle_type)
+    stats = await dashboard_service.get_dashboard_statistics(db, start_dt, end_dt, vehicle_type)
     
     # Controller layer: Format response
     return base_response(
@@ -79,12 +94,16 @@ async def get_dashboard_statistics(
 async def get_monthly_reports(
     year: Optional[int] = None,
     vehicle_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    compare_years: Optional[str] = None,
+    by_vehicle_type: bool = False,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get monthly P2H reports grouped by status (normal, abnormal, warning).
     Returns data for each month in the specified year.
+    Optional compare_years (comma-separated, e.g. 2024,2025) adds per-year series,
+    by_vehicle_type=true adds a series per vehicle type. Everything is one query.
     
     IMPROVED: Following 3-Layer Architecture
     - Controller: Validation & response formatting
@@ -103,8 +122,26 @@ async def get_monthly_reports(
             detail=f"Invalid year: {year}. Must be between 2020 and {current_year + 5}"
         )
     
+    extra_years = []
+    if compare_years:
+        try:
+            extra_years = [int(y) for y in compare_years.split(",") if y.strip()]
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid compare_years: {compare_years}. Expected comma-separated years"
+            )
+        for extra_year in extra_years:
+            if extra_year < 2020 or extra_year > current_year + 5:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid year: {extra_year}. Must be between 2020 and {current_year + 5}"
+                )
+    
     # Service layer: Business logic & orchestration
-    result = dashboard_service.get_monthly_report_summary(db, year, vehicle_type)
+    result = await dashboard_service.get_monthly_report_summary(
+        db, year, vehicle_type, extra_years, by_vehicle_type
+    )
     
     # Controller layer: Format response
     return base_response(
@@ -119,7 +156,7 @@ async def get_monthly_reports(
 
 @router.get("/vehicle-types")
 async def get_vehicle_types(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -129,7 +166,7 @@ async def get_vehicle_types(
     """
     
     # Get data from repository
-    vehicle_types = dashboard_repository.get_vehicle_types(db)
+    vehicle_types = await dashboard_repository.get_vehicle_types(db)
     
     # Business logic: extract enum values and sort
     vehicle_type_list = [
@@ -150,7 +187,7 @@ async def get_vehicle_type_status(
     vehicle_type: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -191,7 +228,7 @@ async def get_vehicle_type_status(
             )
     
     # Get data from repository with clean parameters
-    status_counts = dashboard_repository.get_vehicle_type_status(
+    status_counts = await dashboard_repository.get_vehicle_type_status(
         db, vehicle_type, start_dt, end_dt
     )
     
@@ -208,22 +245,148 @@ async def get_vehicle_type_status(
     )
 
 
+@router.get("/vehicle-type-health")
+async def get_vehicle_type_health(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    kategori: Optional[str] = Query(None, description="Filter kategori unit (IMM/TRAVEL)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get normal/abnormal/warning counts and health_score for ALL vehicle types.
+    
+    Pengganti fan-out /vehicle-type-status per tipe: semua tipe dihitung
+    dengan satu query GROUP BY vehicle_type, overall_status.
+    """
+    from app.models.vehicle import UnitKategori
+    
+    start_dt = None
+    end_dt = None
+    
+    if start_date:
+        try:
+            start_dt = datetime.fromisoformat(start_date).date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid start_date format: {start_date}")
+    
+    if end_date:
+        try:
+            end_dt = datetime.fromisoformat(end_date).date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid end_date format: {end_date}")
+    
+    kategori_unit = None
+    if kategori:
+        try:
+            kategori_unit = UnitKategori(kategori.upper())
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid kategori: {kategori}")
+    
+    breakdown = await dashboard_service.get_all_vehicle_type_breakdown(
+        db, start_dt, end_dt, kategori_unit
+    )
+    
+    return base_response(
+        message="Status semua tipe kendaraan berhasil diambil",
+        payload=breakdown
+    )
+
+
+@router.get("/cache-stats")
+async def get_dashboard_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get hit/miss counters of the in-process dashboard cache (per worker).
+    """
+    return base_response(
+        message="Statistik cache dashboard berhasil diambil",
+        payload=dashboard_cache.stats()
+    )
+
+
+@router.get("/stream")
+async def stream_dashboard_events(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Live dashboard updates via Server-Sent Events (text/event-stream).
+    
+    Event pertama setiap koneksi (termasuk reconnect otomatis EventSource):
+    - snapshot: payload /dashboard/statistics (tanpa filter) saat koneksi dibuka
+    
+    Event yang dikirim setelah ada submit P2H (dari worker manapun):
+    - report_created: laporan baru (format sama dengan /dashboard/recent-reports)
+    - status_counts: delta counter statistik, misalnya {"total_abnormal": 1, ...}
+    - tracker_color: warna indikator terbaru satu unit
+    - resync: event mungkin terlewat, muat ulang /dashboard/statistics
+    
+    Client mengganti state dengan snapshot lalu menerapkan delta. Dashboard
+    dengan filter memuat ulang datanya sendiri saat snapshot/resync.
+    """
+    # Subscribe sebelum snapshot dibaca agar tidak ada submit yang terlewat.
+    # Submit yang commit tepat saat snapshot dibaca bisa ikut terhitung di
+    # snapshot sekaligus sebagai delta; snapshot berikutnya mengoreksinya.
+    queue = dashboard_events.subscribe()
+    try:
+        snapshot = await dashboard_service.get_dashboard_statistics(db)
+    except Exception:
+        dashboard_events.unsubscribe(queue)
+        raise
+    
+    # Koneksi SSE bisa terbuka berjam-jam: kembalikan koneksi DB ke pool
+    # sekarang (session hanya dipakai untuk autentikasi & snapshot)
+    await db.close()
+    
+    async def event_generator():
+        try:
+            yield f"retry: {DashboardStreamSettings.RETRY_MS}\n\n"
+            yield format_sse("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), timeout=DashboardStreamSettings.KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield message
+        finally:
+            dashboard_events.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Nonaktifkan buffering di nginx/proxy
+        }
+    )
+
+
 @router.get("/recent-reports")
 async def get_recent_reports(
-    limit: int = 10,
-    db: Session = Depends(get_db),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get recent P2H reports with vehicle and user information.
-    """
     
-    from app.models.p2h import P2HReport
+    Keyset pagination pada (submission_date, submission_time, id);
+    gunakan `next_cursor` untuk halaman berikutnya.
+    """
+    try:
+        after = decode_cursor(cursor, *REPORT_CURSOR_PARSERS) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    reports = db.query(P2HReport).order_by(
-        P2HReport.submission_date.desc(),
-        P2HReport.submission_time.desc()
-    ).limit(limit).all()
+    rows = await p2h_repository.get_reports_page(db, limit, after)
+    reports, next_cursor = build_page(rows, limit, report_key)
     
     report_data = {
         "reports": [
@@ -231,11 +394,11 @@ async def get_recent_reports(
                 "id": str(report.id),
                 "submission_date": report.submission_date.isoformat() if report.submission_date else None,
                 "submission_time": report.submission_time.isoformat() if report.submission_time else None,
-                "overall_status": report.overall_status,
+                "overall_status": report.overall_status.value,
                 "vehicle": {
                     "no_lambung": report.vehicle.no_lambung,
                     "plat_nomor": report.vehicle.plat_nomor,
-                    "vehicle_type": report.vehicle.vehicle_type,
+                    "vehicle_type": report.vehicle.vehicle_type.value,
                     "merk": report.vehicle.merk
                 } if report.vehicle else None,
                 "user": {
@@ -244,7 +407,8 @@ async def get_recent_reports(
                 } if report.user else None
             }
             for report in reports
-        ]
+        ],
+        "next_cursor": next_cursor
     }
     
     return base_response(
@@ -253,13 +417,80 @@ async def get_recent_reports(
     )
 
 
+def _vehicle_item(vehicle, vehicle_status: str) -> dict:
+    """Format kendaraan untuk daftar card-details / pending-fleet"""
+    return {
+        "no_lambung": vehicle.no_lambung,
+        "plat_nomor": vehicle.plat_nomor,
+        "vehicle_type": vehicle.vehicle_type.value if hasattr(vehicle.vehicle_type, 'value') else str(vehicle.vehicle_type) if vehicle.vehicle_type else None,
+        "merk": vehicle.merk,
+        "status": vehicle_status
+    }
+
+
+@router.get("/pending-fleet")
+async def get_pending_fleet(
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya"),
+    check_date: Optional[str] = Query(None, description="Tanggal historis (YYYY-MM-DD); default shift berjalan"),
+    vehicle_type: Optional[str] = None,
+    kategori: Optional[str] = Query(None, description="Filter kategori unit (IMM/TRAVEL)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get active vehicles that have not done P2H yet, with exact fleet counts.
+    
+    Tanpa check_date, unit SHIFT/LONG_SHIFT dicek terhadap shift yang sedang
+    berjalan (tanggal operasional reset 05:00) dan unit NON_SHIFT terhadap
+    hari ini (reset 00:00). Daftar dan counts diambil dalam satu query.
+    """
+    from app.models.vehicle import UnitKategori
+    
+    check_dt = None
+    if check_date:
+        try:
+            check_dt = datetime.fromisoformat(check_date).date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid check_date format: {check_date}")
+    
+    kategori_unit = None
+    if kategori:
+        try:
+            kategori_unit = UnitKategori(kategori.upper())
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid kategori: {kategori}")
+    
+    try:
+        after = decode_cursor(cursor, *VEHICLE_CURSOR_PARSERS) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    pending = await dashboard_service.get_pending_fleet(
+        db, limit, after,
+        check_date=check_dt,
+        vehicle_type=vehicle_type,
+        kategori_unit=kategori_unit
+    )
+    
+    return base_response(
+        message="Daftar unit yang belum P2H berhasil diambil",
+        payload={
+            "counts": pending["counts"],
+            "items": [_vehicle_item(v, "pending") for v in pending["vehicles"]],
+            "next_cursor": pending["next_cursor"]
+        }
+    )
+
+
 @router.get("/card-details/{card_type}")
 async def get_card_details(
     card_type: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    limit: int = 10,
-    db: Session = Depends(get_db),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -272,10 +503,25 @@ async def get_card_details(
     - total_warning: Vehicles with warning status
     - total_completed: Vehicles that have completed P2H
     - total_pending: Vehicles pending P2H
+    
+    Hasil dipaginasi dengan cursor: kirim `next_cursor` dari payload
+    sebagai parameter `cursor` untuk mengambil halaman berikutnya.
     """
     from app.models.p2h import P2HReport
     from app.models.vehicle import Vehicle
-    from sqlalchemy import func, distinct
+    from app.repositories.base import keyset_paginate
+    from app.repositories.vehicle_repository import vehicle_keyset
+    
+    status_map = {
+        "total_normal": "normal",
+        "total_abnormal": "abnormal",
+        "total_warning": "warning",
+        "total_completed": None
+    }
+    vehicle_cards = ["total_vehicles", "total_pending"]
+    
+    if card_type not in status_map and card_type not in vehicle_cards:
+        raise HTTPException(status_code=400, detail=f"Invalid card_type: {card_type}")
     
     # Parse dates if provided
     start_dt = None
@@ -293,41 +539,36 @@ async def get_card_details(
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid end_date format: {end_date}")
     
+    # Cursor kartu laporan: (submission_date, submission_time, id)
+    # Cursor kartu kendaraan: (coalesce(no_lambung, ''), id)
+    parsers = VEHICLE_CURSOR_PARSERS if card_type in vehicle_cards else REPORT_CURSOR_PARSERS
+    try:
+        after = decode_cursor(cursor, *parsers) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     result_list = []
     
     if card_type == "total_vehicles":
         # Get all vehicles
-        vehicles = db.query(Vehicle).limit(limit).all()
-        result_list = [
-            {
-                "no_lambung": v.no_lambung,
-                "plat_nomor": v.plat_nomor,
-                "vehicle_type": v.vehicle_type.value if hasattr(v.vehicle_type, 'value') else str(v.vehicle_type) if v.vehicle_type else None,
-                "merk": v.merk,
-                "status": "registered"
-            }
-            for v in vehicles
-        ]
-        
-    elif card_type in ["total_normal", "total_abnormal", "total_warning"]:
-        # Get reports by status
-        status_map = {
-            "total_normal": "normal",
-            "total_abnormal": "abnormal",
-            "total_warning": "warning"
-        }
-        status = status_map[card_type]
-        
-        query = db.query(P2HReport).join(Vehicle).filter(
-            P2HReport.overall_status == status
+        rows = (await db.scalars(keyset_paginate(
+            select(Vehicle), vehicle_keyset(), limit, after, descending=False
+        ))).all()
+        vehicles, next_cursor = build_page(rows, limit, vehicle_key)
+        result_list = [_vehicle_item(v, "registered") for v in vehicles]
+    
+    elif card_type == "total_pending":
+        # Unit aktif yang belum P2H pada shift berjalan (atau pada end_date jika diisi)
+        pending = await dashboard_service.get_pending_fleet(db, limit, after, check_date=end_dt)
+        next_cursor = pending["next_cursor"]
+        result_list = [_vehicle_item(v, "pending") for v in pending["vehicles"]]
+    
+    else:
+        # Get reports by status (total_completed: semua status)
+        rows = await p2h_repository.get_reports_page(
+            db, limit, after, start_dt, end_dt, status=status_map[card_type]
         )
-        
-        if start_dt:
-            query = query.filter(func.date(P2HReport.submission_date) >= start_dt)
-        if end_dt:
-            query = query.filter(func.date(P2HReport.submission_date) <= end_dt)
-        
-        reports = query.order_by(P2HReport.submission_date.desc()).limit(limit).all()
+        reports, next_cursor = build_page(rows, limit, report_key)
         
         result_list = [
             {
@@ -341,64 +582,13 @@ async def get_card_details(
             }
             for r in reports
         ]
-        
-    elif card_type == "total_completed":
-        # Get vehicles that completed P2H
-        query = db.query(P2HReport).join(Vehicle)
-        
-        if start_dt:
-            query = query.filter(func.date(P2HReport.submission_date) >= start_dt)
-        if end_dt:
-            query = query.filter(func.date(P2HReport.submission_date) <= end_dt)
-        
-        reports = query.order_by(P2HReport.submission_date.desc()).limit(limit).all()
-        
-        result_list = [
-            {
-                "no_lambung": r.vehicle.no_lambung if r.vehicle else None,
-                "plat_nomor": r.vehicle.plat_nomor if r.vehicle else None,
-                "vehicle_type": r.vehicle.vehicle_type.value if (r.vehicle and hasattr(r.vehicle.vehicle_type, 'value')) else str(r.vehicle.vehicle_type) if (r.vehicle and r.vehicle.vehicle_type) else None,
-                "merk": r.vehicle.merk if r.vehicle else None,
-                "status": r.overall_status,
-                "submission_date": r.submission_date.isoformat() if r.submission_date else None,
-                "operator": r.user.full_name if r.user else None
-            }
-            for r in reports
-        ]
-        
-    elif card_type == "total_pending":
-        # Get vehicles without P2H today (or in date range)
-        today = get_current_datetime().date()
-        check_date = end_dt if end_dt else today
-        
-        # Get vehicles that have NOT submitted P2H on check_date
-        subquery = db.query(distinct(P2HReport.vehicle_id)).filter(
-            func.date(P2HReport.submission_date) == check_date
-        ).subquery()
-        
-        vehicles = db.query(Vehicle).filter(
-            ~Vehicle.id.in_(subquery)
-        ).limit(limit).all()
-        
-        result_list = [
-            {
-                "no_lambung": v.no_lambung,
-                "plat_nomor": v.plat_nomor,
-                "vehicle_type": v.vehicle_type.value if hasattr(v.vehicle_type, 'value') else str(v.vehicle_type) if v.vehicle_type else None,
-                "merk": v.merk,
-                "status": "pending"
-            }
-            for v in vehicles
-        ]
-    
-    else:
-        raise HTTPException(status_code=400, detail=f"Invalid card_type: {card_type}")
     
     return base_response(
         message=f"Detail untuk {card_type} berhasil diambil",
         payload={
             "card_type": card_type,
             "count": len(result_list),
-            "items": result_list
+            "items": result_list,
+            "next_cursor": next_cursor
         }
     )
@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 from sqlalchemy import text
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal
 from app.utils.response import base_response
+from app.utils.pool_metrics import pool_stats
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -18,14 +20,16 @@ async def health_check():
     
     # Check database
     try:
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
         health_status["database"] = "connected"
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
         health_status["database"] = "disconnected"
     
+    # Pool koneksi (per worker): in-use, overflow, latency checkout
+    health_status["database_pool"] = pool_stats()
+    
     # Check scheduler
     try:
         health_status["scheduler"] = "running"
@@ -38,6 +42,23 @@ async def health_check():
         status_code=200
     )
 
+@router.get("/metrics", tags=["Health"])
+async def metrics():
+    """
+    Telemetri pool koneksi database untuk monitoring.
+    
+    Angka berlaku per worker (lihat `pid`); jumlahkan antar worker untuk
+    dibandingkan dengan max_connections Postgres.
+    """
+    return base_response(
+        message="Metrics berhasil diambil",
+        payload={
+            "pid": os.getpid(),
+            "database_pool": pool_stats()
+        },
+        status_code=200
+    )
+
 @router.get("/", tags=["Root"])
 async def root():
     """Root endpoint"""
@@ -48,7 +48,7 @@ class WorkStatusResponse(WorkStatusBase):
 
 # --- COMPANIES ENDPOINTS ---
 @router.get("/companies")
-async def get_companies(
+def get_companies(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
@@ -58,7 +58,7 @@ async def get_companies(
     return base_response(message="Data perusahaan berhasil diambil", payload=payload)
 
 @router.post("/companies", status_code=status.HTTP_201_CREATED)
-async def create_company(
+def create_company(
     company_data: CompanyBase,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
@@ -74,7 +74,7 @@ async def create_company(
     )
 
 @router.put("/companies/{company_id}")
-async def update_company(
+def update_company(
     company_id: UUID,
     company_data: CompanyBase,
     db: Session = Depends(get_db),
@@ -96,7 +96,7 @@ async def update_company(
     )
 
 @router.delete("/companies/{company_id}")
-async def delete_company(
+def delete_company(
     company_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
@@ -117,7 +117,7 @@ async def delete_company(
 
 # --- DEPARTMENTS ENDPOINTS ---
 @router.get("/departments")
-async def get_departments(
+def get_departments(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
@@ -127,7 +127,7 @@ async def get_departments(
     return base_response(message="Data departemen berhasil diambil", payload=payload)
 
 @router.post("/departments", status_code=status.HTTP_201_CREATED)
-async def create_department(
+def create_department(
     dept_data: DepartmentBase,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
@@ -143,7 +143,7 @@ async def create_department(
     )
 
 @router.put("/departments/{dept_id}")
-async def update_department(
+def update_department(
     dept_id: UUID,
     dept_data: DepartmentBase,
     db: Session = Depends(get_db),
@@ -163,7 +163,7 @@ async def update_department(
     )
 
 @router.delete("/departments/{dept_id}")
-async def delete_department(
+def delete_department(
     dept_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
@@ -184,7 +184,7 @@ async def delete_department(
 
 # --- POSITIONS ENDPOINTS ---
 @router.get("/positions")
-async def get_positions(
+def get_positions(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
@@ -194,7 +194,7 @@ async def get_positions(
     return base_response(message="Data posisi berhasil diambil", payload=payload)
 
 @router.post("/positions", status_code=status.HTTP_201_CREATED)
-async def create_position(
+def create_position(
     pos_data: PositionBase,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
@@ -210,7 +210,7 @@ async def create_position(
     )
 
 @router.put("/positions/{pos_id}")
-async def update_position(
+def update_position(
     pos_id: UUID,
     pos_data: PositionBase,
     db: Session = Depends(get_db),
@@ -230,7 +230,7 @@ async def update_position(
     )
 
 @router.delete("/positions/{pos_id}")
-async def delete_position(
+def delete_position(
     pos_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
@@ -251,7 +251,7 @@ async def delete_position(
 
 # --- WORK STATUSES ENDPOINTS ---
 @router.get("/work-statuses")
-async def get_work_statuses(
+def get_work_statuses(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
@@ -261,7 +261,7 @@ async def get_work_statuses(
     return base_response(message="Data status kerja berhasil diambil", payload=payload)
 
 @router.post("/work-statuses", status_code=status.HTTP_201_CREATED)
-async def create_work_status(
+def create_work_status(
     status_data: WorkStatusBase,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
@@ -277,7 +277,7 @@ async def create_work_status(
     )
 
 @router.put("/work-statuses/{status_id}")
-async def update_work_status(
+def update_work_status(
     status_id: UUID,
     status_data: WorkStatusBase,
     db: Session = Depends(get_db),
@@ -297,7 +297,7 @@ async def update_work_status(
     )
 
 @router.delete("/work-statuses/{status_id}")
-async def delete_work_status(
+def delete_work_status(
     status_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
@@ -1,23 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
 from app.models.vehicle import VehicleType
 from app.models.checklist import ChecklistTemplate
 from app.schemas.p2h import (
-    ChecklistItemResponse,
     ChecklistItemCreate,  # Pastikan sudah ada di schemas
     P2HReportSubmit,
+    P2HBatchSubmit,
     P2HReportResponse,
     P2HReportListResponse
 )
 from app.services.p2h_service import p2h_service
+from app.services.checklist_service import checklist_service, CHECKLIST_CACHE_CONTROL
+from app.services.photo_service import photo_service
+from app.repositories.p2h_repository import p2h_repository
 from app.dependencies import get_current_user, require_role
 from app.utils.response import base_response
+from app.utils.http_cache import etag_matches, not_modified
+from app.utils.photo_storage import photo_store
+from app.constants import FileUploadSettings
 from app.utils.datetime import get_current_time, get_shift_number
+from app.utils.pagination import decode_cursor, build_page, report_key, REPORT_CURSOR_PARSERS
 from datetime import time
 
 router = APIRouter()
@@ -74,28 +82,23 @@ async def get_current_shift():
 
 @router.get("/checklist-items")
 async def get_all_checklist_items(
-    db: Session = Depends(get_db),
+    request: Request,
+    shift: Optional[str] = Query(None, description="Filter label shift, e.g. 'Shift 1', 'Long Shift'"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Endpoint untuk mendapatkan semua checklist items (pertanyaan P2H).
     Digunakan oleh frontend untuk filter berdasarkan vehicle_tags.
-    """
-    items = db.query(ChecklistTemplate).filter(
-        ChecklistTemplate.is_active == True
-    ).order_by(ChecklistTemplate.item_order).all()
-    
-    payload = [ChecklistItemResponse.model_validate(item).model_dump(mode='json') for item in items]
     
-    return base_response(
-        message="Semua checklist items berhasil diambil",
-        payload=payload
-    )
+    Mendukung ETag: kirim If-None-Match untuk mendapat 304 jika checklist belum berubah.
+    """
+    return await _checklist_response(request, db, None, shift)
 
 @router.post("/checklist", status_code=status.HTTP_201_CREATED)
 async def add_checklist_item(
     item_data: ChecklistItemCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
@@ -112,8 +115,8 @@ async def add_checklist_item(
         is_active=True
     )
     db.add(new_item)
-    db.commit()
-    db.refresh(new_item)
+    await db.commit()
+    checklist_service.invalidate()
     
     return base_response(
         message="Pertanyaan baru berhasil ditambahkan ke database",
@@ -129,14 +132,14 @@ async def add_checklist_item(
 async def update_checklist_item(
     checklist_id: UUID,
     item_data: ChecklistItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Endpoint untuk update checklist item yang sudah ada.
     """
     # Cari checklist item berdasarkan ID
-    item = db.query(ChecklistTemplate).filter(ChecklistTemplate.id == checklist_id).first()
+    item = await db.get(ChecklistTemplate, checklist_id)
     
     if not item:
         raise HTTPException(
@@ -152,8 +155,8 @@ async def update_checklist_item(
     item.options = item_data.options
     item.item_order = item_data.item_order
     
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    checklist_service.invalidate()
     
     return base_response(
         message="Checklist item berhasil diupdate",
@@ -168,14 +171,14 @@ async def update_checklist_item(
 @router.delete("/checklist/{checklist_id}")
 async def delete_checklist_item(
     checklist_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Endpoint untuk menghapus (soft delete) checklist item.
     """
     # Cari checklist item berdasarkan ID
-    item = db.query(ChecklistTemplate).filter(ChecklistTemplate.id == checklist_id).first()
+    item = await db.get(ChecklistTemplate, checklist_id)
     
     if not item:
         raise HTTPException(
@@ -186,7 +189,8 @@ async def delete_checklist_item(
     # Soft delete: set is_active = False
     item.is_active = False
     
-    db.commit()
+    await db.commit()
+    checklist_service.invalidate()
     
     return base_response(
         message="Checklist item berhasil dihapus",
@@ -202,37 +206,48 @@ async def delete_checklist_item(
 
 @router.get("/checklist/{vehicle_type}")
 async def get_checklist(
+    request: Request,
     vehicle_type: str, # Menggunakan str agar bisa fleksibel dengan tagging
-    db: Session = Depends(get_db),
+    shift: Optional[str] = Query(None, description="Filter label shift, e.g. 'Shift 1', 'Long Shift'"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get checklist items yang ter-tag untuk tipe kendaraan tertentu.
+    
+    Mendukung ETag: kirim If-None-Match untuk mendapat 304 jika checklist belum berubah.
     """
-    # Mencari item yang kolom vehicle_tags-nya mengandung vehicle_type
-    checklist_items = db.query(ChecklistTemplate).filter(
-        ChecklistTemplate.vehicle_tags.any(vehicle_type),
-        ChecklistTemplate.is_active == True
-    ).order_by(
-        ChecklistTemplate.section_name,
-        ChecklistTemplate.item_order
-    ).all()
+    return await _checklist_response(request, db, vehicle_type, shift)
+
+
+async def _checklist_response(
+    request: Request,
+    db: AsyncSession,
+    vehicle_type: Optional[str],
+    shift: Optional[str]
+) -> Response:
+    """Serve form checklist dari cache; 304 jika ETag client masih berlaku"""
+    cached = checklist_service.get_cached_form(vehicle_type, shift)
+    body, etag = cached if cached is not None else await checklist_service.build_form(db, vehicle_type, shift)
     
-    payload = [ChecklistItemResponse.model_validate(item).model_dump(mode='json') for item in checklist_items]
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, CHECKLIST_CACHE_CONTROL)
     
-    return base_response(
-        message=f"Checklist untuk tipe {vehicle_type} berhasil diambil",
-        payload=payload
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CHECKLIST_CACHE_CONTROL}
     )
 
+
 @router.get("/vehicle/{vehicle_id}/status")
 async def get_vehicle_p2h_status(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
-        p2h_status = p2h_service.get_vehicle_p2h_status(db, vehicle_id)
+        p2h_status = await p2h_service.get_vehicle_p2h_status(db, vehicle_id)
         return base_response(
             message="Status P2H kendaraan berhasil diperiksa",
             payload=p2h_status
@@ -243,7 +258,7 @@ async def get_vehicle_p2h_status(
 @router.post("/submit", status_code=status.HTTP_201_CREATED)
 async def submit_p2h(
     submission: P2HReportSubmit,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -272,7 +287,7 @@ async def submit_p2h(
     
     try:
         report = await p2h_service.submit_p2h(db, current_user, submission)
-        db.refresh(report)
+        report = await p2h_repository.get_report_detail(db, report.id)
         payload = P2HReportResponse.model_validate(report).model_dump(mode='json')
         return base_response(
             message="Laporan P2H berhasil disubmit",
@@ -282,40 +297,146 @@ async def submit_p2h(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/submit-batch")
+async def submit_p2h_batch(
+    batch: P2HBatchSubmit,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Submit banyak laporan P2H yang diisi offline (area pit tanpa sinyal)
+    [USER, ADMIN, SUPERADMIN ONLY - Viewer tidak boleh submit]
+    
+    - Setiap laporan membawa client_submission_id (idempotency key) dan
+      captured_at (waktu pengisian di perangkat)
+    - Aturan shift divalidasi terhadap captured_at
+    - Satu transaksi; hasil per laporan: created / duplicate / rejected.
+      Retry batch yang sama aman (laporan tersimpan dikembalikan sebagai duplicate)
+    """
+    # Authorization: Viewer tidak boleh submit P2H
+    if current_user.role == UserRole.viewer:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Viewer tidak memiliki akses untuk mengisi P2H. Silakan login sebagai User."
+        )
+    
+    result = await p2h_service.submit_p2h_batch(db, current_user, batch.reports)
+    summary = result["summary"]
+    
+    return base_response(
+        message=(
+            f"{summary['created']} laporan tersimpan, {summary['duplicate']} duplikat, "
+            f"{summary['rejected']} ditolak"
+        ),
+        payload=result
+    )
+
 @router.get("/reports")
 async def get_p2h_reports(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    from app.models.p2h import P2HReport, P2HDetail
-    from sqlalchemy.orm import joinedload
+    # Keyset pagination: (submission_date, submission_time, id) terbaru dulu
+    try:
+        after = decode_cursor(cursor, *REPORT_CURSOR_PARSERS) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Load with details untuk menampilkan keterangan
-    reports = db.query(P2HReport).options(
-        joinedload(P2HReport.vehicle),
-        joinedload(P2HReport.user),
-        joinedload(P2HReport.details).joinedload(P2HDetail.checklist_item)
-    ).order_by(
-        P2HReport.submission_date.desc(),
-        P2HReport.submission_time.desc()
-    ).offset(skip).limit(limit).all()
+    rows = await p2h_repository.get_reports_page(db, limit, after, with_details=True)
+    reports, next_cursor = build_page(rows, limit, report_key)
     
     # mode='json' converts UUID to string automatically
-    payload = [P2HReportListResponse.model_validate(r).model_dump(mode='json') for r in reports]
+    payload = {
+        "items": [P2HReportListResponse.model_validate(r).model_dump(mode='json') for r in reports],
+        "next_cursor": next_cursor
+    }
     return base_response(message="Daftar laporan P2H berhasil diambil", payload=payload)
 
 @router.get("/reports/{report_id}")
 async def get_p2h_report(
     report_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    from app.models.p2h import P2HReport
-    report = db.query(P2HReport).filter(P2HReport.id == report_id).first()
+    report = await p2h_repository.get_report_detail(db, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Laporan P2H tidak ditemukan")
     
     payload = P2HReportResponse.model_validate(report).model_dump(mode='json')
-    return base_response(message="Detail laporan P2H berhasil ditemukan", payload=payload)
\ No newline at end of file
+    return base_response(message="Detail laporan P2H berhasil ditemukan", payload=payload)
+
+
+# --- FOTO BUKTI KERUSAKAN ---
+
+@router.post("/photos", status_code=status.HTTP_201_CREATED)
+async def upload_p2h_photo(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload satu foto bukti (body = isi file mentah, Content-Type image/jpeg atau image/png).
+    
+    Body di-stream langsung ke storage (tidak ditampung di memory). Foto
+    dengan isi yang sama mengembalikan photo_id yang sama. Kirim photo_id
+    di details[].photo_id saat submit P2H.
+    """
+    if current_user.role == UserRole.viewer:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Viewer tidak memiliki akses untuk mengupload foto P2H."
+        )
+    
+    content_length = request.headers.get("content-length")
+    photo = await photo_service.save_upload(
+        request.stream(),
+        request.headers.get("content-type"),
+        int(content_length) if content_length and content_length.isdigit() else None
+    )
+    
+    return base_response(
+        message="Foto berhasil diupload",
+        payload=photo,
+        status_code=status.HTTP_200_OK if photo["deduplicated"] else status.HTTP_201_CREATED
+    )
+
+
+@router.get("/photos/{photo_id}")
+async def get_p2h_photo(
+    photo_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Foto asli (immutable - boleh di-cache browser selamanya)"""
+    return _photo_response(request, photo_id, photo_id)
+
+
+@router.get("/photos/{photo_id}/thumbnail")
+async def get_p2h_photo_thumbnail(
+    photo_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Thumbnail JPEG kecil untuk daftar laporan"""
+    return _photo_response(request, photo_id, photo_service.thumbnail_key(photo_id))
+
+
+def _photo_response(request: Request, photo_id: str, key: str) -> Response:
+    """Serve file foto dari store dengan header cache jangka panjang"""
+    path = photo_store.local_path(key) if photo_service.is_valid_photo_id(photo_id) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Foto tidak ditemukan")
+    
+    # Key berbasis hash isi: isi file untuk URL ini tidak pernah berubah
+    etag = f'"{key}"'
+    cache_control = f"private, max-age={FileUploadSettings.PHOTO_CACHE_MAX_AGE}, immutable"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control)
+    
+    return FileResponse(
+        path,
+        media_type="image/png" if key.endswith(".png") else "image/jpeg",
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
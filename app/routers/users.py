@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
 from app.services.auth_service import auth_service
@@ -14,21 +14,24 @@ router = APIRouter()
 
 @router.get("/me")
 async def get_current_user_profile(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get current logged-in user profile.
     Accessible by all authenticated users.
     """
+    # Muat ulang beserta relasi profil (company, department, dst.)
+    user = await auth_service.get_user_by_id(db, current_user.id)
     return base_response(
         message="Data profil berhasil diambil",
-        payload=UserResponse.model_validate(current_user).model_dump(mode='json')
+        payload=UserResponse.model_validate(user).model_dump(mode='json')
     )
 
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
@@ -36,7 +39,7 @@ async def create_user(
     Password akan otomatis dibuat: namadepan + DDMMYYYY jika dikosongkan.
     """
     try:
-        user = auth_service.create_user(db, user_data)
+        user = await auth_service.create_user(db, user_data)
         return base_response(
             message="User berhasil didaftarkan ke sistem",
             payload=UserResponse.model_validate(user).model_dump(mode='json'),
@@ -52,13 +55,13 @@ async def create_user(
 async def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Melihat Daftar Semua User (Superadmin dan Admin).
     """
-    users = auth_service.get_all_users(db, skip=skip, limit=limit)
+    users = await auth_service.get_all_users(db, skip=skip, limit=limit)
     # Data dikonversi ke UserResponse agar password_hash tidak ikut terkirim
     payload = [UserResponse.model_validate(u).model_dump(mode='json') for u in users]
     
@@ -70,13 +73,13 @@ async def get_users(
 @router.get("/{user_id}")
 async def get_user(
     user_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Melihat Detail User berdasarkan ID.
     """
-    user = auth_service.get_user_by_id(db, user_id)
+    user = await auth_service.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,14 +95,14 @@ async def get_user(
 async def update_user(
     user_id: UUID,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Memperbarui Data User (Superadmin dan Admin).
     """
     try:
-        user = auth_service.update_user(db, user_id, user_data)
+        user = await auth_service.update_user(db, user_id, user_data)
         return base_response(
             message="Data user berhasil diperbarui",
             payload=UserResponse.model_validate(user).model_dump(mode='json')
@@ -113,13 +116,13 @@ async def update_user(
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Menonaktifkan User (Soft Delete, Superadmin dan Admin).
     """
-    success = auth_service.delete_user(db, user_id)
+    success = await auth_service.delete_user(db, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -30,7 +30,7 @@ def get_vehicle_type_service(db: Session = Depends(get_db)) -> VehicleTypeServic
 
 
 @router.get("/active", response_model=list[VehicleTypeResponse])
-async def get_active_vehicle_types(
+def get_active_vehicle_types(
     service: VehicleTypeService = Depends(get_vehicle_type_service),
     current_user: User = Depends(get_current_user)
 ):
@@ -48,7 +48,7 @@ async def get_active_vehicle_types(
 
 
 @router.get("", response_model=VehicleTypeListResponse)
-async def get_all_vehicle_types(
+def get_all_vehicle_types(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
@@ -70,7 +70,7 @@ async def get_all_vehicle_types(
 
 
 @router.get("/{vehicle_type_id}", response_model=VehicleTypeResponse)
-async def get_vehicle_type(
+def get_vehicle_type(
     vehicle_type_id: UUID,
     service: VehicleTypeService = Depends(get_vehicle_type_service),
     current_user: User = Depends(get_current_user)
@@ -89,7 +89,7 @@ async def get_vehicle_type(
 
 
 @router.post("", response_model=VehicleTypeResponse, status_code=201)
-async def create_vehicle_type(
+def create_vehicle_type(
     vehicle_type: VehicleTypeCreate,
     service: VehicleTypeService = Depends(get_vehicle_type_service),
     current_user: User = Depends(get_current_user)
@@ -109,7 +109,7 @@ async def create_vehicle_type(
 
 
 @router.put("/{vehicle_type_id}", response_model=VehicleTypeResponse)
-async def update_vehicle_type(
+def update_vehicle_type(
     vehicle_type_id: UUID,
     vehicle_type: VehicleTypeUpdate,
     service: VehicleTypeService = Depends(get_vehicle_type_service),
@@ -129,7 +129,7 @@ async def update_vehicle_type(
 
 
 @router.delete("/{vehicle_type_id}")
-async def delete_vehicle_type(
+def delete_vehicle_type(
     vehicle_type_id: UUID,
     service: VehicleTypeService = Depends(get_vehicle_type_service),
     current_user: User = Depends(get_current_user)
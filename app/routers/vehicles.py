@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
 from app.models.vehicle import Vehicle
 from app.schemas.vehicle import VehicleCreate, VehicleUpdate, VehicleResponse
@@ -11,47 +12,75 @@ from app.dependencies import get_current_user, require_role
 from app.services.p2h_service import p2h_service
 from app.utils.response import base_response
 from app.repositories.vehicle_repository import vehicle_repository 
+from app.utils.cache import dashboard_cache
+from app.utils.vehicle_utils import normalize_hull_number
 
 router = APIRouter()
 
+
+def duplicate_hull_number(no_lambung: str) -> HTTPException:
+    """400 untuk nomor lambung yang sudah dipakai kendaraan lain"""
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Nomor lambung {no_lambung} sudah terdaftar"
+    )
+
+
+async def commit_vehicle(
+    db: AsyncSession,
+    no_lambung: Optional[str],
+    vehicle_id: Optional[UUID] = None
+) -> None:
+    """
+    Commit perubahan kendaraan; bentrok unique index nomor lambung -> 400.
+    
+    Cek duplikat sebelum commit tidak menutup race antar request (dua admin
+    menyimpan nomor lambung yang sama bersamaan), jadi IntegrityError dari
+    commit diperiksa ulang. Pelanggaran constraint lain tetap di-raise.
+    """
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        if no_lambung and await vehicle_repository.get_by_normalized_hull_number(
+            db, no_lambung, exclude_id=vehicle_id
+        ):
+            raise duplicate_hull_number(no_lambung)
+        raise
+
 # --- ENDPOINT PUBLIK (TANPA LOGIN) ---
 
 @router.get("/lambung/{no_lambung}")
 async def get_vehicle_by_lambung(
     no_lambung: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mencari kendaraan berdasarkan nomor lambung secara publik.
     Digunakan oleh driver untuk validasi unit sebelum mengisi form P2H.
     Mendukung format fleksibel: P309, P.309, p 309, P,309 semua akan ditemukan.
     """
-    # Gunakan repository method yang sudah support normalisasi
-    vehicle = vehicle_repository.get_by_hull_number(db, no_lambung)
+    # Kendaraan + tracker hari ini dalam satu query, status dihitung di memory (read-only)
+    scan = await p2h_service.scan_vehicle(db, no_lambung)
     
-    if not vehicle:
+    if not scan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Kendaraan dengan nomor lambung {no_lambung} tidak ditemukan"
         )
     
-    # Mendapatkan status P2H hari ini (Shift, ketersediaan, dll)
-    p2h_status = p2h_service.get_vehicle_p2h_status(db, vehicle.id)
-    
-    # Cek apakah masih bisa submit P2H
-    current_shift = p2h_status["current_shift"]
-    can_submit, submit_message = p2h_service.can_submit_p2h(db, vehicle, current_shift)
+    vehicle, p2h_status = scan
     
     # Gabungkan data kendaraan dan status P2H dalam satu payload
     result = {
         "vehicle": VehicleResponse.model_validate(vehicle).model_dump(mode='json'),
-        "can_submit_p2h": can_submit,
+        "can_submit_p2h": p2h_status["can_submit_p2h"],
         "p2h_completed_today": p2h_status["color_code"] == "green",
-        "current_shift": current_shift,
+        "current_shift": p2h_status["current_shift"],
         "shifts_completed": p2h_status["shifts_completed"],
         "status_p2h": p2h_status["status_p2h"],
         "color_code": p2h_status["color_code"],
-        "message": submit_message
+        "message": p2h_status["message"]
     }
     
     return base_response(
@@ -65,26 +94,22 @@ async def get_vehicle_by_lambung(
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_vehicle(
     vehicle_data: VehicleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Menambah kendaraan baru (Superadmin dan Admin).
     """
-    existing = db.query(Vehicle).filter(
-        Vehicle.no_lambung == vehicle_data.no_lambung,
-        Vehicle.is_active == True
-    ).first()
+    # Cek duplikat setelah normalisasi (P.309 == P309) - sesuai unique index
+    existing = await vehicle_repository.get_by_normalized_hull_number(db, vehicle_data.no_lambung)
     if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Nomor lambung {vehicle_data.no_lambung} sudah terdaftar"
-        )
+        raise duplicate_hull_number(vehicle_data.no_lambung)
     
     vehicle = Vehicle(**vehicle_data.model_dump())
     db.add(vehicle)
-    db.commit()
-    db.refresh(vehicle)
+    await commit_vehicle(db, vehicle_data.no_lambung)
+    vehicle = await vehicle_repository.get_detail(db, vehicle.id)
+    dashboard_cache.clear()
     
     return base_response(
         message="Data kendaraan berhasil ditambahkan",
@@ -100,7 +125,7 @@ async def get_vehicles(
     search: Optional[str] = Query(None, description="Cari berdasarkan nomor lambung, plat, atau merk"),
     vehicle_type: Optional[str] = Query(None, description="Filter tipe kendaraan"),
     is_active: Optional[bool] = Query(None, description="Filter status aktif"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -111,22 +136,16 @@ async def get_vehicles(
     is_active_filter = True if is_active is None else is_active
     
     # Gunakan repository search method yang sudah support normalisasi
-    vehicles = vehicle_repository.search_vehicles(
+    # (pagination dan relasi user/company dimuat di query yang sama)
+    vehicles = await vehicle_repository.search_vehicles(
         db=db,
         search_query=search,
         vehicle_type=vehicle_type,
-        is_active=is_active_filter
+        is_active=is_active_filter,
+        skip=skip,
+        limit=limit
     )
     
-    # Apply pagination manual setelah search
-    # (atau bisa modifikasi repository untuk handle pagination)
-    total = len(vehicles)
-    vehicles = vehicles[skip:skip + limit]
-    
-    # Load relasi untuk response
-    for vehicle in vehicles:
-        db.refresh(vehicle)
-    
     payload = [VehicleResponse.model_validate(v).model_dump(mode='json') for v in vehicles]
     
     return base_response(
@@ -138,16 +157,13 @@ async def get_vehicles(
 @router.get("/{vehicle_id}")
 async def get_vehicle(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Mendapatkan detail kendaraan berdasarkan ID (Wajib Login).
     """
-    vehicle = db.query(Vehicle).options(
-        joinedload(Vehicle.user),
-        joinedload(Vehicle.company)
-    ).filter(Vehicle.id == vehicle_id).first()
+    vehicle = await vehicle_repository.get_detail(db, vehicle_id)
     if not vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -164,35 +180,40 @@ async def get_vehicle(
 async def update_vehicle(
     vehicle_id: UUID,
     vehicle_data: VehicleUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Memperbarui data kendaraan (Superadmin dan Admin).
     """
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    vehicle = await db.get(Vehicle, vehicle_id)
     if not vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Kendaraan tidak ditemukan"
         )
     
-    if vehicle_data.no_lambung and vehicle_data.no_lambung != vehicle.no_lambung:
-        existing = db.query(Vehicle).filter(
-            Vehicle.no_lambung == vehicle_data.no_lambung,
-            Vehicle.id != vehicle_id
-        ).first()
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Nomor lambung {vehicle_data.no_lambung} sudah terdaftar"
+    updates = vehicle_data.model_dump(exclude_unset=True)
+    
+    # Form edit mengirim ulang nomor lambung yang sama: jangan di-assign, karena
+    # @validates akan mengisi ulang no_lambung_normalized (baris lama hasil
+    # migrasi bisa NULL karena bentrok) dan melanggar unique index
+    if "no_lambung" in updates:
+        if normalize_hull_number(updates["no_lambung"]) == normalize_hull_number(vehicle.no_lambung):
+            del updates["no_lambung"]
+        elif updates["no_lambung"]:
+            existing = await vehicle_repository.get_by_normalized_hull_number(
+                db, updates["no_lambung"], exclude_id=vehicle_id
             )
+            if existing:
+                raise duplicate_hull_number(updates["no_lambung"])
     
-    for field, value in vehicle_data.model_dump(exclude_unset=True).items():
+    for field, value in updates.items():
         setattr(vehicle, field, value)
     
-    db.commit()
-    db.refresh(vehicle)
+    await commit_vehicle(db, updates.get("no_lambung"), vehicle_id)
+    vehicle = await vehicle_repository.get_detail(db, vehicle_id)
+    dashboard_cache.clear()
     
     return base_response(
         message="Data kendaraan berhasil diperbarui",
@@ -203,13 +224,13 @@ async def update_vehicle(
 @router.delete("/{vehicle_id}")
 async def delete_vehicle(
     vehicle_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_role(UserRole.superadmin, UserRole.admin))
 ):
     """
     Menonaktifkan kendaraan/Soft Delete (Superadmin dan Admin).
     """
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    vehicle = await db.get(Vehicle, vehicle_id)
     if not vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -217,7 +238,8 @@ async def delete_vehicle(
         )
     
     vehicle.is_active = False
-    db.commit()
+    await db.commit()
+    dashboard_cache.clear()
     
     return base_response(
         message="Kendaraan berhasil dinonaktifkan",
@@ -1,14 +1,16 @@
 import logging
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select, func
 
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal
 from app.models.vehicle import Vehicle
 from app.models.p2h import P2HDailyTracker
 from app.models.notification import TelegramNotification, NotificationType
 from app.utils.datetime import get_current_date, days_until_expiry
 from app.services.telegram_service import telegram_service
+from app.repositories.notification_repository import notification_repository
+from app.services.export_job_service import export_job_service
+from app.constants import TelegramSettings
 
 logger = logging.getLogger(__name__)
 
@@ -20,21 +22,21 @@ async def reset_daily_p2h_tracker():
     """
     logger.info("🔄 Running daily P2H operational check...")
     
-    db: Session = SessionLocal()
     try:
-        current_date = get_current_date()
+        async with AsyncSessionLocal() as db:
+            current_date = get_current_date()
         
-        # Mencari tracker lama (kemarin) untuk laporan penutupan
-        old_trackers = db.query(P2HDailyTracker).filter(
-            P2HDailyTracker.date < current_date
-        ).all()
+            # Menghitung tracker lama (kemarin) untuk laporan penutupan
+            old_trackers = await db.scalar(
+                select(func.count(P2HDailyTracker.id)).where(
+                    P2HDailyTracker.date < current_date
+                )
+            )
         
-        logger.info(f"✅ Operational reset verified. {len(old_trackers)} trackers from previous cycle archived.")
+        logger.info(f"✅ Operational reset verified. {old_trackers} trackers from previous cycle archived.")
         
     except Exception as e:
         logger.error(f"❌ Error during operational reset: {str(e)}")
-    finally:
-        db.close()
 
 async def check_expiry_dates():
     """
@@ -43,97 +45,102 @@ async def check_expiry_dates():
     """
     logger.info("🔍 Checking vehicle expiry dates (STNK & KIR)...")
     
-    db: Session = SessionLocal()
     try:
-        current_date = get_current_date()
-        # Ambil semua kendaraan aktif
-        vehicles = db.query(Vehicle).filter(Vehicle.is_active == True).all()
+        async with AsyncSessionLocal() as db:
+            current_date = get_current_date()
+            # Ambil semua kendaraan aktif
+            vehicles = (await db.scalars(
+                select(Vehicle).where(Vehicle.is_active == True)
+            )).all()
+            
+            # Alert yang sudah masuk outbox hari ini (satu query, bukan per kendaraan)
+            already_queued = set((await db.execute(
+                select(
+                    TelegramNotification.vehicle_id,
+                    TelegramNotification.notification_type
+                ).where(
+                    and_(
+                        TelegramNotification.notification_type.in_([
+                            NotificationType.STNK_EXPIRY,
+                            NotificationType.KIR_EXPIRY
+                        ]),
+                        TelegramNotification.created_at >= datetime.combine(current_date, datetime.min.time())
+                    )
+                )
+            )).all())
         
-        notifications_sent = 0
+            notifications_sent = 0
         
-        for vehicle in vehicles:
-            # 1. Cek STNK (Menggunakan nama kolom baru: stnk_expiry)
-            if vehicle.stnk_expiry:
-                days_left = days_until_expiry(vehicle.stnk_expiry)
+            for vehicle in vehicles:
+                # 1. Cek STNK (Menggunakan nama kolom baru: stnk_expiry)
+                if vehicle.stnk_expiry:
+                    days_left = days_until_expiry(vehicle.stnk_expiry)
                 
-                # Kirim alert jika <= 30 hari
-                if days_left <= 30:
+                    # Kirim alert jika <= 30 hari
                     # Cek agar tidak spam (kirim 1x saja per hari operasional)
-                    existing = db.query(TelegramNotification).filter(
-                        and_(
-                            TelegramNotification.vehicle_id == vehicle.id,
-                            TelegramNotification.notification_type == NotificationType.STNK_EXPIRY,
-                            TelegramNotification.created_at >= datetime.combine(current_date, datetime.min.time())
-                        )
-                    ).first()
-                    
-                    if not existing:
-                        await telegram_service.send_expiry_notification(
+                    if days_left <= 30 and (vehicle.id, NotificationType.STNK_EXPIRY) not in already_queued:
+                        telegram_service.enqueue_expiry_notification(
                             db, vehicle, "STNK", vehicle.stnk_expiry, days_left
                         )
                         notifications_sent += 1
 
-            # 2. Cek KIR (Menggunakan nama kolom baru: kir_expiry)
-            if vehicle.kir_expiry:
-                days_left = days_until_expiry(vehicle.kir_expiry)
+                # 2. Cek KIR (Menggunakan nama kolom baru: kir_expiry)
+                if vehicle.kir_expiry:
+                    days_left = days_until_expiry(vehicle.kir_expiry)
                 
-                if days_left <= 30:
-                    existing = db.query(TelegramNotification).filter(
-                        and_(
-                            TelegramNotification.vehicle_id == vehicle.id,
-                            TelegramNotification.notification_type == NotificationType.KIR_EXPIRY,
-                            TelegramNotification.created_at >= datetime.combine(current_date, datetime.min.time())
-                        )
-                    ).first()
-                    
-                    if not existing:
-                        await telegram_service.send_expiry_notification(
+                    if days_left <= 30 and (vehicle.id, NotificationType.KIR_EXPIRY) not in already_queued:
+                        telegram_service.enqueue_expiry_notification(
                             db, vehicle, "KIR", vehicle.kir_expiry, days_left
                         )
                         notifications_sent += 1
         
-        logger.info(f"✅ Expiry check complete. Sent {notifications_sent} alert notifications.")
+            # Semua alert masuk outbox sekaligus; dikirim oleh notification dispatcher
+            await db.commit()
+        
+        logger.info(f"✅ Expiry check complete. Queued {notifications_sent} alert notifications.")
         
     except Exception as e:
         logger.error(f"❌ Error checking expiry dates: {str(e)}")
-    finally:
-        db.close()
 
 async def retry_failed_notifications():
     """
-    Mencoba mengirim ulang notifikasi Telegram yang gagal (is_sent = False).
+    Memberi putaran retry baru untuk notifikasi Telegram yang gagal.
+    
+    Pengiriman dan backoff ditangani notification dispatcher; job ini hanya
+    me-reset notifikasi (24 jam terakhir) yang sudah mencapai batas
+    percobaan agar dicoba lagi.
     """
-    logger.info("🔄 Retrying failed Telegram notifications...")
+    logger.info("🔄 Requeueing failed Telegram notifications...")
     
-    db: Session = SessionLocal()
     try:
-        # Ambil notifikasi gagal dalam 24 jam terakhir
-        failed_notifications = db.query(TelegramNotification).filter(
-            and_(
-                TelegramNotification.is_sent == False,
-                TelegramNotification.created_at >= datetime.utcnow() - timedelta(hours=24)
+        async with AsyncSessionLocal() as db:
+            requeued = await notification_repository.requeue_exhausted(
+                db,
+                max_attempts=TelegramSettings.OUTBOX_MAX_ATTEMPTS,
+                created_after=datetime.utcnow() - timedelta(hours=TelegramSettings.OUTBOX_MAX_AGE_HOURS)
             )
-        ).all()
+            await db.commit()
         
-        retried = 0
-        succeeded = 0
+        if requeued > 0:
+            logger.info(f"✅ Requeued {requeued} failed notifications.")
         
-        for notification in failed_notifications:
-            success = await telegram_service.send_message(notification.message)
-            retried += 1
-            
-            if success:
-                notification.is_sent = True
-                notification.sent_at = datetime.utcnow()
-                notification.error_message = None
-                succeeded += 1
-            
-            db.commit()
+    except Exception as e:
+        logger.error(f"❌ Error retrying notifications: {str(e)}")
+
+async def cleanup_export_jobs():
+    """
+    Membersihkan export job di background (POST /export/jobs).
+    
+    Job yang worker-nya berhenti ditandai gagal, lalu file & job yang
+    melewati masa simpan (atau batas total ukuran) dihapus dari disk.
+    """
+    try:
+        result = await export_job_service.cleanup()
         
-        if retried > 0:
-            logger.info(f"✅ Retried {retried} failed notifications, {succeeded} succeeded.")
+        if result["stale"] or result["deleted"]:
+            logger.info(
+                f"✅ Export jobs cleaned up: {result['stale']} stale, {result['deleted']} deleted."
+            )
         
     except Exception as e:
-        logger.error(f"❌ Error retrying notifications: {str(e)}")
-    finally:
-        db.close()
\ No newline at end of file
+        logger.error(f"❌ Error cleaning up export jobs: {str(e)}")
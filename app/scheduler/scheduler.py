@@ -1,35 +1,31 @@
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import logging
-import asyncio
 
 from app.scheduler.jobs import (
     reset_daily_p2h_tracker,
     check_expiry_dates,
-    retry_failed_notifications
+    retry_failed_notifications,
+    cleanup_export_jobs
 )
 
 logger = logging.getLogger(__name__)
 
 # Create scheduler instance
-scheduler = BackgroundScheduler()
-
-
-def run_async_job(job_func):
-    """
-    Wrapper to run async functions in scheduler.
-    """
-    asyncio.run(job_func())
+# AsyncIOScheduler: job async dijalankan langsung di event loop aplikasi,
+# sehingga koneksi pool async_engine dipakai di loop yang sama dengan request
+scheduler = AsyncIOScheduler()
 
 
 def start_scheduler():
     """
     Start the APScheduler with all configured jobs.
+    Must be called from the running event loop (FastAPI lifespan).
     """
     try:
         # Job 1: Reset P2H tracker daily at 5:00 AM WITA
         scheduler.add_job(
-            func=lambda: run_async_job(reset_daily_p2h_tracker),
+            func=reset_daily_p2h_tracker,
             trigger=CronTrigger(hour=5, minute=0, timezone="Asia/Makassar"),
             id="reset_p2h_tracker",
             name="Reset Daily P2H Tracker",
@@ -39,7 +35,7 @@ def start_scheduler():
         
         # Job 2: Check expiry dates daily at 5:00 AM WITA
         scheduler.add_job(
-            func=lambda: run_async_job(check_expiry_dates),
+            func=check_expiry_dates,
             trigger=CronTrigger(hour=5, minute=0, timezone="Asia/Makassar"),
             id="check_expiry",
             name="Check STNK/KIR Expiry",
@@ -49,7 +45,7 @@ def start_scheduler():
         
         # Job 3: Retry failed notifications every hour
         scheduler.add_job(
-            func=lambda: run_async_job(retry_failed_notifications),
+            func=retry_failed_notifications,
             trigger=CronTrigger(minute=0, timezone="Asia/Makassar"),
             id="retry_notifications",
             name="Retry Failed Notifications",
@@ -57,6 +53,16 @@ def start_scheduler():
         )
         logger.info("✅ Scheduled: Retry Failed Notifications hourly")
         
+        # Job 4: Export job retention & stale job check every 15 minutes
+        scheduler.add_job(
+            func=cleanup_export_jobs,
+            trigger=CronTrigger(minute="*/15", timezone="Asia/Makassar"),
+            id="cleanup_export_jobs",
+            name="Cleanup Export Jobs",
+            replace_existing=True
+        )
+        logger.info("✅ Scheduled: Cleanup Export Jobs every 15 minutes")
+        
         # Start the scheduler
         scheduler.start()
         logger.info("🚀 APScheduler started successfully")
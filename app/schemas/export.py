@@ -0,0 +1,15 @@
+"""
+Schemas for background export jobs
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Literal
+
+
+class ExportJobCreate(BaseModel):
+    """Schema for creating an export job (POST /export/jobs)"""
+    export_type: Literal["users", "vehicles", "p2h-reports"] = Field(..., description="Data yang diekspor")
+    format: str = Field(..., description="Format: excel, pdf, or csv")
+    filters: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Filter sama dengan query parameter GET /export/{export_type}, mis. {\"report_status\": \"approved\"}"
+    )
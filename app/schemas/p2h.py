@@ -1,10 +1,11 @@
-from pydantic import BaseModel, Field, ConfigDict, field_validator
+from pydantic import BaseModel, Field, ConfigDict, field_validator, computed_field
 from datetime import date, time, datetime
 from typing import Optional, List
 from uuid import UUID
 
 from app.models.p2h import InspectionStatus
 from app.models.vehicle import VehicleType
+from app.constants import P2HSettings, FileUploadSettings
 
 
 # --- Checklist Schemas ---
@@ -40,6 +41,7 @@ class P2HDetailSubmit(BaseModel):
     checklist_item_id: UUID
     status: InspectionStatus
     keterangan: Optional[str] = None
+    photo_id: Optional[str] = Field(None, pattern=FileUploadSettings.PHOTO_ID_PATTERN, description="photo_id dari POST /p2h/photos (foto bukti kerusakan)")
     
     @field_validator('keterangan')
     @classmethod
@@ -60,6 +62,15 @@ class P2HDetailResponse(BaseModel):
     checklist_item: ChecklistItemResponse
     status: InspectionStatus
     keterangan: Optional[str]
+    image_url: Optional[str] = None
+    
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        """Thumbnail kecil untuk daftar laporan (foto asli lewat image_url)"""
+        if self.image_url and self.image_url.startswith(FileUploadSettings.PHOTO_URL_PREFIX):
+            return f"{self.image_url}/thumbnail"
+        return None
 
 
 # --- P2H Report Schemas ---
@@ -79,6 +90,17 @@ class P2HReportSubmit(BaseModel):
         return v
 
 
+class P2HBatchItemSubmit(P2HReportSubmit):
+    """Schema for one P2H report captured offline"""
+    client_submission_id: str = Field(..., min_length=8, max_length=64, description="Idempotency key dari aplikasi (mis. UUID), sama saat retry")
+    captured_at: datetime = Field(..., description="Waktu pengisian di perangkat (tanpa timezone dianggap WITA)")
+
+
+class P2HBatchSubmit(BaseModel):
+    """Schema for submitting many offline P2H reports at once"""
+    reports: List[P2HBatchItemSubmit] = Field(..., min_length=1, max_length=P2HSettings.MAX_BATCH_REPORTS)
+
+
 class P2HReportResponse(BaseModel):
     """Schema for P2H report response"""
     model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select
 from typing import Optional, List
 from uuid import UUID
 
@@ -8,11 +10,21 @@ from app.schemas.user import UserCreate, UserUpdate
 from app.utils.password import hash_password, verify_password, generate_username
 
 
+# Relasi yang diserialisasi UserResponse - dimuat di query yang sama (LEFT JOIN)
+# karena AsyncSession tidak bisa lazy-load saat Pydantic membaca atribut
+USER_PROFILE_OPTIONS = (
+    joinedload(User.company),
+    joinedload(User.department),
+    joinedload(User.position),
+    joinedload(User.work_status),
+)
+
+
 class AuthService:
     """Service for authentication operations"""
     
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> User:
+    async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
         """
         Create a new user.
         
@@ -30,7 +42,7 @@ class AuthService:
         username = generate_username(user_data.first_name, user_data.birth_date)
         
         # Check if username already exists
-        existing_user = db.query(User).filter(User.username == username).first()
+        existing_user = (await db.scalars(select(User).where(User.username == username))).first()
         if existing_user:
             raise ValueError(
                 f"Username {username} sudah digunakan. "
@@ -52,13 +64,12 @@ class AuthService:
         )
         
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
         
-        return user
+        return await AuthService.get_user_by_id(db, user.id)
     
     @staticmethod
-    def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
         """
         Authenticate a user with username (email or phone_number) and password.
         
@@ -76,9 +87,11 @@ class AuthService:
         logger.info(f"🔐 Login attempt with username: {username}")
         
         # Try to find user by email or phone_number
-        user = db.query(User).filter(
-            (User.email == username) | (User.phone_number == username)
-        ).first()
+        user = (await db.scalars(
+            select(User).options(*USER_PROFILE_OPTIONS).where(
+                (User.email == username) | (User.phone_number == username)
+            )
+        )).first()
         
         if not user:
             logger.warning(f"❌ User not found: {username}")
@@ -100,9 +113,9 @@ class AuthService:
         return user
     
     @staticmethod
-    def get_user_by_id(db: Session, user_id: UUID) -> Optional[User]:
+    async def get_user_by_id(db: AsyncSession, user_id: UUID) -> Optional[User]:
         """
-        Get user by ID.
+        Get user by ID (with profile relations loaded).
         
         Args:
             db: Database session
@@ -111,10 +124,14 @@ class AuthService:
         Returns:
             User if found, None otherwise
         """
-        return db.query(User).filter(User.id == user_id).first()
+        result = await db.scalars(
+            select(User).options(*USER_PROFILE_OPTIONS).where(User.id == user_id),
+            execution_options={"populate_existing": True}
+        )
+        return result.first()
     
     @staticmethod
-    def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
+    async def get_all_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
         """
         Get all users with pagination.
         
@@ -126,10 +143,13 @@ class AuthService:
         Returns:
             List of users
         """
-        return db.query(User).offset(skip).limit(limit).all()
+        result = await db.scalars(
+            select(User).options(*USER_PROFILE_OPTIONS).offset(skip).limit(limit)
+        )
+        return list(result.all())
     
     @staticmethod
-    def update_user(db: Session, user_id: UUID, user_data: UserUpdate) -> User:
+    async def update_user(db: AsyncSession, user_id: UUID, user_data: UserUpdate) -> User:
         """
         Update user information.
         
@@ -144,7 +164,7 @@ class AuthService:
         Raises:
             ValueError: If user not found
         """
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise ValueError("User tidak ditemukan")
         
@@ -154,20 +174,24 @@ class AuthService:
         
         if user_data.email is not None:
             # Check if email already exists
-            existing = db.query(User).filter(
-                User.email == user_data.email,
-                User.id != user_id
-            ).first()
+            existing = (await db.scalars(
+                select(User).where(
+                    User.email == user_data.email,
+                    User.id != user_id
+                )
+            )).first()
             if existing:
                 raise ValueError(f"Email {user_data.email} sudah digunakan")
             user.email = user_data.email
         
         if user_data.phone_number is not None:
             # Check if phone already exists
-            existing = db.query(User).filter(
-                User.phone_number == user_data.phone_number,
-                User.id != user_id
-            ).first()
+            existing = (await db.scalars(
+                select(User).where(
+                    User.phone_number == user_data.phone_number,
+                    User.id != user_id
+                )
+            )).first()
             if existing:
                 raise ValueError(f"Nomor HP {user_data.phone_number} sudah digunakan")
             user.phone_number = user_data.phone_number
@@ -199,13 +223,13 @@ class AuthService:
         if user_data.password is not None:
             user.password_hash = hash_password(user_data.password)
         
-        db.commit()
-        db.refresh(user)
+        await db.commit()
         
-        return user
+        # Muat ulang beserta relasi profil (bisa berubah lewat *_id di atas)
+        return await AuthService.get_user_by_id(db, user_id)
     
     @staticmethod
-    def delete_user(db: Session, user_id: UUID) -> bool:
+    async def delete_user(db: AsyncSession, user_id: UUID) -> bool:
         """
         Delete a user (soft delete by setting is_active to False).
         
@@ -216,13 +240,13 @@ class AuthService:
         Returns:
             True if deleted, False otherwise
         """
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             return False
         
         # Soft delete
         user.is_active = False
-        db.commit()
+        await db.commit()
         
         return True
 
@@ -0,0 +1,86 @@
+"""
+Checklist Service - Form checklist P2H dengan cache JSON ter-serialisasi
+
+Template checklist hanya berubah beberapa kali sebulan, tetapi dimuat oleh
+setiap driver saat membuka form. Response disimpan sebagai bytes JSON siap
+kirim per (vehicle_type, shift) beserta ETag-nya, sehingga request dengan
+If-None-Match yang cocok dijawab 304 tanpa query checklist maupun
+serialisasi Pydantic.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.p2h import ChecklistItemResponse
+from app.repositories.p2h_repository import p2h_repository
+from app.utils.cache import checklist_cache
+from app.utils.http_cache import make_etag
+from app.utils.response import base_response
+
+logger = logging.getLogger(__name__)
+
+# Client wajib revalidasi (If-None-Match) setiap kali; jawaban 304 murah
+CHECKLIST_CACHE_CONTROL = "private, no-cache"
+
+
+class ChecklistService:
+    """Service for the P2H checklist form"""
+    
+    @staticmethod
+    def get_cached_form(
+        vehicle_type: Optional[str] = None,
+        shift: Optional[str] = None
+    ) -> Optional[Tuple[bytes, str]]:
+        """
+        Ambil form dari cache tanpa menyentuh database.
+        
+        Returns:
+            (body, etag) atau None jika belum ada di cache
+        """
+        found, value = checklist_cache.get((vehicle_type, shift))
+        return value if found else None
+    
+    @staticmethod
+    async def build_form(
+        db: AsyncSession,
+        vehicle_type: Optional[str] = None,
+        shift: Optional[str] = None
+    ) -> Tuple[bytes, str]:
+        """
+        Query dan serialisasi form checklist, lalu simpan ke cache.
+        
+        Args:
+            db: Database session
+            vehicle_type: Filter tag tipe kendaraan (None = semua item aktif)
+            shift: Filter label shift (None = semua shift)
+        
+        Returns:
+            (body, etag) - body adalah JSON lengkap format base_response
+        """
+        generation = checklist_cache.generation
+        items = await p2h_repository.get_active_checklist_items(db, vehicle_type, shift)
+        
+        if vehicle_type is None:
+            message = "Semua checklist items berhasil diambil"
+        else:
+            message = f"Checklist untuk tipe {vehicle_type} berhasil diambil"
+        
+        payload = [ChecklistItemResponse.model_validate(item).model_dump(mode='json') for item in items]
+        body = base_response(message=message, payload=payload).body
+        etag = make_etag(body)
+        
+        # Tidak disimpan jika checklist berubah selama query (generation naik)
+        checklist_cache.set((vehicle_type, shift), (body, etag), generation)
+        logger.info(f"📋 Checklist form cached: vehicle_type={vehicle_type}, shift={shift}, items={len(items)}")
+        return body, etag
+    
+    @staticmethod
+    def invalidate() -> None:
+        """Naikkan versi cache setelah checklist ditambah/diubah/dihapus"""
+        checklist_cache.clear()
+
+
+# Singleton instance
+checklist_service = ChecklistService()
@@ -0,0 +1,184 @@
+"""
+Dashboard Events - Pub/sub live dashboard (SSE) lewat Postgres LISTEN/NOTIFY
+
+Submit P2H mem-publish event delta kecil dengan pg_notify di dalam transaksi
+submit, sehingga event hanya terkirim jika commit berhasil (dan ikut batal
+bersama savepoint yang di-rollback pada submit batch).
+
+Setiap worker uvicorn menjalankan satu koneksi asyncpg yang LISTEN ke
+channel tersebut dan meneruskan event ke semua koneksi /dashboard/stream
+di worker itu (satu asyncio.Queue per koneksi). Dengan begitu client
+menerima submit dari worker manapun, dan dashboard_cache di setiap worker
+ikut di-invalidate.
+
+Event yang terlewat tidak di-replay: setiap koneksi SSE (termasuk reconnect
+otomatis EventSource) diawali event `snapshot`, dan jika koneksi LISTEN
+sempat terputus semua subscriber diberi event `resync`.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import DashboardStreamSettings
+from app.database import async_engine
+from app.utils.cache import dashboard_cache
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardEventBroker:
+    """
+    Broadcast event dashboard ke semua subscriber SSE di semua worker.
+    
+    - publish() menulis NOTIFY di transaksi caller
+    - start()/stop() (lifespan FastAPI) menjalankan listener per worker
+    - Queue per subscriber dibatasi (QUEUE_SIZE); client yang terlalu lambat
+      queue-nya dikosongkan dan diberi event `resync` agar memuat ulang data
+    """
+    
+    def __init__(
+        self,
+        channel: str = DashboardStreamSettings.CHANNEL,
+        queue_size: int = DashboardStreamSettings.QUEUE_SIZE
+    ):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+    
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new subscriber queue (dipanggil dari event loop)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue"""
+        self._subscribers.discard(queue)
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    async def publish(self, db: AsyncSession, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Kirim event ke semua worker lewat NOTIFY (tanpa commit).
+        
+        Postgres baru mengirim notifikasi saat transaksi di-commit, jadi
+        caller cukup memanggil ini sebelum commit.
+        
+        Args:
+            db: Session yang sedang menjalankan transaksi submit
+            events: List of (SSE event name, JSON-serializable payload)
+        """
+        if not events:
+            return
+        
+        payload = json.dumps(events, separators=(',', ':'), default=str)
+        await db.execute(select(func.pg_notify(self.channel, payload)))
+    
+    # ------------------------------------------------------------------
+    # Listener (satu koneksi per worker)
+    # ------------------------------------------------------------------
+    
+    def start(self) -> None:
+        """Start the LISTEN task on the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._listen())
+        logger.info(f"📡 Dashboard event listener started (channel={self.channel})")
+    
+    async def stop(self) -> None:
+        """Cancel the LISTEN task and close its connection"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("🛑 Dashboard event listener stopped")
+    
+    async def _connect(self) -> asyncpg.Connection:
+        """Koneksi asyncpg khusus LISTEN (di luar pool, dipakai terus-menerus)"""
+        # Parameter koneksi diterjemahkan oleh dialect yang sama dengan async_engine
+        args, kwargs = async_engine.dialect.create_connect_args(async_engine.url)
+        return await asyncpg.connect(*args, **kwargs)
+    
+    async def _listen(self) -> None:
+        """LISTEN loop: sambung ulang jika koneksi putus, lalu minta subscriber resync"""
+        connected_before = False
+        
+        while True:
+            conn = None
+            try:
+                conn = await self._connect()
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                await conn.add_listener(self.channel, self._on_notify)
+                
+                if connected_before:
+                    # Event selama koneksi putus hilang: client memuat ulang state
+                    logger.info("📡 Dashboard event listener reconnected, sending resync")
+                    self._broadcast(format_sse("resync", {}))
+                connected_before = True
+                
+                await lost.wait()
+                logger.warning("⚠️ Dashboard event listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Dashboard event listener error: {str(e)}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            
+            await asyncio.sleep(DashboardStreamSettings.LISTEN_RECONNECT_SECONDS)
+    
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        """asyncpg callback (di event loop): teruskan event ke subscriber lokal"""
+        # Ada submit di worker lain: statistik yang di-cache worker ini sudah basi
+        dashboard_cache.clear()
+        
+        if not self._subscribers:
+            return
+        
+        try:
+            events = json.loads(payload)
+        except ValueError:
+            logger.warning("⚠️ Invalid dashboard event payload ignored")
+            return
+        
+        for event_type, data in events:
+            self._broadcast(format_sse(event_type, data))
+    
+    def _broadcast(self, message: str) -> None:
+        """Put message into every subscriber queue (runs on the event loop)"""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Client tertinggal: buang backlog, minta client memuat ulang state
+                logger.warning("⚠️ Dashboard stream subscriber lagging, sending resync")
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(format_sse("resync", {}))
+
+
+def format_sse(event_type: str, data: Dict[str, Any]) -> str:
+    """Format satu event sesuai protokol text/event-stream"""
+    return (
+        f"event: {event_type}\n"
+        f"data: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+    )
+
+
+# Singleton instance
+dashboard_events = DashboardEventBroker()
@@ -4,11 +4,20 @@ Dashboard Service - Business logic for dashboard operations
 Orchestrates repositories and handles business logic
 """
 
-from sqlalchemy.orm import Session
-from typing import Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import date
 
-from app.utils.datetime import get_current_datetime
+from app.models.vehicle import ShiftType
+from app.utils.datetime import (
+    get_current_time,
+    get_current_date_shift,
+    get_current_date_non_shift,
+    get_shift_number,
+    get_long_shift_number
+)
+from app.utils.cache import cached, dashboard_cache
+from app.utils.pagination import build_page, vehicle_key
 from app.repositories.dashboard_repository import DashboardRepository
 from app.repositories.p2h_repository import P2HRepository
 from app.repositories.vehicle_repository import VehicleRepository
@@ -22,9 +31,9 @@ class DashboardService:
         self.p2h_repo = P2HRepository()
         self.vehicle_repo = VehicleRepository()
     
-    def get_dashboard_statistics(
+    async def get_dashboard_statistics(
         self,
-        db: Session,
+        db: AsyncSession,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         vehicle_type: Optional[str] = None
@@ -32,8 +41,9 @@ class DashboardService:
         """
         Get comprehensive dashboard statistics with business logic.
         
-        This method orchestrates multiple repository calls and applies
-        business logic to calculate derived metrics.
+        total_pending_p2h bergantung pada shift yang sedang berjalan, sehingga
+        scope pending (tanggal operasional & shift berjalan) ikut menjadi key
+        cache: pergantian shift otomatis memakai entry baru.
         
         Args:
             db: Database session
@@ -44,38 +54,68 @@ class DashboardService:
         Returns:
             Dictionary with complete statistics
         """
+        operational_dates, current_shifts = self._pending_scope()
+        return await self._get_dashboard_statistics(
+            db, start_date, end_date, vehicle_type, operational_dates, current_shifts
+        )
+    
+    @cached(dashboard_cache)
+    async def _get_dashboard_statistics(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        vehicle_type: Optional[str],
+        operational_dates: Dict[ShiftType, date],
+        current_shifts: Dict[ShiftType, int]
+    ) -> Dict[str, Any]:
+        """Statistics for one pending scope (cached per filter + scope)"""
         # Get base statistics from repository
-        stats = self.dashboard_repo.get_statistics(db, start_date, end_date, vehicle_type)
+        stats = await self.dashboard_repo.get_statistics(db, start_date, end_date, vehicle_type)
         
-        # Business logic: Calculate pending P2H
-        today = get_current_datetime().date()
-        vehicles_reported_today = self.p2h_repo.get_vehicles_reported_on_date(db, today)
-        total_pending_p2h = max(stats["total_vehicles"] - vehicles_reported_today, 0)
+        # Business logic: Pending P2H = unit aktif yang belum mengisi shift berjalan
+        _, counts = await self.p2h_repo.get_pending_fleet(
+            db, operational_dates, 0,
+            current_shifts=current_shifts,
+            vehicle_type=vehicle_type
+        )
         
         # Add calculated field
-        stats["total_pending_p2h"] = total_pending_p2h
+        stats["total_pending_p2h"] = counts["total_pending"]
         
         return stats
     
-    def get_monthly_report_summary(
+    @cached(dashboard_cache)
+    async def get_monthly_report_summary(
         self,
-        db: Session,
+        db: AsyncSession,
         year: int,
-        vehicle_type: Optional[str] = None
+        vehicle_type: Optional[str] = None,
+        compare_years: Optional[List[int]] = None,
+        by_vehicle_type: bool = False
     ) -> Dict[str, Any]:
         """
         Get monthly report summary with business logic.
         
+        All requested years and series are fetched with one grouped query.
+        
         Args:
             db: Database session
             year: Year for the report
             vehicle_type: Optional vehicle type filter
+            compare_years: Optional extra years to include as separate series
+            by_vehicle_type: Include monthly series per vehicle type
             
         Returns:
             Dictionary with monthly data and summary
         """
-        # Get monthly data from repository
-        monthly_data = self.dashboard_repo.get_monthly_reports(db, year, vehicle_type)
+        years = sorted({year, *(compare_years or [])})
+        
+        # Get monthly data from repository (satu query untuk semua tahun)
+        breakdown = await self.dashboard_repo.get_monthly_breakdown(
+            db, years, vehicle_type, by_vehicle_type
+        )
+        monthly_data = breakdown[year]["monthly_data"]
         
         # Business logic: Calculate totals and percentages
         total_normal = sum(data[0] for data in monthly_data.values())
@@ -88,7 +128,7 @@ class DashboardService:
         abnormal_percentage = (total_abnormal / total_reports * 100) if total_reports > 0 else 0
         warning_percentage = (total_warning / total_reports * 100) if total_reports > 0 else 0
         
-        return {
+        result = {
             "monthly_data": monthly_data,
             "summary": {
                 "total_normal": total_normal,
@@ -100,10 +140,21 @@ class DashboardService:
                 "warning_percentage": round(warning_percentage, 2)
             }
         }
+        
+        if compare_years:
+            result["yearly_data"] = {
+                str(y): breakdown[y]["monthly_data"] for y in years
+            }
+        
+        if by_vehicle_type:
+            result["vehicle_type_data"] = breakdown[year]["vehicle_type_data"]
+        
+        return result
     
-    def get_vehicle_type_breakdown(
+    @cached(dashboard_cache)
+    async def get_vehicle_type_breakdown(
         self,
-        db: Session,
+        db: AsyncSession,
         vehicle_type: str,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
@@ -121,10 +172,44 @@ class DashboardService:
             Dictionary with vehicle type breakdown
         """
         # Get status counts for this vehicle type
-        status_data = self.dashboard_repo.get_vehicle_type_status(
+        status_data = await self.dashboard_repo.get_vehicle_type_status(
             db, vehicle_type, start_date, end_date
         )
         
+        return self._with_health_score(status_data)
+    
+    @cached(dashboard_cache)
+    async def get_all_vehicle_type_breakdown(
+        self,
+        db: AsyncSession,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        kategori_unit: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get breakdown and health score for every vehicle type (one query).
+        
+        Args:
+            db: Database session
+            start_date: Optional start date filter
+            end_date: Optional end date filter
+            kategori_unit: Optional unit category filter
+            
+        Returns:
+            List of breakdowns, one per vehicle type
+        """
+        status_by_type = await self.dashboard_repo.get_all_vehicle_type_status(
+            db, start_date, end_date, kategori_unit
+        )
+        
+        return [
+            {"vehicle_type": vehicle_type, **self._with_health_score(status_data)}
+            for vehicle_type, status_data in status_by_type.items()
+        ]
+    
+    @staticmethod
+    def _with_health_score(status_data: Dict[str, int]) -> Dict[str, Any]:
+        """Tambahkan total_reports dan health_score ke status counts"""
         # Business logic: Calculate health score
         total = status_data["normal"] + status_data["abnormal"] + status_data["warning"]
         health_score = 0
@@ -140,6 +225,75 @@ class DashboardService:
             "health_score": round(health_score, 2)
         }
 
+    
+    @staticmethod
+    def _pending_scope(
+        check_date: Optional[date] = None
+    ) -> Tuple[Dict[ShiftType, date], Optional[Dict[ShiftType, int]]]:
+        """
+        Tentukan tanggal tracker dan shift berjalan per shift type.
+        
+        - Tanpa check_date: SHIFT/LONG_SHIFT memakai tanggal operasional
+          reset 05:00, NON_SHIFT reset 00:00, dan yang dicek adalah shift
+          yang sedang berjalan.
+        - Dengan check_date (tanggal historis): semua tipe memakai tanggal
+          tersebut dan unit dianggap pending jika tidak ada submit sama sekali.
+        """
+        if check_date is not None:
+            return {shift_type: check_date for shift_type in ShiftType}, None
+        
+        current_time = get_current_time()
+        shift_date = get_current_date_shift()
+        operational_dates = {
+            ShiftType.SHIFT: shift_date,
+            ShiftType.LONG_SHIFT: shift_date,
+            ShiftType.NON_SHIFT: get_current_date_non_shift()
+        }
+        current_shifts = {
+            ShiftType.SHIFT: get_shift_number(current_time),
+            ShiftType.LONG_SHIFT: get_long_shift_number(current_time),
+            ShiftType.NON_SHIFT: 1
+        }
+        return operational_dates, current_shifts
+    
+    async def get_pending_fleet(
+        self,
+        db: AsyncSession,
+        limit: int,
+        after: Optional[tuple] = None,
+        check_date: Optional[date] = None,
+        vehicle_type: Optional[str] = None,
+        kategori_unit: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get pending vehicles (belum P2H) with exact fleet counts.
+        
+        Args:
+            db: Database session
+            limit: Page size
+            after: (coalesce(no_lambung, ''), id) cursor values of the previous page
+            check_date: Optional historical date; default is the running shift
+            vehicle_type: Optional vehicle type filter
+            kategori_unit: Optional unit category filter
+            
+        Returns:
+            Dictionary with vehicles, next_cursor and counts
+        """
+        operational_dates, current_shifts = self._pending_scope(check_date)
+        rows, counts = await self.p2h_repo.get_pending_fleet(
+            db, operational_dates, limit, after,
+            current_shifts=current_shifts,
+            vehicle_type=vehicle_type,
+            kategori_unit=kategori_unit
+        )
+        vehicles, next_cursor = build_page(rows, limit, vehicle_key)
+        
+        return {
+            "vehicles": vehicles,
+            "next_cursor": next_cursor,
+            "counts": counts
+        }
+
 
 # Singleton instance
 dashboard_service = DashboardService()
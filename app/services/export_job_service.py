@@ -0,0 +1,347 @@
+"""
+Export Job Service - Export besar dijalankan di background
+
+POST /export/jobs hanya memvalidasi filter lalu menulis baris export_jobs
+(PENDING), sehingga request selesai dalam hitungan milidetik. Worker (task
+asyncio per proses API, start/stop dari lifespan FastAPI) meng-claim job
+dengan FOR UPDATE SKIP LOCKED (aman untuk beberapa worker uvicorn) dan
+menjalankannya di thread pool berukuran JOB_WORKERS:
+
+- Query & penulisan file memakai export_service yang sama dengan
+  endpoint /export/* (server-side cursor, xlsxwriter constant_memory,
+  PDF per potongan di process pool)
+- Progress ditulis ke tabel tiap YIELD_PER baris, sekaligus heartbeat;
+  job RUNNING tanpa heartbeat selama JOB_STALE_MINUTES dianggap gagal
+- File hasil disimpan di EXPORT_STORAGE_DIR sampai expires_at, dan total
+  ukurannya dibatasi JOB_MAX_STORAGE_MB (dibersihkan job scheduler)
+"""
+
+import asyncio
+import logging
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.constants import ExportSettings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.exceptions import BadRequestException, NotFoundException
+from app.models.export_job import ExportJob, ExportJobStatus
+from app.models.user import User, UserRole
+from app.repositories.export_job_repository import export_job_repository
+from app.services.export_service import export_service, EXPORT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobService:
+    """
+    Background export jobs.
+    
+    - start()/stop() dipanggil dari lifespan FastAPI
+    - wake() dipanggil setelah job dibuat agar langsung diambil worker
+      tanpa menunggu interval polling
+    """
+    
+    def __init__(self, workers: int = ExportSettings.JOB_WORKERS):
+        self.workers = workers
+        self.storage_dir = Path(settings.EXPORT_STORAGE_DIR)
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running = 0
+    
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    
+    def start(self) -> None:
+        """Start the worker task on the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export-job")
+        self._running = 0
+        self._task = self._loop.create_task(self._run())
+        logger.info(f"📦 Export job worker started (workers={self.workers})")
+    
+    async def stop(self) -> None:
+        """
+        Cancel the worker task.
+        
+        Job yang sedang berjalan tidak ditunggu; heartbeat-nya berhenti dan
+        job scheduler menandainya gagal setelah JOB_STALE_MINUTES.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        logger.info("🛑 Export job worker stopped")
+    
+    def wake(self) -> None:
+        """Minta worker memeriksa antrian sekarang (aman dari thread lain)"""
+        if self._wake is None or self._loop is None or self._loop.is_closed():
+            return
+        
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if running_loop is self._loop:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+    
+    async def _run(self) -> None:
+        """Main loop: claim job sebanyak slot yang bebas, lalu tunggu wake-up atau interval polling"""
+        while True:
+            try:
+                await self._dispatch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Export job worker error: {str(e)}", exc_info=True)
+            
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=ExportSettings.JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+    
+    async def _dispatch(self) -> int:
+        """
+        Claim pending jobs for the free worker slots and start them.
+        
+        Returns:
+            Number of jobs started
+        """
+        free = self.workers - self._running
+        if free <= 0:
+            return 0
+        
+        async with AsyncSessionLocal() as db:
+            jobs = await export_job_repository.claim_pending(db, limit=free)
+            await db.commit()
+        
+        for job in jobs:
+            self._running += 1
+            future = self._loop.run_in_executor(
+                self._executor, self.run_job, job.id, job.export_type, job.format, job.filters
+            )
+            future.add_done_callback(self._on_job_done)
+        return len(jobs)
+    
+    def _on_job_done(self, future: asyncio.Future) -> None:
+        # Callback di event loop: slot bebas, cek antrian lagi
+        self._running -= 1
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"❌ Export job thread error: {future.exception()}")
+        self._wake.set()
+    
+    def run_job(self, job_id: UUID, export_type: str, format: str, filters: Dict[str, Any]) -> None:
+        """
+        Jalankan satu export job sampai selesai (di thread worker).
+        
+        Args:
+            job_id: Job ID
+            export_type: users / vehicles / p2h-reports
+            format: excel / csv / pdf
+            filters: Filter mentah yang sudah divalidasi saat job dibuat
+        """
+        retention = timedelta(hours=ExportSettings.JOB_RETENTION_HOURS)
+        logger.info(f"📦 Export job {job_id} started: {export_type}.{format}")
+        
+        try:
+            with SessionLocal() as db:
+                query = export_service.build_query(export_type, filters)
+                total = db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+                export_job_repository.set_progress(db, job_id, 0, total)
+                
+                temp_path = export_service.write_file(
+                    export_type,
+                    format,
+                    query,
+                    on_progress=lambda rows: export_job_repository.set_progress(db, job_id, rows)
+                )
+                
+                extension, _ = EXPORT_FORMATS[format]
+                self.storage_dir.mkdir(parents=True, exist_ok=True)
+                path = self.storage_dir / f"{job_id}.{extension}"
+                shutil.move(temp_path, path)
+                
+                export_job_repository.mark_done(
+                    db,
+                    job_id,
+                    file_path=str(path),
+                    filename=export_service.export_filename(export_type, format),
+                    file_size=path.stat().st_size,
+                    expires_at=datetime.utcnow() + retention
+                )
+            logger.info(f"✅ Export job {job_id} finished: {total} rows")
+        except Exception as e:
+            logger.error(f"❌ Export job {job_id} failed: {str(e)}", exc_info=True)
+            with SessionLocal() as db:
+                export_job_repository.mark_failed(
+                    db, job_id, f"Export gagal: {str(e)}", datetime.utcnow() + retention
+                )
+    
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    
+    async def create_job(
+        self,
+        db: AsyncSession,
+        export_type: str,
+        format: str,
+        filters: Dict[str, Any],
+        user: User
+    ) -> ExportJob:
+        """
+        Validasi permintaan export lalu masukkan ke antrian.
+        
+        Args:
+            db: Database session
+            export_type: users / vehicles / p2h-reports
+            format: excel / csv / pdf
+            filters: Filter yang sama dengan query parameter endpoint /export/*
+            user: Pembuat job
+        
+        Returns:
+            Job PENDING yang baru dibuat
+        
+        Raises:
+            BadRequestException: Jenis export, format, atau filter tidak valid
+        """
+        format = format.lower()
+        if format not in EXPORT_FORMATS:
+            raise BadRequestException("Format tidak valid. Gunakan: excel, pdf, atau csv")
+        
+        # Filter divalidasi sekarang agar kesalahan tidak baru terlihat di worker
+        export_service.build_query(export_type, filters)
+        
+        job = ExportJob(
+            export_type=export_type,
+            format=format,
+            filters={key: value for key, value in filters.items() if value is not None},
+            status=ExportJobStatus.PENDING,
+            created_by=user.id
+        )
+        job = await export_job_repository.create(db, job)
+        self.wake()
+        return job
+    
+    async def get_job(self, db: AsyncSession, job_id: UUID, user: User) -> ExportJob:
+        """
+        Get a job visible to the user (pembuatnya, atau superadmin).
+        
+        Raises:
+            NotFoundException: Job tidak ada, sudah kedaluwarsa, atau milik user lain
+        """
+        job = await export_job_repository.get_by_id(db, job_id)
+        if job is None or (job.created_by != user.id and user.role != UserRole.superadmin):
+            raise NotFoundException("Export job")
+        return job
+    
+    async def list_jobs(self, db: AsyncSession, user: User) -> List[ExportJob]:
+        """Get the user's newest jobs"""
+        return await export_job_repository.get_recent_by_user(db, user.id, ExportSettings.JOB_LIST_LIMIT)
+    
+    @staticmethod
+    def job_payload(job: ExportJob) -> Dict[str, Any]:
+        """Serialize a job for the API response"""
+        def iso(value: Optional[datetime]) -> Optional[str]:
+            return value.isoformat() if value else None
+        
+        progress = None
+        if job.total_rows:
+            progress = round(min(job.processed_rows / job.total_rows, 1) * 100, 1)
+        elif job.status == ExportJobStatus.DONE:
+            progress = 100.0
+        
+        return {
+            "id": str(job.id),
+            "export_type": job.export_type,
+            "format": job.format,
+            "filters": job.filters,
+            "status": job.status.value,
+            "total_rows": job.total_rows,
+            "processed_rows": job.processed_rows,
+            "progress_pct": progress,
+            "filename": job.filename,
+            "file_size": job.file_size,
+            "download_url": f"/export/jobs/{job.id}/file" if job.status == ExportJobStatus.DONE else None,
+            "error_message": job.error_message,
+            "created_at": iso(job.created_at),
+            "started_at": iso(job.started_at),
+            "finished_at": iso(job.finished_at),
+            "expires_at": iso(job.expires_at)
+        }
+    
+    # ------------------------------------------------------------------
+    # Retention (scheduler)
+    # ------------------------------------------------------------------
+    
+    async def cleanup(self) -> Dict[str, int]:
+        """
+        Hapus job & file yang melewati retensi, dan tandai job macet sebagai gagal.
+        
+        - Job RUNNING tanpa heartbeat selama JOB_STALE_MINUTES -> FAILED
+        - Job dengan expires_at terlewati -> file & baris dihapus
+        - Total file melebihi JOB_MAX_STORAGE_MB -> file terlama dihapus lebih dulu
+        
+        Returns:
+            Dictionary with stale and deleted counts
+        """
+        now = datetime.utcnow()
+        retention = timedelta(hours=ExportSettings.JOB_RETENTION_HOURS)
+        max_bytes = ExportSettings.JOB_MAX_STORAGE_MB * 1024 * 1024
+        
+        async with AsyncSessionLocal() as db:
+            stale = await export_job_repository.fail_stale(
+                db,
+                heartbeat_before=now - timedelta(minutes=ExportSettings.JOB_STALE_MINUTES),
+                expires_at=now + retention
+            )
+            
+            expired = await export_job_repository.get_expired(db, now)
+            expired_ids = {row.id for row in expired}
+            
+            # Batas total ukuran: simpan yang terbaru, sisanya ikut dihapus
+            stored_bytes = 0
+            over_limit = []
+            for row in await export_job_repository.get_stored_files(db):
+                if row.id in expired_ids:
+                    continue
+                stored_bytes += row.file_size or 0
+                if stored_bytes > max_bytes:
+                    over_limit.append(row)
+            
+            removed = list(expired) + over_limit
+            for row in removed:
+                if row.file_path:
+                    Path(row.file_path).unlink(missing_ok=True)
+            
+            await export_job_repository.delete_by_ids(db, [row.id for row in removed])
+            await db.commit()
+        
+        return {"stale": stale, "deleted": len(removed)}
+
+
+# Singleton instance
+export_job_service = ExportJobService()
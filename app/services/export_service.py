@@ -0,0 +1,538 @@
+"""
+Export Service - Streaming export data (Users, Vehicles, P2H Reports)
+
+Query export (export_repository) hanya memilih kolom yang diekspor, tanpa
+entity ORM, dan dibaca lewat server-side cursor (yield_per), sehingga baris
+diformat dan dikirim bertahap dengan memory konstan berapapun jumlah datanya.
+
+PDF dirender per potongan PDF_ROWS_PER_CHUNK baris (satu Table per
+potongan) karena layout Table ReportLab melambat drastis pada tabel
+panjang. Export yang lebih dari satu potongan dirender paralel di process
+pool lalu halaman-halamannya digabung.
+
+Router /export/* memakai service ini langsung di dalam request; export job
+(export_job_service) memakai build_query + write_file yang sama di thread
+worker.
+"""
+
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import xlsxwriter
+from sqlalchemy import Select
+
+from app.constants import ExportSettings
+from app.database import SessionLocal
+from app.exceptions import BadRequestException
+from app.models.user import UserRole, UserKategori
+from app.models.vehicle import UnitKategori, ShiftType
+from app.models.p2h import InspectionStatus
+from app.repositories.export_repository import export_repository
+from app.utils.datetime import get_current_datetime
+from app.utils.pdf_export import merge_pdfs, render_pdf_chunk
+
+# (header, label kolom di query export_repository, formatter nilai) per kolom export
+ExportColumns = List[Tuple[str, str, Callable]]
+
+# Dipanggil dengan jumlah baris yang sudah ditulis (progress export job)
+ProgressCallback = Callable[[int], None]
+
+
+def format_datetime(dt):
+    """Format datetime to string"""
+    if dt is None:
+        return ""
+    if isinstance(dt, datetime):
+        return dt.strftime("%Y-%m-%d %H:%M")
+    if isinstance(dt, date):
+        return dt.strftime("%Y-%m-%d")
+    return str(dt)
+
+
+def _text(value) -> str:
+    return value if value is not None else ""
+
+
+def _enum_value(value) -> str:
+    return value.value if value is not None else ""
+
+
+def _status_label(is_active) -> str:
+    return "Aktif" if is_active else "Tidak Aktif"
+
+
+def _shift_label(shift_number) -> str:
+    return f"Shift {shift_number}"
+
+
+USER_EXPORT_COLUMNS: ExportColumns = [
+    ("Email", "email", _text),
+    ("Nama Lengkap", "full_name", _text),
+    ("Nomor Telepon", "phone_number", _text),
+    ("Tanggal Lahir", "birth_date", format_datetime),
+    ("Role", "role", _enum_value),
+    ("Kategori", "kategori", _enum_value),
+    ("Department", "department", _text),
+    ("Position", "position", _text),
+    ("Status", "is_active", _status_label),
+    ("Tanggal Dibuat", "created_at", format_datetime),
+]
+
+VEHICLE_EXPORT_COLUMNS: ExportColumns = [
+    ("Nomor Polisi", "plat_nomor", _text),
+    ("Nomor Lambung", "no_lambung", _text),
+    ("Tipe Kendaraan", "vehicle_type", _enum_value),
+    ("Kategori", "kategori", _enum_value),
+    ("Shift", "shift_type", _enum_value),
+    ("Merk", "merk", _text),
+    ("Expired STNK", "stnk_expiry", format_datetime),
+    ("Expired KIR", "kir_expiry", format_datetime),
+    ("Status", "is_active", _status_label),
+    ("Tanggal Dibuat", "created_at", format_datetime),
+]
+
+REPORT_EXPORT_COLUMNS: ExportColumns = [
+    ("Tanggal Pemeriksaan", "submission_date", format_datetime),
+    ("Waktu", "submission_time", format_datetime),
+    ("Shift", "shift_number", _shift_label),
+    ("Nomor Polisi", "plat_nomor", _text),
+    ("No Lambung", "no_lambung", _text),
+    ("Tipe Kendaraan", "vehicle_type", _enum_value),
+    ("Kategori", "kategori", _enum_value),
+    ("Nama Pemeriksa", "inspector_name", _text),
+    ("Status Pemeriksaan", "overall_status", _enum_value),
+]
+
+# Konfigurasi per jenis export: filter yang diterima, kolom, nama file, tampilan Excel/PDF
+EXPORT_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    "users": {
+        "filters": {"role", "kategori", "is_active", "search"},
+        "columns": USER_EXPORT_COLUMNS,
+        "filename_prefix": "data_pengguna",
+        "title": "Data Pengguna",
+        "header_color": "#4472C4",
+        "column_width": 20,
+        "pdf_col_widths": [1, 1.5, 1.2, 1, 0.8, 0.8, 1, 1, 0.8, 1.2],
+        "pdf_font_size": 8,
+    },
+    "vehicles": {
+        "filters": {"kategori", "vehicle_type", "shift_type", "is_active", "search"},
+        "columns": VEHICLE_EXPORT_COLUMNS,
+        "filename_prefix": "data_kendaraan",
+        "title": "Data Kendaraan",
+        "header_color": "#70AD47",
+        "column_width": 18,
+        "pdf_col_widths": [1, 1, 1.2, 0.8, 0.8, 1, 1, 1, 0.8, 1.2],
+        "pdf_font_size": 8,
+    },
+    "p2h-reports": {
+        "filters": {"kategori", "report_status", "start_date", "end_date", "search"},
+        "columns": REPORT_EXPORT_COLUMNS,
+        "filename_prefix": "laporan_p2h",
+        "title": "Laporan P2H",
+        "header_color": "#ED7D31",
+        "column_width": 18,
+        "pdf_col_widths": [0.9, 0.6, 0.6, 1, 0.8, 1, 0.8, 1.2, 1],
+        "pdf_font_size": 7,
+    },
+}
+
+# format -> (ekstensi file, media type)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("csv", "text/csv"),
+    "pdf": ("pdf", "application/pdf"),
+}
+
+
+def _temp_path(suffix: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def _parse_enum(value, enum_class, label: str):
+    try:
+        return enum_class(str(value).lower())
+    except ValueError:
+        raise BadRequestException(f"Invalid {label}: {value}")
+
+
+def _parse_kategori(value, enum_class):
+    kategori_upper = str(value).upper()
+    if kategori_upper == 'PT':
+        kategori_upper = 'IMM'
+    try:
+        return enum_class(kategori_upper)
+    except ValueError:
+        raise BadRequestException(f"Invalid kategori: {value}")
+
+
+def _parse_date(value, field: str) -> date:
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except ValueError:
+        raise BadRequestException(f"Format {field} tidak valid. Gunakan YYYY-MM-DD")
+
+
+def _parse_bool(value, field: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ("true", "false"):
+        return str(value).lower() == "true"
+    raise BadRequestException(f"{field} harus true atau false")
+
+
+class ExportService:
+    """Service for streaming data exports"""
+    
+    def __init__(self, pdf_workers: int = ExportSettings.PDF_WORKERS):
+        self.pdf_workers = pdf_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # spawn: jangan fork proses uvicorn yang sudah punya thread (scheduler, to_thread)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.pdf_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+    
+    def shutdown(self) -> None:
+        """Matikan process pool PDF (dipanggil saat shutdown aplikasi)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    @staticmethod
+    def build_query(export_type: str, filters: Dict[str, Any]) -> Select:
+        """
+        Bangun query export dari filter mentah (query string atau body export job).
+        
+        Args:
+            export_type: users / vehicles / p2h-reports
+            filters: Nama filter -> nilai (None diabaikan)
+        
+        Returns:
+            Select dari export_repository
+        
+        Raises:
+            BadRequestException: Jenis export, nama filter, atau nilai filter tidak valid
+        """
+        definition = EXPORT_DEFINITIONS.get(export_type)
+        if definition is None:
+            raise BadRequestException(f"Jenis export tidak valid. Gunakan: {', '.join(EXPORT_DEFINITIONS)}")
+        
+        filters = {key: value for key, value in filters.items() if value is not None and value != ""}
+        unknown = sorted(set(filters) - definition["filters"])
+        if unknown:
+            raise BadRequestException(f"Filter tidak dikenal untuk export {export_type}: {', '.join(unknown)}")
+        
+        search = str(filters["search"]) if "search" in filters else None
+        is_active = _parse_bool(filters["is_active"], "is_active") if "is_active" in filters else None
+        
+        if export_type == "users":
+            return export_repository.get_users_export_query(
+                role=_parse_enum(filters["role"], UserRole, "role") if "role" in filters else None,
+                kategori=_parse_kategori(filters["kategori"], UserKategori) if "kategori" in filters else None,
+                is_active=is_active,
+                search=search
+            )
+        
+        if export_type == "vehicles":
+            return export_repository.get_vehicles_export_query(
+                kategori=_parse_kategori(filters["kategori"], UnitKategori) if "kategori" in filters else None,
+                vehicle_type=filters.get("vehicle_type"),
+                shift_type=_parse_enum(filters["shift_type"], ShiftType, "shift_type") if "shift_type" in filters else None,
+                is_active=is_active,
+                search=search
+            )
+        
+        return export_repository.get_reports_export_query(
+            kategori=_parse_kategori(filters["kategori"], UnitKategori) if "kategori" in filters else None,
+            status=_parse_enum(filters["report_status"], InspectionStatus, "status") if "report_status" in filters else None,
+            start_date=_parse_date(filters["start_date"], "start_date") if "start_date" in filters else None,
+            end_date=_parse_date(filters["end_date"], "end_date") if "end_date" in filters else None,
+            search=search
+        )
+    
+    @staticmethod
+    def export_filename(export_type: str, format: str) -> str:
+        """Nama file export dengan timestamp, mis. data_pengguna_20250101_080000.csv"""
+        timestamp = get_current_datetime().strftime("%Y%m%d_%H%M%S")
+        extension, _ = EXPORT_FORMATS[format]
+        return f"{EXPORT_DEFINITIONS[export_type]['filename_prefix']}_{timestamp}.{extension}"
+    
+    @staticmethod
+    def iter_rows(
+        query: Select,
+        columns: ExportColumns,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Iterator[list]:
+        """
+        Baca hasil query export baris per baris (server-side cursor).
+        
+        Memakai session sendiri karena generator ini dikonsumsi oleh
+        StreamingResponse setelah handler (dan session request-nya) selesai.
+        
+        Args:
+            query: Select dari export_repository
+            columns: Spesifikasi kolom (label harus ada di query)
+            on_progress: Dipanggil tiap YIELD_PER baris dan di akhir
+        
+        Yields:
+            Nilai satu baris yang sudah diformat (urutan sesuai columns)
+        """
+        with SessionLocal() as db:
+            result = db.execute(query.execution_options(yield_per=ExportSettings.YIELD_PER))
+            keys = list(result.keys())
+            fields = [(keys.index(key), formatter) for _, key, formatter in columns]
+            count = 0
+            for row in result:
+                yield [formatter(row[index]) for index, formatter in fields]
+                count += 1
+                if on_progress is not None and count % ExportSettings.YIELD_PER == 0:
+                    on_progress(count)
+            
+            if on_progress is not None:
+                on_progress(count)
+    
+    @staticmethod
+    def stream_csv(
+        query: Select,
+        columns: ExportColumns,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Iterator[bytes]:
+        """
+        Encode hasil export sebagai CSV dalam potongan kecil.
+        
+        Header langsung dikirim sebagai potongan pertama; selanjutnya baris
+        dikumpulkan sampai CSV_CHUNK_BYTES lalu dikirim.
+        
+        Yields:
+            Potongan CSV (UTF-8)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        
+        writer.writerow([header for header, _, _ in columns])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        
+        for row in ExportService.iter_rows(query, columns, on_progress):
+            writer.writerow(row)
+            if buffer.tell() >= ExportSettings.CSV_CHUNK_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    
+    @staticmethod
+    def write_csv(
+        query: Select,
+        columns: ExportColumns,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """
+        Tulis hasil export ke file CSV sementara (dipakai export job).
+        
+        Returns:
+            Path file CSV (caller wajib menghapus / memindahkan)
+        """
+        path = _temp_path(".csv")
+        try:
+            with open(path, "wb") as f:
+                for chunk in ExportService.stream_csv(query, columns, on_progress):
+                    f.write(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+    
+    @staticmethod
+    def write_xlsx(
+        query: Select,
+        columns: ExportColumns,
+        sheet_name: str,
+        header_color: str,
+        column_width: int = 18,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """
+        Tulis hasil export ke file XLSX sementara (xlsxwriter constant_memory).
+        
+        Baris langsung ditulis dari cursor dan di-flush per baris, sehingga
+        memory tidak bertambah mengikuti jumlah data. Caller wajib menghapus
+        file setelah dikirim.
+        
+        Args:
+            query: Select dari export_repository
+            columns: Spesifikasi kolom yang sama dengan query
+            sheet_name: Nama worksheet
+            header_color: Warna background header (hex)
+            column_width: Lebar semua kolom
+            on_progress: Callback jumlah baris yang sudah ditulis
+        
+        Returns:
+            Path file XLSX
+        """
+        path = _temp_path(".xlsx")
+        
+        try:
+            workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+            worksheet = workbook.add_worksheet(sheet_name)
+            
+            header_format = workbook.add_format({
+                'bold': True,
+                'bg_color': header_color,
+                'font_color': 'white',
+                'border': 1,
+                'align': 'center',
+                'valign': 'vcenter'
+            })
+            
+            # constant_memory: lebar kolom & header harus ditulis sebelum baris data
+            worksheet.set_column(0, len(columns) - 1, column_width)
+            worksheet.write_row(0, 0, [header for header, _, _ in columns], header_format)
+            
+            for row_num, row in enumerate(ExportService.iter_rows(query, columns, on_progress), start=1):
+                worksheet.write_row(row_num, 0, row)
+            
+            workbook.close()
+        except BaseException:
+            os.remove(path)
+            raise
+        
+        return path
+    
+    def write_pdf(
+        self,
+        query: Select,
+        columns: ExportColumns,
+        title: str,
+        header_color: str,
+        col_widths: Sequence[float],
+        body_font_size: int = 8,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """
+        Render hasil export ke file PDF sementara, per potongan baris.
+        
+        Export kecil (satu potongan) langsung dirender di thread pemanggil.
+        Export besar: tiap potongan dirender ke PDF sendiri di process pool
+        (maksimal PDF_MAX_PENDING_CHUNKS potongan antre, sehingga baris yang
+        tertahan di memory terbatas), lalu digabung berurutan. Dipanggil dari
+        handler sync (threadpool) - tidak pernah di event loop.
+        
+        Args:
+            query: Select dari export_repository
+            columns: Spesifikasi kolom yang sama dengan query
+            title: Judul di halaman pertama
+            header_color: Warna judul & header tabel (hex)
+            col_widths: Lebar kolom dalam inch
+            body_font_size: Ukuran font baris data
+            on_progress: Callback jumlah baris yang sudah dibaca
+        
+        Returns:
+            Path file PDF (caller wajib menghapus setelah dikirim)
+        """
+        headers = [header for header, _, _ in columns]
+        rows = self.iter_rows(query, columns, on_progress)
+        chunks = iter(lambda: list(itertools.islice(rows, ExportSettings.PDF_ROWS_PER_CHUNK)), [])
+        
+        path = _temp_path(".pdf")
+        chunk_paths: List[str] = []
+        try:
+            first = next(chunks, [])
+            second = next(chunks, None)
+            if second is None:
+                render_pdf_chunk(path, headers, first, col_widths, header_color, body_font_size, title)
+                return path
+            
+            pool = self._get_pool()
+            pending = deque()
+            try:
+                for index, chunk in enumerate(itertools.chain([first, second], chunks)):
+                    chunk_path = _temp_path(".pdf")
+                    chunk_paths.append(chunk_path)
+                    pending.append(pool.submit(
+                        render_pdf_chunk, chunk_path, headers, chunk, col_widths,
+                        header_color, body_font_size, title if index == 0 else None
+                    ))
+                    if len(pending) >= ExportSettings.PDF_MAX_PENDING_CHUNKS:
+                        pending.popleft().result()
+                
+                while pending:
+                    pending.popleft().result()
+            except BrokenProcessPool:
+                # Worker mati (mis. OOM) - buat pool baru untuk export berikutnya
+                self._pool = None
+                raise
+            finally:
+                # Saat gagal: tunggu worker yang masih menulis sebelum file potongan dihapus
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+            
+            merge_pdfs(chunk_paths, path)
+            return path
+        except BaseException:
+            os.remove(path)
+            raise
+        finally:
+            rows.close()
+            for chunk_path in chunk_paths:
+                os.remove(chunk_path)
+    
+    def write_file(
+        self,
+        export_type: str,
+        format: str,
+        query: Select,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """
+        Tulis export ke file sementara sesuai format (excel / csv / pdf).
+        
+        Args:
+            export_type: users / vehicles / p2h-reports
+            format: excel / csv / pdf
+            query: Select dari build_query
+            on_progress: Callback jumlah baris yang sudah diproses
+        
+        Returns:
+            Path file (caller wajib menghapus / memindahkan)
+        """
+        definition = EXPORT_DEFINITIONS[export_type]
+        columns = definition["columns"]
+        
+        if format == "csv":
+            return self.write_csv(query, columns, on_progress)
+        
+        if format == "excel":
+            return self.write_xlsx(
+                query, columns, definition["title"], definition["header_color"],
+                definition["column_width"], on_progress
+            )
+        
+        return self.write_pdf(
+            query, columns, definition["title"], definition["header_color"],
+            definition["pdf_col_widths"], definition["pdf_font_size"], on_progress
+        )
+
+
+# Singleton instance
+export_service = ExportService()
@@ -0,0 +1,163 @@
+"""
+Notification Dispatcher - Mengirim isi outbox Telegram di luar request
+
+Laporan P2H / job scheduler hanya menulis baris telegram_notifications
+(is_sent = False) di transaksinya sendiri. Dispatcher ini berjalan sebagai
+task asyncio selama aplikasi hidup, meng-claim baris yang jatuh tempo dengan
+FOR UPDATE SKIP LOCKED (aman untuk beberapa worker uvicorn) lalu mengirimnya
+dengan konkurensi terbatas.
+
+Kegagalan kirim dijadwalkan ulang dengan exponential backoff sampai
+OUTBOX_MAX_ATTEMPTS; setelah itu job retry per jam me-reset antriannya.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from app.constants import TelegramSettings
+from app.database import AsyncSessionLocal
+from app.repositories.notification_repository import notification_repository
+from app.services.telegram_service import telegram_service
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """
+    Background sender for the Telegram outbox.
+    
+    - start()/stop() dipanggil dari lifespan FastAPI
+    - wake() dipanggil setelah commit yang menulis outbox agar pesan
+      dikirim segera tanpa menunggu interval polling
+    """
+    
+    def __init__(self, concurrency: int = TelegramSettings.OUTBOX_CONCURRENCY):
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    def start(self) -> None:
+        """Start the dispatcher task on the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._task = self._loop.create_task(self._run())
+        logger.info(f"📮 Notification dispatcher started (concurrency={self.concurrency})")
+    
+    async def stop(self) -> None:
+        """Cancel the dispatcher task (baris yang belum terkirim tetap di outbox)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("🛑 Notification dispatcher stopped")
+    
+    def wake(self) -> None:
+        """Minta dispatcher memeriksa outbox sekarang (aman dari thread lain)"""
+        if self._wake is None or self._loop is None or self._loop.is_closed():
+            return
+        
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if running_loop is self._loop:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+    
+    async def _run(self) -> None:
+        """Main loop: drain outbox, lalu tunggu wake-up atau interval polling"""
+        while True:
+            try:
+                claimed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Notification dispatcher error: {str(e)}", exc_info=True)
+                claimed = 0
+            
+            # Batch penuh: kemungkinan masih ada antrian, langsung lanjut
+            if claimed >= TelegramSettings.OUTBOX_BATCH_SIZE:
+                continue
+            
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=TelegramSettings.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+    
+    async def drain_once(self) -> int:
+        """
+        Claim satu batch notifikasi yang jatuh tempo dan kirim semuanya.
+        
+        Returns:
+            Number of notifications claimed
+        """
+        batch = await self._claim_batch()
+        if not batch:
+            return 0
+        
+        results = await asyncio.gather(*[self._send(message) for _, message, _ in batch])
+        await self._record_results(batch, results)
+        
+        sent = sum(1 for ok in results if ok)
+        logger.info(f"📮 Outbox: {sent}/{len(batch)} notifications sent")
+        return len(batch)
+    
+    async def _send(self, message: str) -> bool:
+        """Send one message, bounded by the dispatcher semaphore"""
+        async with self._semaphore:
+            return await telegram_service.send_message(message)
+    
+    @staticmethod
+    async def _claim_batch() -> List[Tuple[UUID, str, int]]:
+        """Claim due rows in a short transaction"""
+        async with AsyncSessionLocal() as db:
+            batch = await notification_repository.claim_pending(
+                db,
+                limit=TelegramSettings.OUTBOX_BATCH_SIZE,
+                lease=timedelta(seconds=TelegramSettings.OUTBOX_LEASE_SECONDS),
+                max_attempts=TelegramSettings.OUTBOX_MAX_ATTEMPTS,
+                created_after=datetime.utcnow() - timedelta(hours=TelegramSettings.OUTBOX_MAX_AGE_HOURS)
+            )
+            await db.commit()
+            return batch
+    
+    @staticmethod
+    async def _record_results(batch: List[Tuple[UUID, str, int]], results: List[bool]) -> None:
+        """Persist delivery results"""
+        async with AsyncSessionLocal() as db:
+            sent_ids = [notification_id for (notification_id, _, _), ok in zip(batch, results) if ok]
+            await notification_repository.mark_sent(db, sent_ids)
+            
+            now = datetime.utcnow()
+            for (notification_id, _, attempt), ok in zip(batch, results):
+                if ok:
+                    continue
+                # Backoff 1x, 2x, 4x, ... dari base sesuai percobaan ke-berapa
+                delay = TelegramSettings.OUTBOX_RETRY_BACKOFF_SECONDS * 2 ** max(attempt - 1, 0)
+                await notification_repository.mark_failed(
+                    db,
+                    notification_id,
+                    "Gagal terhubung ke Telegram API",
+                    now + timedelta(seconds=delay)
+                )
+            
+            await db.commit()
+
+
+# Singleton instance
+notification_dispatcher = NotificationDispatcher()
@@ -1,16 +1,22 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import Optional, Tuple, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
+from typing import Optional, Tuple, List, Dict
 from uuid import UUID
+from datetime import timedelta
 import logging
 
 from app.models.user import User
-from app.models.p2h import P2HReport, P2HDetail, P2HDailyTracker, InspectionStatus
+from app.models.p2h import P2HReport, P2HDailyTracker, InspectionStatus
+from app.models.notification import TelegramNotification
 from app.models.vehicle import Vehicle, ShiftType
 from app.models.checklist import ChecklistTemplate
-from app.schemas.p2h import P2HReportSubmit, P2HDetailSubmit
+from app.schemas.p2h import P2HReportSubmit, P2HDetailSubmit, P2HBatchItemSubmit
 from app.utils.datetime import (
+    get_current_datetime,
     get_current_date_shift, 
+    get_date_shift,
+    to_local_datetime,
     get_current_date_non_shift,
     get_current_time, 
     get_shift_number, 
@@ -18,6 +24,15 @@ from app.utils.datetime import (
     is_within_non_shift_hours
 )
 from app.services.telegram_service import telegram_service
+from app.utils.vehicle_utils import normalize_hull_number
+from app.repositories.daily_stats_repository import daily_stats_repository
+from app.repositories.p2h_repository import p2h_repository
+from app.utils.cache import dashboard_cache
+from app.exceptions import ChecklistValidationException
+from app.constants import P2HSettings
+from app.services.dashboard_events import dashboard_events
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.photo_service import photo_service
 
 logger = logging.getLogger(__name__)
 
@@ -25,53 +40,34 @@ class P2HService:
     """Service for P2H (Pelaksanaan Pemeriksaan Harian) operations"""
     
     @staticmethod
-    def get_or_create_daily_tracker(db: Session, vehicle: Vehicle, current_date) -> P2HDailyTracker:
-        """
-        Mendapatkan atau membuat tracker harian untuk unit tertentu.
-        Menggunakan tanggal yang sudah disesuaikan dengan tipe shift.
-        """
-        tracker = db.query(P2HDailyTracker).filter(
-            and_(
-                P2HDailyTracker.vehicle_id == vehicle.id,
-                P2HDailyTracker.date == current_date
-            )
-        ).first()
-        
-        if not tracker:
-            tracker = P2HDailyTracker(
-                vehicle_id=vehicle.id,
-                date=current_date,
-                submission_count=0
-            )
-            db.add(tracker)
-            db.commit()
-            db.refresh(tracker)
-        
-        return tracker
-    
-    @staticmethod
-    def can_submit_p2h(
-        db: Session,
+    def check_quota(
         vehicle: Vehicle,
-        selected_shift: int  # Shift yang dipilih user dari dropdown
+        tracker: Optional[P2HDailyTracker],
+        selected_shift: int,
+        current_time
     ) -> Tuple[bool, str]:
         """
-        Validasi apakah unit boleh mengisi P2H pada shift yang dipilih.
+        Cek quota shift terhadap tracker harian (tanpa query database).
         
         Rules:
         - SHIFT (Kuning): 3x sehari, reset jam 05:00, validasi shift vs jam saat ini
         - NON_SHIFT (Hijau/Biru): 1x sehari, reset jam 00:00, hanya jam 06:00-16:00
         - LONG_SHIFT: 2x sehari, reset jam 05:00, validasi shift vs jam saat ini
-        """
-        current_time = get_current_time()
         
-        # Tentukan tanggal operasional berdasarkan tipe shift
-        if vehicle.shift_type == ShiftType.NON_SHIFT:
-            current_date = get_current_date_non_shift()  # Reset jam 00:00
-        else:
-            current_date = get_current_date_shift()  # Reset jam 05:00
+        Args:
+            vehicle: Vehicle to check
+            tracker: Daily tracker of the operational date (None = belum ada submit)
+            selected_shift: Shift yang dipilih user
+            current_time: Current local time
         
-        tracker = P2HService.get_or_create_daily_tracker(db, vehicle, current_date)
+        Returns:
+            (can_submit, message)
+        """
+        shift_status = {
+            1: bool(tracker and tracker.shift_1_done),
+            2: bool(tracker and tracker.shift_2_done),
+            3: bool(tracker and tracker.shift_3_done)
+        }
         
         # Logika Kendaraan Non-Shift (Hijau & Biru - Hanya 1x sehari, jam 06:00-16:00)
         if vehicle.shift_type == ShiftType.NON_SHIFT:
@@ -79,7 +75,7 @@ class P2HService:
             if not is_within_non_shift_hours(current_time):
                 return False, "P2H non-shift hanya dapat diisi pada jam 06:00-16:00"
             
-            if tracker.shift_1_done:
+            if shift_status[1]:
                 return False, "P2H sudah diisi hari ini untuk kendaraan non-shift"
             return True, "P2H dapat diisi"
         
@@ -92,10 +88,10 @@ class P2HService:
                 return False, f"Saat ini adalah Long Shift {actual_long_shift} (bukan Long Shift {selected_shift}). Pilih shift yang sesuai."
             
             if selected_shift == 1:
-                if tracker.shift_1_done:
+                if shift_status[1]:
                     return False, "P2H long shift 1 (06:00-19:00) sudah diisi hari ini"
             else:  # selected_shift == 2
-                if tracker.shift_2_done:
+                if shift_status[2]:
                     return False, "P2H long shift 2 (18:00-07:00) sudah diisi hari ini"
             return True, "P2H dapat diisi"
         
@@ -106,17 +102,75 @@ class P2HService:
         if selected_shift != actual_shift:
             return False, f"Saat ini adalah Shift {actual_shift} (bukan Shift {selected_shift}). Pilih shift yang sesuai dengan jam saat ini."
         
-        shift_status = {
-            1: tracker.shift_1_done,
-            2: tracker.shift_2_done,
-            3: tracker.shift_3_done
-        }
-        
         if shift_status.get(selected_shift):
             return False, f"P2H shift {selected_shift} sudah diisi untuk unit ini hari ini"
         
         return True, "P2H dapat diisi"
     
+    @staticmethod
+    def get_shift_label(shift_type: ShiftType, shift_number: int) -> str:
+        """Label shift seperti yang disimpan di ChecklistTemplate.applicable_shifts"""
+        if shift_type == ShiftType.NON_SHIFT:
+            return "No Shift"
+        if shift_type == ShiftType.LONG_SHIFT:
+            return "Long Shift"
+        return f"Shift {shift_number}"
+    
+    @staticmethod
+    async def validate_checklist_items(
+        db: AsyncSession,
+        vehicle: Vehicle,
+        shift_number: int,
+        details: List[P2HDetailSubmit]
+    ) -> Dict[UUID, dict]:
+        """
+        Validasi checklist_item_id pada payload dengan satu query.
+        
+        Setiap item harus ada, aktif, berlaku untuk tipe kendaraan dan shift,
+        dan tidak boleh diisi dua kali.
+        
+        Returns:
+            Dict of checklist item id -> {item_name, ...} (untuk pesan notifikasi)
+        
+        Raises:
+            ChecklistValidationException: Daftar error per item (index di payload)
+        """
+        vehicle_tag = vehicle.vehicle_type.value if hasattr(vehicle.vehicle_type, 'value') else vehicle.vehicle_type
+        shift_label = P2HService.get_shift_label(vehicle.shift_type, shift_number)
+        
+        item_ids = list({d.checklist_item_id for d in details})
+        items = await p2h_repository.get_checklist_applicability(db, item_ids, vehicle_tag, shift_label)
+        
+        errors = []
+        seen = set()
+        for index, d in enumerate(details):
+            item = items.get(d.checklist_item_id)
+            if d.checklist_item_id in seen:
+                error = "Item checklist diisi lebih dari sekali"
+            elif item is None:
+                error = "Item checklist tidak ditemukan"
+            elif not item["is_active"]:
+                error = "Item checklist sudah tidak aktif"
+            elif not item["tag_ok"]:
+                error = f"Item checklist tidak berlaku untuk tipe {vehicle_tag}"
+            elif not item["shift_ok"]:
+                error = f"Item checklist tidak berlaku untuk {shift_label}"
+            else:
+                error = None
+            seen.add(d.checklist_item_id)
+            
+            if error:
+                errors.append({
+                    "index": index,
+                    "checklist_item_id": str(d.checklist_item_id),
+                    "error": error
+                })
+        
+        if errors:
+            raise ChecklistValidationException(errors)
+        
+        return items
+    
     @staticmethod
     def calculate_overall_status(details: List[P2HDetailSubmit]) -> InspectionStatus:
         """
@@ -143,7 +197,7 @@ class P2HService:
     
     @staticmethod
     async def submit_p2h(
-        db: Session,
+        db: AsyncSession,
         user: User,
         submission: P2HReportSubmit
     ) -> P2HReport:
@@ -153,7 +207,7 @@ class P2HService:
         logger.info(f"📝 Starting P2H submission for vehicle_id: {submission.vehicle_id}, user: {user.full_name}")
         
         # 1. Cari Vehicle
-        vehicle = db.query(Vehicle).filter(Vehicle.id == submission.vehicle_id).first()
+        vehicle = await db.get(Vehicle, submission.vehicle_id)
         if not vehicle:
             raise ValueError("Kendaraan tidak ditemukan")
         if not vehicle.is_active:
@@ -170,50 +224,245 @@ class P2HService:
         else:
             current_date = get_current_date_shift()  # Reset jam 05:00
         
-        # Tentukan shift number berdasarkan tipe kendaraan dan submission
         # submission.shift_number adalah shift yang dipilih user dari dropdown
+        shift_number = P2HService.resolve_shift_number(vehicle, submission.shift_number, current_time)
+        
+        try:
+            report, notification = await P2HService.create_report(
+                db, user, vehicle, submission.details, shift_number, current_date, current_time
+            )
+        except (ValueError, ChecklistValidationException):
+            await db.rollback()
+            raise
+        
+        await db.commit()
+        P2HService.publish_submission([notification] if notification else [])
+        
+        return report
+    
+    @staticmethod
+    async def submit_p2h_batch(
+        db: AsyncSession,
+        user: User,
+        reports: List[P2HBatchItemSubmit]
+    ) -> dict:
+        """
+        Memproses banyak laporan P2H yang diisi offline dalam satu transaksi.
+        
+        - Aturan shift/quota dicek terhadap waktu pengisian (captured_at),
+          bukan waktu request diterima
+        - client_submission_id membuat retry aman: key yang sudah tersimpan
+          dikembalikan sebagai `duplicate` dengan report_id yang sama
+        - Tiap laporan diproses di savepoint; laporan yang ditolak tidak
+          membatalkan laporan lain dalam batch
+        
+        Returns:
+            {"results": [per-item outcome sesuai urutan payload], "summary": {...}}
+        """
+        logger.info(f"📦 Starting P2H batch submission ({len(reports)} reports), user: {user.full_name}")
+        now = get_current_datetime()
+        
+        # Satu query untuk semua kendaraan dan satu query untuk key yang sudah tersimpan
+        vehicles = {
+            v.id: v for v in (await db.scalars(
+                select(Vehicle).where(Vehicle.id.in_({r.vehicle_id for r in reports}))
+            )).all()
+        }
+        stored = await p2h_repository.get_report_ids_by_client_ids(
+            db, user.id, list({r.client_submission_id for r in reports})
+        )
+        
+        # Urutan proses: per unit lalu waktu pengisian. Urutan lock tracker
+        # jadi konsisten antar batch (tanpa deadlock) dan shift per unit berurutan.
+        captured = [to_local_datetime(r.captured_at) for r in reports]
+        order = sorted(range(len(reports)), key=lambda i: (str(reports[i].vehicle_id), captured[i]))
+        
+        results: List[dict] = [{} for _ in reports]
+        notifications: List[TelegramNotification] = []
+        
+        for index in order:
+            item = reports[index]
+            key = item.client_submission_id
+            result = results[index]
+            result.update(index=index, client_submission_id=key)
+            
+            if key in stored:
+                result.update(status="duplicate", report_id=str(stored[key]))
+                continue
+            
+            vehicle = vehicles.get(item.vehicle_id)
+            error = P2HService.check_capture_time(captured[index], now)
+            if error is None and not vehicle:
+                error = "Kendaraan tidak ditemukan"
+            elif error is None and not vehicle.is_active:
+                error = "Kendaraan sedang dalam status non-aktif"
+            if error:
+                result.update(status="rejected", message=error)
+                continue
+            
+            # Tanggal & shift operasional mengikuti waktu pengisian di perangkat
+            current_time = captured[index].time()
+            if vehicle.shift_type == ShiftType.NON_SHIFT:
+                current_date = captured[index].date()  # Reset jam 00:00
+                live_date = now.date()
+            else:
+                current_date = get_date_shift(captured[index])  # Reset jam 05:00
+                live_date = get_date_shift(now)
+            shift_number = P2HService.resolve_shift_number(vehicle, item.shift_number, current_time)
+            is_live = (
+                current_date == live_date
+                and shift_number == P2HService.resolve_shift_number(vehicle, None, now.time())
+            )
+            
+            savepoint = await db.begin_nested()
+            try:
+                report, notification = await P2HService.create_report(
+                    db, user, vehicle, item.details, shift_number, current_date, current_time,
+                    client_submission_id=key, is_live=is_live
+                )
+                await savepoint.commit()
+            except ChecklistValidationException as e:
+                await savepoint.rollback()
+                result.update(status="rejected", message=e.detail["message"], errors=e.detail["errors"])
+                continue
+            except ValueError as e:
+                await savepoint.rollback()
+                result.update(status="rejected", message=str(e))
+                continue
+            except IntegrityError:
+                # Key yang sama baru saja disimpan oleh request lain (retry paralel)
+                await savepoint.rollback()
+                existing = await p2h_repository.get_report_ids_by_client_ids(db, user.id, [key])
+                if key not in existing:
+                    raise
+                stored[key] = existing[key]
+                result.update(status="duplicate", report_id=str(existing[key]))
+                continue
+            
+            stored[key] = report.id  # Key yang sama muncul lagi di batch ini = duplicate
+            if notification:
+                notifications.append(notification)
+            result.update(
+                status="created",
+                report_id=str(report.id),
+                overall_status=report.overall_status.value,
+                submission_date=current_date.isoformat(),
+                shift_number=shift_number
+            )
+        
+        await db.commit()
+        P2HService.publish_submission(notifications)
+        
+        summary = {
+            status: sum(1 for r in results if r["status"] == status)
+            for status in ("created", "duplicate", "rejected")
+        }
+        logger.info(f"📦 Batch done: {summary}")
+        return {"results": results, "summary": summary}
+    
+    @staticmethod
+    def check_capture_time(captured_at, now) -> Optional[str]:
+        """Tolak waktu pengisian di masa depan atau yang sudah terlalu lama"""
+        if captured_at > now + timedelta(minutes=P2HSettings.OFFLINE_CLOCK_SKEW_MINUTES):
+            return "Waktu pengisian (captured_at) berada di masa depan. Periksa jam perangkat."
+        if captured_at < now - timedelta(hours=P2HSettings.OFFLINE_MAX_AGE_HOURS):
+            return f"Laporan offline lebih dari {P2HSettings.OFFLINE_MAX_AGE_HOURS} jam tidak dapat disubmit"
+        return None
+    
+    @staticmethod
+    def resolve_shift_number(vehicle: Vehicle, selected_shift: Optional[int], at_time) -> int:
+        """Shift yang dipakai laporan: pilihan user, atau shift pada jam `at_time`"""
         if vehicle.shift_type == ShiftType.NON_SHIFT:
-            shift_number = 1  # Non-shift selalu shift 1
-        elif vehicle.shift_type == ShiftType.LONG_SHIFT:
-            shift_number = submission.shift_number or get_long_shift_number(current_time)
-        else:  # SHIFT
-            shift_number = submission.shift_number or get_shift_number(current_time)
-        
-        # 3. Cek Quota/Izin Submit dengan validasi shift yang dipilih
-        can_submit, message = P2HService.can_submit_p2h(db, vehicle, shift_number)
+            return 1  # Non-shift selalu shift 1
+        if vehicle.shift_type == ShiftType.LONG_SHIFT:
+            return selected_shift or get_long_shift_number(at_time)
+        return selected_shift or get_shift_number(at_time)  # SHIFT
+    
+    @staticmethod
+    async def create_report(
+        db: AsyncSession,
+        user: User,
+        vehicle: Vehicle,
+        details: List[P2HDetailSubmit],
+        shift_number: int,
+        current_date,
+        current_time,
+        client_submission_id: Optional[str] = None,
+        is_live: bool = True
+    ) -> Tuple[P2HReport, Optional[TelegramNotification]]:
+        """
+        Validasi dan simpan satu laporan P2H di transaksi yang sedang berjalan.
+        
+        Tidak melakukan commit/rollback - dipakai oleh submit tunggal maupun
+        submit batch (per item di dalam savepoint).
+        
+        Args:
+            db: Database session
+            user: Submitting user
+            vehicle: Active vehicle
+            details: Checklist answers
+            shift_number: Resolved shift number
+            current_date: Operational date of the inspection
+            current_time: Local time of the inspection
+            client_submission_id: Idempotency key dari aplikasi (submit offline)
+            is_live: False jika laporan untuk shift yang sudah lewat (batch offline)
+        
+        Returns:
+            (report, queued Telegram notification or None)
+        
+        Raises:
+            ValueError: Quota/shift tidak memenuhi aturan
+            ChecklistValidationException: Checklist item tidak valid
+        """
+        # 3. Validasi semua checklist item (satu query) sebelum mengunci tracker
+        checklist_items = await P2HService.validate_checklist_items(db, vehicle, shift_number, details)
+        
+        # Foto bukti harus sudah diupload lewat POST /p2h/photos
+        missing_photos = await photo_service.missing_photos([d.photo_id for d in details if d.photo_id])
+        if missing_photos:
+            raise ValueError(f"Foto belum diupload: {', '.join(missing_photos)}")
+        
+        # 4. Kunci tracker harian (UPSERT) lalu cek quota di transaksi yang sama.
+        #    Submit bersamaan untuk unit yang sama menunggu lock ini, sehingga
+        #    shift yang sama tidak bisa lolos dua kali saat pergantian shift.
+        tracker = await p2h_repository.lock_daily_tracker(db, vehicle.id, current_date)
+        can_submit, message = P2HService.check_quota(vehicle, tracker, shift_number, current_time)
         if not can_submit:
             raise ValueError(message)
         
-        # 4. Hitung Status Keseluruhan
-        overall_status = P2HService.calculate_overall_status(submission.details)
+        # 5. Hitung Status Keseluruhan
+        overall_status = P2HService.calculate_overall_status(details)
         logger.info(f"📊 Overall status calculated: {overall_status}")
         
-        # 5. Simpan Header Laporan
+        # 6. Simpan Header Laporan
         report = P2HReport(
             vehicle_id=vehicle.id,
             user_id=user.id,
             shift_number=shift_number,
             overall_status=overall_status,
             submission_date=current_date,
-            submission_time=current_time
+            submission_time=current_time,
+            client_submission_id=client_submission_id
         )
         db.add(report)
-        db.flush() # Ambil ID report untuk detail
+        await db.flush() # Ambil ID report untuk detail
         
         logger.info(f"💾 P2H Report created with ID: {report.id}")
         
-        # 6. Simpan Detail Pemeriksaan
-        for d in submission.details:
-            detail = P2HDetail(
-                report_id=report.id,
-                checklist_item_id=d.checklist_item_id,
-                status=d.status,
-                keterangan=d.keterangan
-            )
-            db.add(detail)
+        # 7. Simpan Detail Pemeriksaan (satu INSERT multi-row)
+        await p2h_repository.bulk_insert_details(
+            db,
+            report.id,
+            [
+                {
+                    **d.model_dump(exclude={"photo_id"}),
+                    "image_url": photo_service.photo_url(d.photo_id) if d.photo_id else None
+                }
+                for d in details
+            ]
+        )
         
-        # 7. Update Daily Tracker
-        tracker = P2HService.get_or_create_daily_tracker(db, vehicle, current_date)
+        # 8. Update Daily Tracker (baris sudah dikunci di langkah 4)
         tracker.submission_count += 1
         
         if shift_number == 1 or vehicle.shift_type == ShiftType.NON_SHIFT:
@@ -226,30 +475,140 @@ class P2HService:
             tracker.shift_3_done = True
             tracker.shift_3_report_id = report.id
         
-        db.commit()
-        db.refresh(report)
+        # 9. Update rollup statistik harian (satu transaksi dengan laporan)
+        await daily_stats_repository.increment(db, vehicle, report)
         
-        # 8. Notifikasi Telegram (Hanya jika bermasalah)
-        logger.info(f"🔔 Checking if telegram notification needed - Status: {overall_status}")
+        # Event live dashboard via NOTIFY: ikut terkirim/batal bersama transaksi ini
+        await dashboard_events.publish(
+            db, P2HService.build_dashboard_events(vehicle, report, tracker, user, is_live)
+        )
+        
+        # 10. Notifikasi Telegram (Hanya jika bermasalah) - ditulis ke outbox di
+        #     transaksi yang sama, dikirim oleh notification_dispatcher setelah commit
+        notification = None
         if overall_status in [InspectionStatus.ABNORMAL, InspectionStatus.WARNING]:
-            try:
-                logger.info(f"📤 Sending telegram notification for report {report.id}")
-                notification = await telegram_service.send_p2h_notification(
-                    db, vehicle, report, overall_status
-                )
-                if notification and notification.is_sent:
-                    logger.info(f"✅ Telegram notification sent successfully")
-                else:
-                    logger.warning(f"⚠️ Telegram notification failed to send")
-            except Exception as e:
-                logger.error(f"❌ Telegram alert failed: {str(e)}", exc_info=True)
+            problem_items = [
+                {
+                    "item_name": checklist_items[d.checklist_item_id]["item_name"],
+                    "status": d.status,
+                    "keterangan": d.keterangan
+                }
+                for d in details
+                if d.status in [InspectionStatus.ABNORMAL, InspectionStatus.WARNING]
+            ]
+            notification = telegram_service.enqueue_p2h_notification(
+                db, vehicle, report, overall_status, problem_items, user.full_name
+            )
+        
+        return report, notification
+    
+    @staticmethod
+    def publish_submission(notifications: List[TelegramNotification]) -> None:
+        """Efek samping setelah commit: cache dan outbox dispatcher"""
+        # Statistik dashboard sudah berubah (event live dashboard dikirim NOTIFY saat commit)
+        dashboard_cache.clear()
+        
+        if notifications:
+            logger.info(f"📮 {len(notifications)} Telegram notification(s) queued")
+            notification_dispatcher.wake()
+    
+    @staticmethod
+    def build_dashboard_events(
+        vehicle: Vehicle,
+        report: P2HReport,
+        tracker: P2HDailyTracker,
+        user: User,
+        is_live: bool = True
+    ) -> List[Tuple[str, dict]]:
+        """
+        Susun event delta untuk dashboard yang terhubung via /dashboard/stream.
+        
+        Disusun sebelum commit (atribut ORM belum expired, tanpa query
+        tambahan) dan di-NOTIFY di transaksi yang sama, sehingga baru
+        terkirim setelah commit berhasil. Event:
+        - report_created: ringkasan laporan baru (format /dashboard/recent-reports)
+        - status_counts: perubahan counter statistik (dijumlahkan di client)
+        - tracker_color: warna indikator terbaru untuk unit tersebut
+        
+        is_live=False (laporan offline untuk shift yang sudah lewat) tidak
+        mengurangi counter pending shift berjalan.
+        """
+        status_key = f"total_{report.overall_status.value}"
+        shifts_done = {
+            1: tracker.shift_1_done,
+            2: tracker.shift_2_done,
+            3: tracker.shift_3_done
+        }
+        color, shifts_completed = P2HService.get_tracker_color(vehicle.shift_type, shifts_done)
+        vehicle_type = vehicle.vehicle_type.value if hasattr(vehicle.vehicle_type, 'value') else vehicle.vehicle_type
+        
+        delta = {status_key: 1, "total_completed_p2h": 1}
+        if is_live:
+            # Submit untuk shift berjalan (divalidasi di check_quota)
+            delta["total_pending_p2h"] = -1
+        
+        return [
+            ("report_created", {
+                "id": str(report.id),
+                "submission_date": report.submission_date.isoformat(),
+                "submission_time": report.submission_time.isoformat(),
+                "shift_number": report.shift_number,
+                "overall_status": report.overall_status.value,
+                "vehicle": {
+                    "id": str(vehicle.id),
+                    "no_lambung": vehicle.no_lambung,
+                    "plat_nomor": vehicle.plat_nomor,
+                    "vehicle_type": vehicle_type,
+                    "merk": vehicle.merk
+                },
+                "user": {"full_name": user.full_name}
+            }),
+            ("status_counts", {
+                "submission_date": report.submission_date.isoformat(),
+                "vehicle_type": vehicle_type,
+                "delta": delta
+            }),
+            ("tracker_color", {
+                "vehicle_id": str(vehicle.id),
+                "no_lambung": vehicle.no_lambung,
+                "date": tracker.date.isoformat(),
+                "color_code": color,
+                "shifts_completed": shifts_completed
+            })
+        ]
+    
+    @staticmethod
+    def get_tracker_color(shift_type: ShiftType, shifts_done: dict) -> Tuple[str, List[int]]:
+        """
+        Hitung warna indikator dari status shift di daily tracker.
+        
+        - NON_SHIFT: Hijau jika shift 1 done, Merah jika belum
+        - LONG_SHIFT: Hijau jika kedua shift done, Kuning jika 1 done, Merah jika kosong
+        - SHIFT: Hijau jika semua shift done, Kuning jika sebagian, Merah jika kosong
+        
+        Returns:
+            (color_code, shifts_completed)
+        """
+        if shift_type == ShiftType.NON_SHIFT:
+            shifts = [1]
+        elif shift_type == ShiftType.LONG_SHIFT:
+            shifts = [1, 2]
         else:
-            logger.info(f"ℹ️ No telegram notification needed - Status is NORMAL")
+            shifts = [1, 2, 3]
         
-        return report
-
+        shifts_completed = [s for s in shifts if shifts_done.get(s)]
+        
+        if len(shifts_completed) == len(shifts):
+            color = "green"  # Semua shift selesai
+        elif shifts_completed:
+            color = "yellow"  # Sebagian selesai
+        else:
+            color = "red"  # Belum ada yang selesai
+        
+        return color, shifts_completed
+    
     @staticmethod
-    def get_vehicle_p2h_status(db: Session, vehicle_id: UUID) -> dict:
+    async def get_vehicle_p2h_status(db: AsyncSession, vehicle_id: UUID) -> dict:
         """
         Cek status warna (Merah/Hijau/Kuning) untuk unit di dashboard/scan.
         
@@ -258,68 +617,71 @@ class P2HService:
         - NON_SHIFT (Hijau/Biru): Hijau jika done, Merah jika belum
         - LONG_SHIFT: Hijau jika kedua shift done, Kuning jika 1 done, Merah jika kosong
         """
-        vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-        if not vehicle:
+        now = get_current_datetime()
+        row = await p2h_repository.get_vehicle_with_tracker(
+            db, get_date_shift(now), now.date(), vehicle_id=vehicle_id
+        )
+        if not row:
             raise ValueError("Unit tidak terdaftar")
         
-        current_time = get_current_time()
+        vehicle, tracker = row
+        return P2HService.build_scan_status(vehicle, tracker, now.time())
         
-        # Gunakan tanggal operasional yang sesuai dengan tipe shift
-        if vehicle.shift_type == ShiftType.NON_SHIFT:
-            current_date = get_current_date_non_shift()  # Reset jam 00:00
-        else:
-            current_date = get_current_date_shift()  # Reset jam 05:00
+    @staticmethod
+    async def scan_vehicle(db: AsyncSession, hull_number: str) -> Optional[Tuple[Vehicle, dict]]:
+        """
+        Status scan unit untuk driver (GET /vehicles/lambung) dalam satu query.
         
-        tracker = db.query(P2HDailyTracker).filter(
-            and_(
-                P2HDailyTracker.vehicle_id == vehicle_id,
-                P2HDailyTracker.date == current_date
-            )
-        ).first()
-        
-        # Status default jika belum ada tracker sama sekali hari ini
-        shifts_done = {1: False, 2: False, 3: False}
-        if tracker:
-            shifts_done = {
-                1: tracker.shift_1_done,
-                2: tracker.shift_2_done,
-                3: tracker.shift_3_done
-            }
-        
-        # Tentukan shift number dan status warna
-        if vehicle.shift_type == ShiftType.NON_SHIFT:
-            shift_number = 1
-            p2h_done = shifts_done[1]
-            color = "green" if p2h_done else "red"
-            shifts_completed = [1] if p2h_done else []
-            
-        elif vehicle.shift_type == ShiftType.LONG_SHIFT:
-            shift_number = get_long_shift_number(current_time)
-            shift_1_done = shifts_done[1]
-            shift_2_done = shifts_done[2]
-            
-            if shift_1_done and shift_2_done:
-                color = "green"  # Semua long shift selesai
-            elif shift_1_done or shift_2_done:
-                color = "yellow"  # Sebagian selesai
-            else:
-                color = "red"  # Belum ada yang selesai
-            
-            shifts_completed = [s for s in [1, 2] if shifts_done[s]]
-            
-        else:  # SHIFT (3x sehari)
-            shift_number = get_shift_number(current_time)
-            all_done = shifts_done[1] and shifts_done[2] and shifts_done[3]
-            any_done = shifts_done[1] or shifts_done[2] or shifts_done[3]
-            
-            if all_done:
-                color = "green"
-            elif any_done:
-                color = "yellow"
-            else:
-                color = "red"
-            
-            shifts_completed = [s for s in [1, 2, 3] if shifts_done[s]]
+        Kendaraan, user, company dan tracker hari ini dimuat sekaligus; warna,
+        shift berjalan dan boleh-tidaknya submit dihitung di memory (read-only,
+        tidak membuat tracker).
+        
+        Args:
+            db: Database session
+            hull_number: Hull number dalam format apapun (P309, P.309, p 309, dll)
+        
+        Returns:
+            (vehicle, status) atau None jika unit tidak ditemukan
+        """
+        normalized = normalize_hull_number(hull_number)
+        if not normalized:
+            return None
+        
+        now = get_current_datetime()
+        row = await p2h_repository.get_vehicle_with_tracker(
+            db, get_date_shift(now), now.date(), hull_number_normalized=normalized
+        )
+        if not row:
+            return None
+        
+        vehicle, tracker = row
+        return vehicle, P2HService.build_scan_status(vehicle, tracker, now.time())
+    
+    @staticmethod
+    def build_scan_status(
+        vehicle: Vehicle,
+        tracker: Optional[P2HDailyTracker],
+        current_time
+    ) -> dict:
+        """
+        Hitung status P2H unit dari tracker hari ini (tanpa query database).
+        
+        Args:
+            vehicle: Vehicle
+            tracker: Daily tracker of the operational date (None = belum ada submit)
+            current_time: Current local time
+        
+        Returns:
+            Status dict (format get_vehicle_p2h_status + can_submit_p2h & message)
+        """
+        shifts_done = {
+            1: bool(tracker and tracker.shift_1_done),
+            2: bool(tracker and tracker.shift_2_done),
+            3: bool(tracker and tracker.shift_3_done)
+        }
+        shift_number = P2HService.resolve_shift_number(vehicle, None, current_time)
+        color, shifts_completed = P2HService.get_tracker_color(vehicle.shift_type, shifts_done)
+        can_submit, message = P2HService.check_quota(vehicle, tracker, shift_number, current_time)
         
         return {
             "no_lambung": vehicle.no_lambung,
@@ -328,7 +690,9 @@ class P2HService:
             "current_shift": shift_number,
             "status_p2h": "Lengkap" if color == "green" else "Belum Lengkap",
             "color_code": color,
-            "shifts_completed": shifts_completed
+            "shifts_completed": shifts_completed,
+            "can_submit_p2h": can_submit,
+            "message": message
         }
 
 p2h_service = P2HService()
\ No newline at end of file
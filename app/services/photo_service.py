@@ -0,0 +1,216 @@
+"""
+Photo Service - Upload foto bukti kerusakan untuk detail P2H
+
+Alur upload (POST /p2h/photos, body = isi file mentah):
+1. Body di-stream per chunk ke file sementara sambil di-hash (sha256),
+   tanpa menampung seluruh foto di memory; hash & tulis disk dijalankan
+   di thread (asyncio.to_thread) per blok PHOTO_WRITE_BUFFER
+2. photo_id = "<sha256>.<ext>"; jika sudah ada di store, file sementara
+   dibuang (dedupe - retry upload dari HP tidak menambah file)
+3. Thumbnail dibuat di process pool (resize foto 4-8 MB memakan CPU,
+   tidak boleh memblok event loop), sekaligus memvalidasi isi gambar
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Optional
+
+from PIL import UnidentifiedImageError
+from PIL.Image import DecompressionBombError
+
+from app.constants import FileUploadSettings
+from app.exceptions import BadRequestException, PayloadTooLargeException, UnsupportedMediaTypeException
+from app.utils.image import make_thumbnail
+from app.utils.photo_storage import photo_store
+
+logger = logging.getLogger(__name__)
+
+# Magic bytes - tipe file dicek dari isi, bukan hanya header Content-Type
+_SIGNATURES = {
+    ".jpg": b"\xff\xd8\xff",
+    ".png": b"\x89PNG\r\n\x1a\n",
+}
+
+_PILLOW_FORMATS = {".jpg": "JPEG", ".png": "PNG"}
+
+
+class PhotoService:
+    """Service for P2H evidence photos"""
+    
+    def __init__(self, workers: int = FileUploadSettings.THUMBNAIL_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    @staticmethod
+    def thumbnail_key(photo_id: str) -> str:
+        """Key thumbnail di store (selalu JPEG)"""
+        return f"{photo_id.split('.')[0]}.thumb.jpg"
+    
+    @staticmethod
+    def photo_url(photo_id: str) -> str:
+        """URL relatif foto asli (disimpan di p2h_details.image_url)"""
+        return f"{FileUploadSettings.PHOTO_URL_PREFIX}{photo_id}"
+    
+    @staticmethod
+    def is_valid_photo_id(photo_id: str) -> bool:
+        return re.match(FileUploadSettings.PHOTO_ID_PATTERN, photo_id) is not None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # spawn: jangan fork proses uvicorn yang sudah punya thread (scheduler, to_thread)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+    
+    def shutdown(self) -> None:
+        """Matikan process pool thumbnail (dipanggil saat shutdown aplikasi)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    async def save_upload(
+        self,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str],
+        content_length: Optional[int] = None
+    ) -> dict:
+        """
+        Simpan foto dari request body yang di-stream.
+        
+        Args:
+            chunks: Async iterator of body chunks (request.stream())
+            content_type: Header Content-Type
+            content_length: Header Content-Length, jika ada
+        
+        Returns:
+            Dict photo_id, image_url, thumbnail_url, size, deduplicated
+        
+        Raises:
+            UnsupportedMediaTypeException: Bukan JPEG/PNG
+            PayloadTooLargeException: Melebihi MAX_PHOTO_SIZE
+            BadRequestException: Body kosong atau gambar rusak
+        """
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        ext = FileUploadSettings.PHOTO_CONTENT_TYPES.get(media_type)
+        if ext is None:
+            raise UnsupportedMediaTypeException("Foto harus berformat JPEG atau PNG (Content-Type image/jpeg atau image/png)")
+        
+        max_mb = FileUploadSettings.MAX_PHOTO_SIZE // (1024 * 1024)
+        if content_length is not None and content_length > FileUploadSettings.MAX_PHOTO_SIZE:
+            raise PayloadTooLargeException(f"Ukuran foto maksimal {max_mb} MB")
+        
+        temp_path = photo_store.new_temp_path(suffix=ext)
+        thumb_path = None
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            head = b""
+            buffer = bytearray()
+            
+            # Buat/tutup/hapus file sementara cukup di loop (cepat, aman saat request
+            # dibatalkan); hash, tulis, cek & pindah file dijalankan di thread
+            f = open(temp_path, "wb")
+            try:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > FileUploadSettings.MAX_PHOTO_SIZE:
+                        raise PayloadTooLargeException(f"Ukuran foto maksimal {max_mb} MB")
+                    if len(head) < 8:
+                        head += chunk[:8]
+                    buffer += chunk
+                    if len(buffer) >= FileUploadSettings.PHOTO_WRITE_BUFFER:
+                        await asyncio.to_thread(self._write_block, f, digest, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(self._write_block, f, digest, bytes(buffer))
+            finally:
+                f.close()
+            
+            if size == 0:
+                raise BadRequestException("Body foto kosong")
+            if not head.startswith(_SIGNATURES[ext]):
+                raise UnsupportedMediaTypeException("Isi file tidak sesuai dengan Content-Type (JPEG/PNG)")
+            
+            photo_id = f"{digest.hexdigest()}{ext}"
+            thumb_key = self.thumbnail_key(photo_id)
+            deduplicated = await asyncio.to_thread(self._is_stored, photo_id, thumb_key)
+            
+            if not deduplicated:
+                thumb_path = photo_store.new_temp_path(suffix=".jpg")
+                loop = asyncio.get_running_loop()
+                try:
+                    image_format, _, _ = await loop.run_in_executor(
+                        self._get_pool(),
+                        make_thumbnail,
+                        temp_path,
+                        thumb_path,
+                        FileUploadSettings.THUMBNAIL_MAX_SIZE,
+                        FileUploadSettings.THUMBNAIL_QUALITY,
+                        FileUploadSettings.MAX_PHOTO_PIXELS
+                    )
+                except BrokenProcessPool:
+                    # Worker mati (mis. OOM) - buat pool baru untuk upload berikutnya
+                    self._pool = None
+                    raise
+                except DecompressionBombError:
+                    raise BadRequestException(
+                        f"Resolusi foto terlalu besar (maksimal {FileUploadSettings.MAX_PHOTO_PIXELS // 1_000_000} MP)"
+                    )
+                except (UnidentifiedImageError, OSError, ValueError):
+                    raise BadRequestException("File foto rusak atau tidak dapat dibaca")
+                if image_format != _PILLOW_FORMATS[ext]:
+                    raise UnsupportedMediaTypeException("Isi file tidak sesuai dengan Content-Type (JPEG/PNG)")
+                
+                # Thumbnail dulu: foto asli yang ada di store selalu punya thumbnail
+                await asyncio.to_thread(photo_store.put_file, thumb_path, thumb_key)
+                thumb_path = None
+                await asyncio.to_thread(photo_store.put_file, temp_path, photo_id)
+                temp_path = None
+            
+            logger.info(f"📷 Photo {'deduplicated' if deduplicated else 'stored'}: {photo_id} ({size} bytes)")
+            return {
+                "photo_id": photo_id,
+                "image_url": self.photo_url(photo_id),
+                "thumbnail_url": f"{self.photo_url(photo_id)}/thumbnail",
+                "size": size,
+                "deduplicated": deduplicated
+            }
+        finally:
+            for path in (temp_path, thumb_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+    
+    @staticmethod
+    def _write_block(f, digest, block: bytes) -> None:
+        # Di thread: sha256 melepas GIL untuk blok besar, tulis disk tidak memblok loop
+        digest.update(block)
+        f.write(block)
+    
+    @staticmethod
+    def _is_stored(*keys: str) -> bool:
+        return all(photo_store.exists(key) for key in keys)
+    
+    @staticmethod
+    async def missing_photos(photo_ids: list) -> list:
+        """Photo id yang belum diupload (untuk validasi submit P2H)"""
+        def missing() -> list:
+            return [
+                photo_id for photo_id in photo_ids
+                if not photo_store.exists(photo_id)
+            ]
+
+        if not photo_ids:
+            return []
+        return await asyncio.to_thread(missing)
+
+
+# Singleton instance
+photo_service = PhotoService()
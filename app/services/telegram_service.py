@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 import logging
 import asyncio
 from datetime import datetime
@@ -62,7 +62,7 @@ class TelegramService:
                         await asyncio.sleep(2 ** attempt)  # Exponential backoff: 1s, 2s, 4s
                         continue
                     return False
-                    
+            
             except httpx.TimeoutException as e:
                 logger.warning(f"⏱️ Telegram request timeout on attempt {attempt + 1}: {str(e)}")
                 if attempt < max_retries - 1:
@@ -70,7 +70,7 @@ class TelegramService:
                     continue
                 logger.error(f"❌ All {max_retries} attempts timed out")
                 return False
-                
+            
             except httpx.NetworkError as e:
                 logger.warning(f"🌐 Network error on attempt {attempt + 1}: {str(e)}")
                 if attempt < max_retries - 1:
@@ -78,7 +78,7 @@ class TelegramService:
                     continue
                 logger.error(f"❌ Network error after {max_retries} attempts")
                 return False
-                
+            
             except Exception as e:
                 logger.error(f"❌ Unexpected error sending telegram: {str(e)}", exc_info=True)
                 return False
@@ -89,25 +89,43 @@ class TelegramService:
         self,
         vehicle: Vehicle,
         report: P2HReport,
-        status: InspectionStatus
+        status: InspectionStatus,
+        problem_items: Optional[List[dict]] = None,
+        user_name: Optional[str] = None
     ) -> str:
-        """Format pesan untuk laporan P2H yang bermasalah (Abnormal/Warning)"""
+        """
+        Format pesan untuk laporan P2H yang bermasalah (Abnormal/Warning).
+        
+        problem_items ({item_name, status, keterangan}) dan user_name bisa
+        diberikan langsung oleh caller agar pesan dapat disusun sebelum
+        commit tanpa lazy-load report.details / report.user.
+        """
         status_emoji = "❌" if status == InspectionStatus.ABNORMAL else "⚠️"
         status_text = "ABNORMAL (STOP OPERASI)" if status == InspectionStatus.ABNORMAL else "WARNING (PERLU PERBAIKAN)"
         
+        if problem_items is None:
+            problem_items = [
+                {
+                    "item_name": detail.checklist_item.item_name if detail.checklist_item else "Item tidak diketahui",
+                    "status": detail.status,
+                    "keterangan": detail.keterangan
+                }
+                for detail in report.details
+                if detail.status in [InspectionStatus.ABNORMAL, InspectionStatus.WARNING]
+            ]
+        if user_name is None:
+            user_name = report.user.full_name if report.user else 'System'
+        
         # Build detail items yang bermasalah
-        problem_items = []
-        for detail in report.details:
-            if detail.status in [InspectionStatus.ABNORMAL, InspectionStatus.WARNING]:
-                # Get checklist item name
-                item_name = detail.checklist_item.item_name if detail.checklist_item else "Item tidak diketahui"
-                item_status = "❌ ABNORMAL" if detail.status == InspectionStatus.ABNORMAL else "⚠️ WARNING"
-                keterangan = detail.keterangan or "Tidak ada keterangan"
-                
-                problem_items.append(f"• <b>{item_name}</b>\n  Status: {item_status}\n  Keterangan: {keterangan}")
+        problem_lines = []
+        for item in problem_items:
+            item_status = "❌ ABNORMAL" if item["status"] == InspectionStatus.ABNORMAL else "⚠️ WARNING"
+            keterangan = item["keterangan"] or "Tidak ada keterangan"
+            
+            problem_lines.append(f"• <b>{item['item_name']}</b>\n  Status: {item_status}\n  Keterangan: {keterangan}")
         
         # Format list of problem items
-        items_text = "\n\n".join(problem_items) if problem_items else "Tidak ada detail item"
+        items_text = "\n\n".join(problem_lines) if problem_lines else "Tidak ada detail item"
         
         message = f"""
 {status_emoji} <b>P2H ALERT: {status_text}</b>
@@ -120,7 +138,7 @@ class TelegramService:
 <b>Tanggal:</b> {report.submission_date.strftime('%d %b %Y')}
 <b>Waktu:</b> {report.submission_time.strftime('%H:%M')} WITA
 <b>Shift:</b> {report.shift_number}
-<b>User:</b> {report.user.full_name if report.user else 'System'}
+<b>User:</b> {user_name}
 
 <b>📝 Status Akhir:</b> {status.value.upper()}
 
@@ -151,7 +169,7 @@ Harap segera melakukan pengecekan unit di workshop terdekat.
         else:
             urgency = "🟡 <b>PERINGATAN</b>"
             emoji = "⚠️"
-
+        
         message = f"""
 {emoji} <b>EXPIRY ALERT: {expiry_type}</b>
 ━━━━━━━━━━━━━━━━━━━━
@@ -172,61 +190,49 @@ Harap segera memproses perpanjangan dokumen agar operasional tidak terganggu.
         """
         return message.strip()
     
-    async def send_p2h_notification(
+    def enqueue_p2h_notification(
         self,
         db: Session,
         vehicle: Vehicle,
         report: P2HReport,
-        status: InspectionStatus
+        status: InspectionStatus,
+        problem_items: Optional[List[dict]] = None,
+        user_name: Optional[str] = None
     ) -> Optional[TelegramNotification]:
-        """Kirim notifikasi P2H dan catat di tabel telegram_notifications"""
+        """
+        Tulis notifikasi P2H ke outbox (telegram_notifications).
         
+        Tidak melakukan commit dan tidak mengirim: baris ikut tersimpan di
+        transaksi laporan, lalu dikirim oleh notification_dispatcher.
+        """
         if status == InspectionStatus.NORMAL:
             return None
-            
+        
         notification_type = (
             NotificationType.P2H_ABNORMAL 
             if status == InspectionStatus.ABNORMAL 
             else NotificationType.P2H_WARNING
         )
         
-        message = self.format_p2h_notification(vehicle, report, status)
-        
-        # Simpan log ke DB
         notification = TelegramNotification(
             notification_type=notification_type,
             vehicle_id=vehicle.id,
             report_id=report.id,
-            message=message,
+            message=self.format_p2h_notification(vehicle, report, status, problem_items, user_name),
             is_sent=False
         )
-        
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
-        
-        # Kirim
-        success = await self.send_message(message)
-        
-        # Update status kirim
-        notification.is_sent = success
-        if success:
-            notification.sent_at = datetime.utcnow()
-        else:
-            notification.error_message = "Gagal terhubung ke Telegram API"
-        
-        db.commit()
         return notification
     
-    async def send_expiry_notification(
+    def enqueue_expiry_notification(
         self,
         db: Session,
         vehicle: Vehicle,
         expiry_type: str,
         expiry_date: datetime,
         days_remaining: int
-    ) -> Optional[TelegramNotification]:
-        """Kirim notifikasi Expired dan catat di database"""
+    ) -> TelegramNotification:
+        """Tulis notifikasi Expired ke outbox (tanpa commit, dikirim oleh dispatcher)"""
         
         notification_type = (
             NotificationType.STNK_EXPIRY 
@@ -244,22 +250,9 @@ Harap segera memproses perpanjangan dokumen agar operasional tidak terganggu.
             message=message,
             is_sent=False
         )
-        
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
-        
-        success = await self.send_message(message)
-        
-        notification.is_sent = success
-        if success:
-            notification.sent_at = datetime.utcnow()
-        else:
-            notification.error_message = "Gagal kirim alert expired"
-            
-        db.commit()
         return notification
-
+    
     async def close(self):
         """Close httpx client gracefully"""
         if self._client is not None:
@@ -0,0 +1,153 @@
+"""
+In-process TTL Cache
+Cache sederhana (per worker) dengan TTL, ukuran maksimum (LRU) dan
+counter hit/miss. Digunakan untuk hasil agregat dashboard yang sering
+di-poll bersamaan oleh beberapa admin monitor.
+"""
+
+import copy
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.constants import CacheSettings
+
+
+class TTLCache:
+    """
+    Thread-safe TTL + LRU cache.
+    
+    - Entry kadaluarsa setelah `ttl` detik
+    - Jika penuh, entry yang paling lama tidak dipakai dibuang
+    - Nilai disalin (deepcopy) saat disimpan dan dibaca agar caller
+      tidak bisa mengubah isi cache secara tidak sengaja
+    """
+    
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Naik setiap clear(); hasil yang dihitung sebelum invalidasi tidak disimpan
+        self.generation = 0
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for key"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return False, None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, copy.deepcopy(value)
+    
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Store value under key (skipped if cache was cleared since `generation`)"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Evict all entries (dipanggil setelah ada perubahan data)"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+            self.generation += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total * 100, 2) if total > 0 else 0,
+                "invalidations": self.invalidations
+            }
+
+
+def _freeze(value: Any) -> Hashable:
+    """Convert list/dict arguments into hashable tuples for cache keys"""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        # Urut berdasarkan str(key): key Enum (mis. ShiftType) tidak bisa dibandingkan
+        return tuple(sorted(((k, _freeze(v)) for k, v in value.items()), key=lambda item: str(item[0])))
+    return value
+
+
+def cached(cache: TTLCache) -> Callable:
+    """
+    Decorator untuk method repository/service dengan signature (self, db, ...).
+    
+    Key cache = nama method + argumen filter (tanpa self dan db), misalnya
+    (start_date, end_date, vehicle_type, year). Mendukung method biasa
+    maupun coroutine (async def).
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(self, db, *args, **kwargs):
+                key = (func.__qualname__, _freeze(args), _freeze(kwargs))
+                found, value = cache.get(key)
+                if found:
+                    return value
+                
+                generation = cache.generation
+                value = await func(self, db, *args, **kwargs)
+                cache.set(key, value, generation)
+                return value
+            
+            return async_wrapper
+        
+        @wraps(func)
+        def wrapper(self, db, *args, **kwargs):
+            key = (func.__qualname__, _freeze(args), _freeze(kwargs))
+            found, value = cache.get(key)
+            if found:
+                return value
+            
+            generation = cache.generation
+            value = func(self, db, *args, **kwargs)
+            cache.set(key, value, generation)
+            return value
+        
+        return wrapper
+    
+    return decorator
+
+
+# Cache untuk endpoint /dashboard/* - di-invalidate saat submit P2H
+# dan saat data kendaraan berubah
+dashboard_cache = TTLCache(
+    ttl=CacheSettings.DASHBOARD_TTL,
+    max_size=CacheSettings.DASHBOARD_MAX_ENTRIES
+)
+
+# Cache form checklist (JSON ter-serialisasi per tipe kendaraan & shift) -
+# di-invalidate (generation naik) saat checklist ditambah/diubah/dihapus
+checklist_cache = TTLCache(
+    ttl=CacheSettings.CHECKLIST_TTL,
+    max_size=CacheSettings.CHECKLIST_MAX_ENTRIES
+)
@@ -7,17 +7,33 @@ def get_current_datetime() -> datetime:
     tz = pytz.timezone(settings.TIMEZONE)
     return datetime.now(tz)
 
+def to_local_datetime(value: datetime) -> datetime:
+    """
+    Konversi datetime ke timezone Asia/Makassar (WITA).
+    Datetime tanpa timezone (naive) dianggap sudah dalam WITA.
+    """
+    tz = pytz.timezone(settings.TIMEZONE)
+    if value.tzinfo is None:
+        return tz.localize(value)
+    return value.astimezone(tz)
+
+def get_date_shift(value: datetime) -> date:
+    """
+    Tanggal operasional shift (reset jam 05:00) untuk waktu WITA tertentu.
+    Jika jam < 05:00 pagi, maka dianggap masih tanggal hari sebelumnya.
+    """
+    # Jika jam antara 00:00 sampai 04:59
+    if value.hour < 5:
+        return (value - timedelta(days=1)).date()
+    return value.date()
+
 def get_current_date_shift() -> date:
     """
     [LOGIKA OPERASIONAL SHIFT - Kuning, Long Shift] 
     Reset jam 05:00 pagi.
     Jika waktu < 05:00 pagi, maka dianggap masih tanggal hari sebelumnya.
     """
-    now = get_current_datetime()
-    # Jika jam sekarang antara 00:00 sampai 04:59
-    if now.hour < 5:
-        return (now - timedelta(days=1)).date()
-    return now.date()
+    return get_date_shift(get_current_datetime())
 
 def get_current_date_non_shift() -> date:
     """
@@ -0,0 +1,47 @@
+"""
+HTTP Cache Utility Functions
+ETag / If-None-Match untuk response yang jarang berubah
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong ETag dari isi response (sama di semua worker untuk isi yang sama).
+    
+    Args:
+        body: Serialized response body
+    
+    Returns:
+        Quoted ETag value, e.g. "\"3f2a...\""
+    """
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Cek header If-None-Match terhadap ETag (mendukung daftar, W/ dan *).
+    
+    Args:
+        if_none_match: Raw If-None-Match header value
+        etag: Current quoted ETag
+    
+    Returns:
+        True jika client sudah memiliki versi terbaru (balas 304)
+    """
+    if not if_none_match:
+        return False
+    
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Response 304 tanpa body (header cache tetap dikirim)"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
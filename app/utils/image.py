@@ -0,0 +1,62 @@
+"""
+Image Utility Functions
+Dijalankan di process pool (photo_service) - jangan import modul app lain di sini
+agar worker process tetap ringan.
+"""
+
+import warnings
+from typing import Tuple
+
+from PIL import Image, ImageOps
+
+
+def make_thumbnail(
+    src_path: str,
+    dst_path: str,
+    max_size: int,
+    quality: int,
+    max_pixels: int
+) -> Tuple[str, int, int]:
+    """
+    Buat thumbnail JPEG dari foto (sekaligus validasi bahwa file benar gambar).
+    
+    JPEG di-decode langsung pada skala kecil (Image.draft) sehingga foto HP
+    4-8 MB tidak perlu di-decode penuh. Gambar di atas max_pixels ditolak
+    sebelum di-decode: header PNG kecil bisa mengaku 20000x20000, dan Pillow
+    hanya memberi warning (lalu decode penuh) sampai 2x MAX_IMAGE_PIXELS.
+    
+    Args:
+        src_path: Path foto asli
+        dst_path: Path tujuan thumbnail (.jpg)
+        max_size: Sisi terpanjang thumbnail (px)
+        quality: Kualitas JPEG thumbnail
+        max_pixels: Resolusi maksimum (lebar x tinggi) foto asli
+    
+    Returns:
+        (format asli, lebar asli, tinggi asli)
+    
+    Raises:
+        PIL.UnidentifiedImageError / OSError: File bukan gambar yang valid
+        PIL.Image.DecompressionBombError: Resolusi melebihi max_pixels
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        try:
+            with Image.open(src_path) as img:
+                original_format = img.format
+                width, height = img.size
+                
+                if original_format == "JPEG":
+                    img.draft("RGB", (max_size, max_size))
+                
+                thumb = ImageOps.exif_transpose(img)
+                thumb.thumbnail((max_size, max_size))
+                if thumb.mode != "RGB":
+                    thumb = thumb.convert("RGB")
+                thumb.save(dst_path, "JPEG", quality=quality, optimize=True)
+        except Image.DecompressionBombWarning as e:
+            raise Image.DecompressionBombError(str(e))
+    
+    return original_format, width, height
@@ -0,0 +1,98 @@
+"""
+Cursor Pagination Utility Functions
+Encode/decode cursor opaque untuk keyset pagination (tanpa OFFSET)
+"""
+
+import base64
+import json
+from datetime import date, time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+# Parser key cursor laporan P2H: (submission_date, submission_time, id)
+REPORT_CURSOR_PARSERS = (date.fromisoformat, time.fromisoformat, UUID)
+
+# Parser key cursor kendaraan: (coalesce(no_lambung, ''), id)
+VEHICLE_CURSOR_PARSERS = (str, UUID)
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode nilai key baris terakhir menjadi cursor opaque.
+    
+    Contoh:
+        encode_cursor(date(2026, 1, 5), time(7, 30), uuid) -> "WyIyMDI2LTAx..."
+    
+    None di-encode sebagai null (bukan string "None") dan di-decode kembali
+    menjadi None.
+    
+    Args:
+        values: Key values (date, time, UUID, str, None, ...) in sort order
+    
+    Returns:
+        URL-safe base64 string
+    """
+    raw = json.dumps([
+        None if v is None else v.isoformat() if hasattr(v, "isoformat") else str(v)
+        for v in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[str], Any]) -> Tuple[Any, ...]:
+    """
+    Decode cursor menjadi tuple nilai key.
+    
+    Args:
+        cursor: Cursor dari payload `next_cursor`
+        parsers: One parser per key value (e.g. date.fromisoformat, UUID)
+    
+    Returns:
+        Tuple of parsed key values
+    
+    Raises:
+        ValueError: Jika cursor tidak valid
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError
+        return tuple(
+            None if value is None else parse(value)
+            for parse, value in zip(parsers, values)
+        )
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Cursor tidak valid")
+
+
+def build_page(
+    rows: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], Sequence[Any]]
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Potong hasil query (limit + 1 baris) menjadi satu halaman + next_cursor.
+    
+    Args:
+        rows: Rows fetched with limit + 1
+        limit: Page size
+        key: Function returning the key values of a row
+    
+    Returns:
+        (items, next_cursor) - next_cursor None jika halaman terakhir
+    """
+    items = list(rows[:limit])
+    if len(rows) > limit and items:
+        return items, encode_cursor(*key(items[-1]))
+    return items, None
+
+
+def report_key(report: Any) -> Tuple[Any, ...]:
+    """Keyset values of a P2H report row"""
+    return (report.submission_date, report.submission_time, report.id)
+
+
+def vehicle_key(vehicle: Any) -> Tuple[Any, ...]:
+    """Keyset values of a vehicle row (sama dengan vehicle_repository.vehicle_keyset)"""
+    return (vehicle.no_lambung or "", vehicle.id)
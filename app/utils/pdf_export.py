@@ -0,0 +1,88 @@
+"""
+PDF Export Utility Functions
+Dijalankan di process pool (export_service) - jangan import modul app lain di sini
+agar worker process tetap ringan.
+"""
+
+from typing import List, Optional, Sequence
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from pypdf import PdfWriter
+
+
+def render_pdf_chunk(
+    dst_path: str,
+    headers: Sequence[str],
+    rows: List[list],
+    col_widths: Sequence[float],
+    header_color: str,
+    body_font_size: int = 8,
+    title: Optional[str] = None
+) -> None:
+    """
+    Render satu potongan baris export sebagai PDF landscape (satu Table).
+    
+    Baris header diulang di setiap halaman. Judul hanya dirender jika
+    diberikan (potongan pertama).
+    
+    Args:
+        dst_path: Path tujuan PDF
+        headers: Judul kolom
+        rows: Nilai baris yang sudah diformat
+        col_widths: Lebar kolom dalam inch
+        header_color: Warna judul & background header (hex)
+        body_font_size: Ukuran font baris data
+        title: Judul dokumen, atau None
+    """
+    doc = SimpleDocTemplate(dst_path, pagesize=landscape(letter))
+    elements = []
+    
+    if title:
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.HexColor(header_color),
+            spaceAfter=12,
+            alignment=1  # Center
+        )
+        elements.append(Paragraph(title, title_style))
+        elements.append(Spacer(1, 0.2*inch))
+    
+    table = Table([list(headers)] + rows, colWidths=[width*inch for width in col_widths], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('FONTSIZE', (0, 1), (-1, -1), body_font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')])
+    ]))
+    
+    elements.append(table)
+    doc.build(elements)
+
+
+def merge_pdfs(src_paths: Sequence[str], dst_path: str) -> None:
+    """
+    Gabungkan beberapa PDF (berurutan) menjadi satu file.
+    
+    Args:
+        src_paths: Path PDF potongan, sesuai urutan halaman
+        dst_path: Path PDF hasil
+    """
+    writer = PdfWriter()
+    for path in src_paths:
+        writer.append(path)
+    with open(dst_path, "wb") as f:
+        writer.write(f)
+    writer.close()
@@ -0,0 +1,84 @@
+"""
+Photo Storage - Penyimpanan foto bukti P2H (content-addressed)
+
+Foto disimpan dengan key berbasis hash isi (sha256), sehingga foto yang sama
+diupload berkali-kali (retry dari HP) hanya tersimpan sekali dan URL-nya
+tidak pernah berubah isi (aman di-cache lama).
+
+LocalPhotoStore dipakai default; object store (S3/MinIO) cukup
+mengimplementasikan PhotoStore.
+"""
+
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+
+
+class PhotoStore(ABC):
+    """
+    Interface penyimpanan foto.
+    
+    Semua method sinkron (I/O blocking); dari handler async panggil lewat
+    asyncio.to_thread.
+    """
+    
+    def new_temp_path(self, suffix: str = "") -> str:
+        """Path file sementara untuk menulis upload yang sedang di-stream"""
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        return path
+    
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """True jika key sudah tersimpan di store"""
+    
+    @abstractmethod
+    def put_file(self, src_path: str, key: str) -> None:
+        """Pindahkan file sementara ke store dengan key tertentu"""
+    
+    def local_path(self, key: str) -> Optional[Path]:
+        """Path lokal untuk FileResponse (None jika store bukan disk lokal)"""
+        return None
+
+
+class LocalPhotoStore(PhotoStore):
+    """Foto di disk lokal / volume: <root>/<2 karakter awal hash>/<key>"""
+    
+    def __init__(self, root: str):
+        self.root = Path(root)
+    
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+    
+    def new_temp_path(self, suffix: str = "") -> str:
+        # Di filesystem yang sama dengan store agar put_file cukup rename
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=tmp_dir)
+        os.close(fd)
+        return path
+    
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+    
+    def put_file(self, src_path: str, key: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.is_file():
+            # Upload paralel dengan isi sama sudah lebih dulu tersimpan
+            os.remove(src_path)
+            return
+        shutil.move(src_path, path)
+    
+    def local_path(self, key: str) -> Optional[Path]:
+        path = self._path(key)
+        return path if path.is_file() else None
+
+
+# Singleton instance
+photo_store: PhotoStore = LocalPhotoStore(settings.PHOTO_STORAGE_DIR)
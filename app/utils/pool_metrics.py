@@ -0,0 +1,155 @@
+"""
+Connection Pool Metrics
+Telemetri pool koneksi database (per worker): latency checkout, jumlah
+koneksi yang sedang dipakai dan overflow, beserta puncaknya sejak start.
+Dipakai untuk menyesuaikan DB_POOL_SIZE / DB_MAX_OVERFLOW terhadap
+max_connections Postgres saat API berjalan dengan beberapa worker.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.constants import DatabaseSettings
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters for one connection pool.
+    
+    - Latency checkout diukur di TimedQueuePool (tidak ada event pool
+      "sebelum checkout" di SQLAlchemy)
+    - Puncak in-use dan overflow dicatat lewat event listener checkout;
+      angka terkini dibaca langsung dari pool saat stats()
+    """
+    
+    def __init__(self, name: str, window: int = DatabaseSettings.METRICS_WINDOW):
+        self.name = name
+        self._lock = threading.Lock()
+        self._waits_ms: "deque[float]" = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.max_wait_ms = 0.0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+        self.pool: Pool = None
+    
+    def attach(self, pool: Pool) -> None:
+        """Register the checkout listener on the pool"""
+        self.pool = pool
+        event.listen(pool, "checkout", self._on_checkout)
+    
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """Catat lama menunggu koneksi dari pool (dipanggil TimedQueuePool)"""
+        wait_ms = seconds * 1000
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self._waits_ms.append(wait_ms)
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            if wait_ms >= DatabaseSettings.SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+    
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        """Event pool: koneksi diberikan ke caller"""
+        in_use = self.pool.checkedout()
+        overflow = max(self.pool.overflow(), 0)
+        with self._lock:
+            self.checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, in_use)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the pool state and checkout latency"""
+        with self._lock:
+            waits = sorted(self._waits_ms)
+            result = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "checkout_wait_ms": {
+                    "avg": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                    "p95": round(waits[max(int(len(waits) * 0.95) - 1, 0)], 2) if waits else 0.0,
+                    "max": round(self.max_wait_ms, 2),
+                    "samples": len(waits),
+                },
+                "peak_in_use": self.peak_in_use,
+                "peak_overflow": self.peak_overflow,
+            }
+        
+        if self.pool is not None:
+            result.update({
+                "pool_size": self.pool.size(),
+                "max_overflow": self.pool._max_overflow,
+                "in_use": self.pool.checkedout(),
+                "idle": self.pool.checkedin(),
+                "overflow": max(self.pool.overflow(), 0),
+            })
+        return result
+
+
+class TimedPoolMixin:
+    """Ukur waktu _do_get (menunggu koneksi bebas / membuka koneksi baru)"""
+    
+    metrics: PoolMetrics = None
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+    
+    def recreate(self):
+        # Pool baru (mis. setelah dispose/invalidate) tetap memakai metrics yang sama
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    """QueuePool (engine sync) dengan pengukuran latency checkout"""
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool (engine asyncpg) dengan pengukuran latency checkout"""
+
+
+def instrument_pool(pool: Pool, name: str) -> PoolMetrics:
+    """
+    Pasang metrics pada pool sebuah engine.
+    
+    Args:
+        pool: engine.pool (TimedQueuePool / TimedAsyncAdaptedQueuePool)
+        name: Label pool di output metrics
+    
+    Returns:
+        PoolMetrics yang terdaftar
+    """
+    metrics = PoolMetrics(name)
+    metrics.attach(pool)
+    pool.metrics = metrics
+    pool_registry[name] = metrics
+    return metrics
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every instrumented pool (nama -> snapshot)"""
+    return {name: metrics.stats() for name, metrics in pool_registry.items()}
+
+
+# Pool yang sudah di-instrument, per nama engine
+pool_registry: Dict[str, PoolMetrics] = {}
@@ -0,0 +1,235 @@
+"""
+Benchmark suite for dashboard and P2H report endpoints.
+
+Mengukur latency (p50/p95/mean) dan jumlah query SQL per request untuk
+endpoint dashboard dan /p2h/reports, memakai FastAPI TestClient langsung
+terhadap database yang dikonfigurasi di .env (tanpa server uvicorn).
+
+Dengan --sizes, data sintetis dibuat ulang (scripts/generate_fleet_data.py)
+untuk setiap ukuran armada sehingga tren terhadap ukuran data terlihat.
+Hasil bisa disimpan (--output) dan dibandingkan dengan baseline (--baseline)
+untuk mendeteksi regresi performa.
+
+JANGAN dijalankan di database production (--sizes menghapus data sintetis).
+
+Usage:
+    python scripts/benchmark_dashboard.py                                   # Data yang ada sekarang
+    python scripts/benchmark_dashboard.py --sizes 100,1000,5000 --days 30 --output bench.json
+    python scripts/benchmark_dashboard.py --baseline bench.json --threshold 25
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import anyio
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.database import async_engine
+from app.dependencies import get_current_user
+from app.models.user import UserRole
+from app.utils.cache import dashboard_cache
+from app.utils.datetime import get_current_datetime
+
+from generate_fleet_data import generate, purge_synthetic_data
+
+CARD_TYPES = [
+    "total_vehicles",
+    "total_normal",
+    "total_abnormal",
+    "total_warning",
+    "total_completed",
+    "total_pending",
+]
+
+
+class QueryCounter:
+    """Hitung statement SQL yang dieksekusi engine"""
+    
+    def __init__(self):
+        self.count = 0
+    
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def benchmark_user():
+    """User palsu untuk autentikasi (tanpa query user ke database)"""
+    return SimpleNamespace(
+        id=None,
+        full_name="Benchmark",
+        role=UserRole.superadmin,
+        is_active=True
+    )
+
+
+def build_endpoints(client: TestClient) -> Dict[str, str]:
+    """Daftar endpoint yang diukur (nama -> URL)"""
+    year = get_current_datetime().year
+    endpoints = {
+        "dashboard.statistics": "/dashboard/statistics",
+        "dashboard.monthly_reports": f"/dashboard/monthly-reports?year={year}",
+    }
+    for card in CARD_TYPES:
+        endpoints[f"dashboard.card_details.{card}"] = f"/dashboard/card-details/{card}?limit=50"
+    
+    endpoints["p2h.reports"] = "/p2h/reports?limit=100"
+    
+    # Halaman kedua via cursor (mengukur keyset pagination, bukan OFFSET)
+    first_page = client.get("/p2h/reports?limit=100")
+    if first_page.status_code == 200:
+        next_cursor = first_page.json()["payload"].get("next_cursor")
+        if next_cursor:
+            endpoints["p2h.reports.page_2"] = f"/p2h/reports?limit=100&cursor={next_cursor}"
+    
+    return endpoints
+
+
+def run_suite(client: TestClient, counter: QueryCounter, repeat: int, cached: bool) -> Dict[str, dict]:
+    """Jalankan semua endpoint `repeat` kali, return statistik per endpoint"""
+    results = {}
+    
+    for name, url in build_endpoints(client).items():
+        latencies: List[float] = []
+        query_counts: List[int] = []
+        status_code = None
+        
+        # Warm-up (koneksi pool, import lazy, plan cache)
+        client.get(url)
+        
+        for _ in range(repeat):
+            if not cached:
+                dashboard_cache.clear()
+            counter.count = 0
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+            query_counts.append(counter.count)
+            status_code = response.status_code
+        
+        latencies.sort()
+        results[name] = {
+            "status": status_code,
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)], 2),
+            "mean_ms": round(statistics.mean(latencies), 2),
+            "queries": max(query_counts),
+        }
+    
+    return results
+
+
+def print_results(label: str, results: Dict[str, dict]) -> None:
+    """Tampilkan hasil satu ukuran data sebagai tabel"""
+    print(f"\n📊 {label}")
+    print(f"   {'endpoint':<42} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9} {'queries':>8}")
+    for name, r in results.items():
+        print(
+            f"   {name:<42} {r['status']:>6} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+            f"{r['mean_ms']:>9} {r['queries']:>8}"
+        )
+
+
+def compare_with_baseline(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> int:
+    """
+    Bandingkan hasil dengan baseline.
+    
+    Regresi: p50 naik lebih dari `threshold` persen, atau jumlah query naik.
+    
+    Returns:
+        Jumlah regresi yang ditemukan
+    """
+    regressions = 0
+    for label, endpoints in current.items():
+        for name, r in endpoints.items():
+            base = baseline.get(label, {}).get(name)
+            if not base:
+                continue
+            
+            if r["queries"] > base["queries"]:
+                regressions += 1
+                print(f"❌ {label} {name}: queries {base['queries']} -> {r['queries']}")
+            
+            if base["p50_ms"] > 0:
+                change = (r["p50_ms"] - base["p50_ms"]) / base["p50_ms"] * 100
+                if change > threshold:
+                    regressions += 1
+                    print(f"❌ {label} {name}: p50 {base['p50_ms']}ms -> {r['p50_ms']}ms (+{change:.0f}%)")
+    
+    return regressions
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark dashboard & P2H report endpoints")
+    parser.add_argument("--sizes", type=str, default=None, help="Ukuran armada, misal 100,1000,5000 (generate ulang data sintetis)")
+    parser.add_argument("--days", type=int, default=30, help="Hari riwayat per ukuran (dengan --sizes)")
+    parser.add_argument("--repeat", type=int, default=20, help="Jumlah request per endpoint")
+    parser.add_argument("--cached", action="store_true", help="Jangan clear dashboard cache antar request")
+    parser.add_argument("--output", type=str, default=None, help="Simpan hasil ke file JSON")
+    parser.add_argument("--baseline", type=str, default=None, help="File JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Batas kenaikan p50 (persen) sebelum dianggap regresi")
+    args = parser.parse_args()
+    
+    # Router dashboard & P2H memakai async engine; event cursor ada di sync_engine-nya
+    engine = async_engine.sync_engine
+    
+    # Log SQL (echo di development) akan mendominasi waktu request
+    engine.echo = False
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    app.dependency_overrides[get_current_user] = benchmark_user
+    
+    # TestClient tanpa context manager: lifespan (migrasi & scheduler) tidak dijalankan.
+    # Satu event loop (portal) untuk semua request, karena koneksi asyncpg di
+    # pool terikat pada loop yang membukanya
+    client = TestClient(app)
+    portal_cm = anyio.from_thread.start_blocking_portal()
+    client.portal = portal_cm.__enter__()
+    all_results: Dict[str, Dict[str, dict]] = {}
+    
+    try:
+        if args.sizes:
+            for size in [int(s) for s in args.sizes.split(",")]:
+                label = f"vehicles={size} days={args.days}"
+                print(f"🚀 Preparing {label}...")
+                purge_synthetic_data()
+                generate(vehicles=size, users=max(size // 5, 10), days=args.days)
+                all_results[label] = run_suite(client, counter, args.repeat, args.cached)
+                print_results(label, all_results[label])
+        else:
+            label = "current database"
+            all_results[label] = run_suite(client, counter, args.repeat, args.cached)
+            print_results(label, all_results[label])
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+        app.dependency_overrides.clear()
+        client.portal.call(async_engine.dispose)
+        portal_cm.__exit__(None, None, None)
+        client.portal = None
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(all_results, indent=2))
+        print(f"\n💾 Results saved to {args.output}")
+    
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_with_baseline(all_results, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {regressions} regresi performa terdeteksi")
+            sys.exit(1)
+        print("\n✅ Tidak ada regresi dibanding baseline")
+
+
+if __name__ == "__main__":
+    main()
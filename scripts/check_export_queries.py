@@ -0,0 +1,145 @@
+"""
+Script to verify that every export runs as a single SELECT (no N+1).
+
+Menjalankan export users, vehicles dan laporan P2H lewat export_service
+(CSV, Excel, dan PDF untuk laporan P2H) sambil menghitung statement SQL yang
+dikirim engine. Setiap export harus tepat satu SELECT berapapun jumlah
+barisnya; lazy load relasi per baris (vehicle, user, department, position)
+akan langsung terlihat sebagai query tambahan. Jumlah baris juga dicocokkan
+dengan COUNT(*) dari query yang sama.
+
+Usage:
+    python scripts/check_export_queries.py             # Cek semua export
+    python scripts/check_export_queries.py --verbose   # Tampilkan SQL yang dijalankan
+
+Exit code 1 jika ada export yang menjalankan lebih dari satu query.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, func, select
+from openpyxl import load_workbook
+from pypdf import PdfReader
+
+from app.database import SessionLocal, engine
+from app.repositories.export_repository import export_repository
+from app.services.export_service import (
+    export_service,
+    USER_EXPORT_COLUMNS,
+    VEHICLE_EXPORT_COLUMNS,
+    REPORT_EXPORT_COLUMNS,
+)
+
+EXPECTED_QUERIES = 1
+
+
+class QueryCounter:
+    """Catat statement yang dikirim engine selama blok `with`"""
+    
+    def __init__(self, bind):
+        self.bind = bind
+        self.statements = []
+    
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._before_execute)
+        return self
+    
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._before_execute)
+
+
+def count_csv_rows(query, columns) -> int:
+    chunks = b"".join(export_service.stream_csv(query, columns))
+    return chunks.decode("utf-8").count("\n") - 1
+
+
+def count_xlsx_rows(query, columns) -> int:
+    path = export_service.write_xlsx(query, columns, "Check", "#000000")
+    try:
+        workbook = load_workbook(path, read_only=True)
+        rows = workbook.active.max_row - 1
+        workbook.close()
+        return rows
+    finally:
+        Path(path).unlink()
+
+
+def count_pdf_pages(query, columns) -> int:
+    path = export_service.write_pdf(query, columns, "Check", "#000000", [1] * len(columns))
+    try:
+        return len(PdfReader(path).pages)
+    finally:
+        Path(path).unlink()
+
+
+def build_cases():
+    """Return (name, query, columns, runner) for every checked export"""
+    users = export_repository.get_users_export_query()
+    vehicles = export_repository.get_vehicles_export_query()
+    reports = export_repository.get_reports_export_query()
+    
+    return [
+        ("users csv", users, USER_EXPORT_COLUMNS, count_csv_rows),
+        ("users excel", users, USER_EXPORT_COLUMNS, count_xlsx_rows),
+        ("vehicles csv", vehicles, VEHICLE_EXPORT_COLUMNS, count_csv_rows),
+        ("vehicles excel", vehicles, VEHICLE_EXPORT_COLUMNS, count_xlsx_rows),
+        ("p2h reports csv", reports, REPORT_EXPORT_COLUMNS, count_csv_rows),
+        ("p2h reports excel", reports, REPORT_EXPORT_COLUMNS, count_xlsx_rows),
+        ("p2h reports pdf", reports, REPORT_EXPORT_COLUMNS, count_pdf_pages),
+    ]
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Query count check for exports")
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan SQL yang dijalankan")
+    args = parser.parse_args()
+    
+    print("🔍 Checking export query counts...")
+    
+    failures = 0
+    try:
+        for name, query, columns, runner in build_cases():
+            with SessionLocal() as db:
+                expected_rows = db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+            
+            with QueryCounter(engine) as counter:
+                result = runner(query, columns)
+            
+            # PDF menghasilkan jumlah halaman, bukan baris
+            rows_ok = runner is count_pdf_pages or result == expected_rows
+            if len(counter.statements) == EXPECTED_QUERIES and rows_ok:
+                print(f"✅ {name}: {len(counter.statements)} query, {expected_rows} baris")
+            else:
+                failures += 1
+                print(
+                    f"❌ {name}: {len(counter.statements)} query (expected {EXPECTED_QUERIES}), "
+                    f"{result} hasil untuk {expected_rows} baris"
+                )
+            
+            if args.verbose:
+                for statement in counter.statements:
+                    print(f"   {statement}")
+    except Exception as e:
+        print(f"❌ Error running export: {str(e)}")
+        failures += 1
+    finally:
+        export_service.shutdown()
+    
+    if failures:
+        print(f"\n⚠️  {failures} export menjalankan query tambahan")
+        sys.exit(1)
+    
+    print("\n🎉 Semua export memakai satu query")
+
+
+if __name__ == "__main__":
+    main()
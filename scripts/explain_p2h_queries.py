@@ -0,0 +1,130 @@
+"""
+Script to verify that P2H report queries can use the submission_date indexes.
+
+Menjalankan EXPLAIN (FORMAT JSON) untuk query laporan P2H yang dibangun oleh
+repository dan memastikan planner memakai index scan (bukan Seq Scan) pada
+index yang diharapkan. Seq scan dimatikan (SET LOCAL enable_seqscan = off)
+supaya hasilnya tetap bermakna pada database development yang datanya kecil:
+jika predikat tidak sargable, planner tetap terpaksa melakukan Seq Scan.
+
+Usage:
+    python scripts/explain_p2h_queries.py             # Cek semua query
+    python scripts/explain_p2h_queries.py --verbose   # Tampilkan plan lengkap
+
+Exit code 1 jika ada query yang tidak memakai index yang diharapkan.
+"""
+
+import sys
+import json
+import uuid
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models.p2h import P2HReport, InspectionStatus
+from app.repositories.p2h_repository import p2h_repository
+
+INDEX_SCAN_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def collect_nodes(plan: dict) -> list:
+    """Flatten an EXPLAIN JSON plan tree into a list of nodes"""
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(collect_nodes(child))
+    return nodes
+
+
+def build_cases():
+    """Return (name, query, expected index names) for every checked query"""
+    end = date.today()
+    start = end - timedelta(days=30)
+    
+    return [
+        (
+            "reports by date range",
+            p2h_repository.get_reports_query(start_date=start, end_date=end),
+            {"ix_p2h_reports_submission_date", "ix_p2h_reports_submission_date_time_desc"},
+        ),
+        (
+            "reports on a single date",
+            p2h_repository.get_reports_query(start_date=end, end_date=end),
+            {"ix_p2h_reports_submission_date", "ix_p2h_reports_submission_date_time_desc"},
+        ),
+        (
+            "reports per vehicle in range",
+            p2h_repository.get_reports_query(start_date=start, end_date=end, vehicle_id=uuid.uuid4()),
+            {"ix_p2h_reports_vehicle_id_submission_date"},
+        ),
+        (
+            "reports per status in range",
+            p2h_repository.get_reports_query(start_date=start, end_date=end, status=InspectionStatus.ABNORMAL),
+            {"ix_p2h_reports_overall_status_submission_date"},
+        ),
+        (
+            "recent reports",
+            p2h_repository.get_reports_query().order_by(
+                P2HReport.submission_date.desc(),
+                P2HReport.submission_time.desc()
+            ).limit(10),
+            {"ix_p2h_reports_submission_date_time_desc"},
+        ),
+    ]
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="EXPLAIN check for P2H report queries")
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan plan lengkap")
+    args = parser.parse_args()
+    
+    print("🔍 Checking P2H report query plans...")
+    
+    db = SessionLocal()
+    failures = 0
+    try:
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        
+        for name, query, expected in build_cases():
+            sql = str(query.compile(
+                dialect=db.bind.dialect,
+                compile_kwargs={"literal_binds": True}
+            ))
+            result = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+            nodes = collect_nodes(plan)
+            
+            used = {n.get("Index Name") for n in nodes if n["Node Type"] in INDEX_SCAN_NODES}
+            seq_scans = [n for n in nodes if n["Node Type"] == "Seq Scan"]
+            
+            if used & expected and not seq_scans:
+                print(f"✅ {name}: {', '.join(sorted(used & expected))}")
+            else:
+                failures += 1
+                found = ", ".join(sorted(i for i in used if i)) or "Seq Scan"
+                print(f"❌ {name}: expected {' / '.join(sorted(expected))}, got {found}")
+            
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+    except Exception as e:
+        print(f"❌ Error running EXPLAIN: {str(e)}")
+        failures += 1
+    finally:
+        db.rollback()
+        db.close()
+    
+    if failures:
+        print(f"\n⚠️  {failures} query tidak memakai index yang diharapkan")
+        sys.exit(1)
+    
+    print("\n🎉 Semua query memakai index scan")
+
+
+if __name__ == "__main__":
+    main()
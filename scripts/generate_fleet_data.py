@@ -0,0 +1,397 @@
+"""
+Script to bulk-load a synthetic fleet for performance testing.
+
+Membuat N kendaraan, M user dan D hari riwayat P2H yang akurat terhadap
+aturan shift (SHIFT 3x, LONG_SHIFT 2x, NON_SHIFT 1x per tanggal operasional):
+p2h_reports, p2h_details dan p2h_daily_tracker dimuat dengan COPY, lalu
+rollup p2h_daily_stats dihitung ulang.
+
+Semua data sintetis ditandai prefix (no_lambung "SYN-", nomor HP "0899")
+sehingga bisa dihapus lagi dengan --purge tanpa menyentuh data asli.
+
+JANGAN dijalankan di database production.
+
+Usage:
+    python scripts/generate_fleet_data.py                                   # 500 unit, 100 user, 30 hari
+    python scripts/generate_fleet_data.py --vehicles 2000 --users 300 --days 90
+    python scripts/generate_fleet_data.py --purge                           # Hapus data sintetis
+"""
+
+import sys
+import io
+import csv
+import uuid
+import random
+import argparse
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+from app.models.checklist import ChecklistTemplate
+from app.models.vehicle import VehicleType, ShiftType, UnitKategori
+from app.models.p2h import InspectionStatus, FinalStatus
+from app.repositories.daily_stats_repository import daily_stats_repository
+from app.utils.password import hash_password
+from app.utils.datetime import get_current_date_shift
+from app.utils.vehicle_utils import normalize_hull_number
+
+VEHICLE_PREFIX = "SYN-"
+PHONE_PREFIX = "0899"
+CHECKLIST_SECTION = "SYNTHETIC"
+SYNTHETIC_PASSWORD = "synthetic123"
+
+# Distribusi tipe shift armada (kira-kira komposisi unit kuning/hijau/long shift)
+SHIFT_TYPE_WEIGHTS = {
+    ShiftType.SHIFT: 0.6,
+    ShiftType.LONG_SHIFT: 0.15,
+    ShiftType.NON_SHIFT: 0.25,
+}
+
+# Shift yang wajib diisi per tipe dan jendela jam submit (jam mulai, jam akhir)
+SHIFT_WINDOWS = {
+    ShiftType.SHIFT: {1: (6, 8), 2: (14, 16), 3: (22, 24)},
+    ShiftType.LONG_SHIFT: {1: (6, 8), 2: (18, 20)},
+    ShiftType.NON_SHIFT: {1: (6, 10)},
+}
+
+COPY_BATCH_DAYS = 7  # Jumlah hari per batch COPY (membatasi memori buffer CSV)
+
+
+def db_enum(member) -> str:
+    """
+    Representasi enum di database.
+    
+    VehicleType disimpan sebagai value (values_callable), enum lain
+    disimpan sebagai name oleh SQLAlchemy.
+    """
+    return member.value if isinstance(member, VehicleType) else member.name
+
+
+def copy_rows(cursor, table: str, columns: List[str], rows: List[list]) -> None:
+    """Stream rows into a table with COPY ... FROM STDIN (CSV)"""
+    if not rows:
+        return
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if v is None else v for v in row])
+    buffer.seek(0)
+    
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '')",
+        buffer
+    )
+
+
+def ensure_checklist_items(count: int) -> List[uuid.UUID]:
+    """Pastikan ada checklist template untuk p2h_details, buat yang sintetis jika kurang"""
+    db = SessionLocal()
+    try:
+        items = db.query(ChecklistTemplate.id).filter(
+            ChecklistTemplate.is_active == True
+        ).limit(count).all()
+        ids = [row.id for row in items]
+        
+        for order in range(len(ids), count):
+            item = ChecklistTemplate(
+                item_name=f"Item sintetis {order + 1}",
+                section_name=CHECKLIST_SECTION,
+                item_order=order + 1,
+                vehicle_tags=[vt.value for vt in VehicleType],
+                applicable_shifts=[],
+                is_active=True
+            )
+            db.add(item)
+            db.flush()
+            ids.append(item.id)
+        
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def purge_synthetic_data() -> None:
+    """Hapus semua data sintetis (urutan mengikuti foreign key)"""
+    vehicle_filter = f"SELECT id FROM vehicles WHERE no_lambung LIKE '{VEHICLE_PREFIX}%'"
+    statements = [
+        f"DELETE FROM p2h_daily_tracker WHERE vehicle_id IN ({vehicle_filter})",
+        f"DELETE FROM p2h_details WHERE report_id IN (SELECT id FROM p2h_reports WHERE vehicle_id IN ({vehicle_filter}))",
+        f"DELETE FROM telegram_notifications WHERE vehicle_id IN ({vehicle_filter})",
+        f"DELETE FROM p2h_reports WHERE vehicle_id IN ({vehicle_filter})",
+        f"DELETE FROM vehicles WHERE no_lambung LIKE '{VEHICLE_PREFIX}%'",
+        f"DELETE FROM users WHERE phone_number LIKE '{PHONE_PREFIX}%'",
+    ]
+    
+    with engine.begin() as conn:
+        for statement in statements:
+            result = conn.execute(text(statement))
+            print(f"🗑️  {statement.split(' WHERE')[0]}: {result.rowcount} rows")
+    
+    # Rollup harus mengikuti data laporan yang tersisa
+    db = SessionLocal()
+    try:
+        daily_stats_repository.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def pick_status(rng: random.Random, abnormal_rate: float, warning_rate: float) -> InspectionStatus:
+    """Pilih overall status laporan sesuai rasio"""
+    roll = rng.random()
+    if roll < abnormal_rate:
+        return InspectionStatus.ABNORMAL
+    if roll < abnormal_rate + warning_rate:
+        return InspectionStatus.WARNING
+    return InspectionStatus.NORMAL
+
+
+def generate(
+    vehicles: int,
+    users: int,
+    days: int,
+    details_per_report: int = 10,
+    compliance: float = 0.9,
+    abnormal_rate: float = 0.05,
+    warning_rate: float = 0.1,
+    seed: Optional[int] = 42,
+    end_date: Optional[date] = None
+) -> Dict[str, int]:
+    """
+    Generate synthetic fleet data.
+    
+    Args:
+        vehicles: Number of vehicles
+        users: Number of users (operators)
+        days: Number of operational days of history (ending at end_date)
+        details_per_report: Number of p2h_details per report
+        compliance: Probability that a required shift P2H is submitted
+        abnormal_rate: Fraction of ABNORMAL reports
+        warning_rate: Fraction of WARNING reports
+        seed: Random seed (None = random)
+        end_date: Last operational date (default: current shift date)
+    
+    Returns:
+        Row counts per table
+    """
+    rng = random.Random(seed)
+    end_date = end_date or get_current_date_shift()
+    start_date = end_date - timedelta(days=days - 1)
+    now = datetime.utcnow()
+    counts = {"users": 0, "vehicles": 0, "p2h_reports": 0, "p2h_details": 0, "p2h_daily_tracker": 0}
+    
+    checklist_ids = ensure_checklist_items(details_per_report)
+    password_hash = hash_password(SYNTHETIC_PASSWORD)
+    
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        
+        # Nomor urut lanjutan agar bisa dijalankan berulang tanpa bentrok unique key
+        cursor.execute(
+            "SELECT count(*) FROM vehicles WHERE no_lambung LIKE %s", (f"{VEHICLE_PREFIX}%",)
+        )
+        vehicle_offset = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT count(*) FROM users WHERE phone_number LIKE %s", (f"{PHONE_PREFIX}%",)
+        )
+        user_offset = cursor.fetchone()[0]
+        
+        # 1. Users
+        user_ids = [uuid.uuid4() for _ in range(users)]
+        copy_rows(
+            cursor, "users",
+            ["id", "full_name", "phone_number", "password_hash", "role",
+             "kategori_pengguna", "is_active", "created_at", "updated_at"],
+            [
+                [uid, f"Operator Sintetis {user_offset + i + 1}",
+                 f"{PHONE_PREFIX}{user_offset + i + 1:08d}", password_hash, "user",
+                 "IMM", True, now, now]
+                for i, uid in enumerate(user_ids)
+            ]
+        )
+        counts["users"] = users
+        
+        # 2. Vehicles
+        fleet = []
+        vehicle_rows = []
+        vehicle_types = list(VehicleType)
+        shift_types = list(SHIFT_TYPE_WEIGHTS)
+        shift_weights = list(SHIFT_TYPE_WEIGHTS.values())
+        for i in range(vehicles):
+            number = vehicle_offset + i + 1
+            vid = uuid.uuid4()
+            shift_type = rng.choices(shift_types, shift_weights)[0]
+            vehicle_type = rng.choice(vehicle_types)
+            kategori = UnitKategori.IMM if rng.random() < 0.8 else UnitKategori.TRAVEL
+            fleet.append((vid, shift_type))
+            no_lambung = f"{VEHICLE_PREFIX}{number:05d}"
+            vehicle_rows.append([
+                vid, no_lambung, normalize_hull_number(no_lambung),
+                "Kuning" if shift_type != ShiftType.NON_SHIFT else "Hijau",
+                f"KT {number} SY", db_enum(vehicle_type), "Sintetis",
+                db_enum(kategori), db_enum(shift_type), True, now, now
+            ])
+        copy_rows(
+            cursor, "vehicles",
+            ["id", "no_lambung", "no_lambung_normalized", "warna_no_lambung", "plat_nomor", "vehicle_type", "merk",
+             "kategori_unit", "shift_type", "is_active", "created_at", "updated_at"],
+            vehicle_rows
+        )
+        counts["vehicles"] = vehicles
+        raw.commit()
+        
+        # 3. Riwayat P2H per batch hari
+        for batch_start in range(0, days, COPY_BATCH_DAYS):
+            reports, details, trackers = [], [], []
+            
+            for day in range(batch_start, min(batch_start + COPY_BATCH_DAYS, days)):
+                op_date = start_date + timedelta(days=day)
+                
+                for vid, shift_type in fleet:
+                    shift_report_ids = {}
+                    
+                    for shift_number, (hour_start, hour_end) in SHIFT_WINDOWS[shift_type].items():
+                        if rng.random() >= compliance:
+                            continue
+                        
+                        report_id = uuid.uuid4()
+                        minute_of_window = rng.randrange((hour_end - hour_start) * 60)
+                        hour = (hour_start + minute_of_window // 60) % 24
+                        submission_time = time(hour, minute_of_window % 60, rng.randrange(60))
+                        status = pick_status(rng, abnormal_rate, warning_rate)
+                        
+                        reports.append([
+                            report_id, vid, rng.choice(user_ids), shift_number,
+                            rng.randrange(1000, 200000), db_enum(status),
+                            op_date, submission_time,
+                            datetime.combine(op_date, submission_time), now, False
+                        ])
+                        
+                        # Detail: item bermasalah sesuai overall status, sisanya normal
+                        for index, item_id in enumerate(checklist_ids):
+                            item_status = status if index == 0 else InspectionStatus.NORMAL
+                            details.append([
+                                uuid.uuid4(), report_id, item_id, db_enum(item_status),
+                                "Data sintetis" if item_status != InspectionStatus.NORMAL else None,
+                                False
+                            ])
+                        
+                        shift_report_ids[shift_number] = report_id
+                    
+                    required = len(SHIFT_WINDOWS[shift_type])
+                    done = len(shift_report_ids)
+                    if done == required:
+                        final_status = FinalStatus.GREEN
+                    elif done:
+                        final_status = FinalStatus.YELLOW
+                    else:
+                        final_status = FinalStatus.RED
+                    
+                    # Tracker hanya dibuat saat unit di-scan/submit (sama seperti aplikasi)
+                    if done:
+                        trackers.append([
+                            uuid.uuid4(), vid, op_date,
+                            1 in shift_report_ids, shift_report_ids.get(1),
+                            2 in shift_report_ids, shift_report_ids.get(2),
+                            3 in shift_report_ids, shift_report_ids.get(3),
+                            db_enum(final_status), done, now
+                        ])
+            
+            copy_rows(
+                cursor, "p2h_reports",
+                ["id", "vehicle_id", "user_id", "shift_number", "odometer", "overall_status",
+                 "submission_date", "submission_time", "created_at", "updated_at", "is_deleted"],
+                reports
+            )
+            copy_rows(
+                cursor, "p2h_details",
+                ["id", "report_id", "checklist_item_id", "status", "keterangan", "is_deleted"],
+                details
+            )
+            copy_rows(
+                cursor, "p2h_daily_tracker",
+                ["id", "vehicle_id", "date", "shift_1_done", "shift_1_report_id",
+                 "shift_2_done", "shift_2_report_id", "shift_3_done", "shift_3_report_id",
+                 "final_status", "submission_count", "updated_at"],
+                trackers
+            )
+            raw.commit()
+            
+            counts["p2h_reports"] += len(reports)
+            counts["p2h_details"] += len(details)
+            counts["p2h_daily_tracker"] += len(trackers)
+            print(f"   📦 Hari {batch_start + 1}-{min(batch_start + COPY_BATCH_DAYS, days)}: {len(reports)} laporan")
+        
+        cursor.execute("ANALYZE vehicles, users, p2h_reports, p2h_details, p2h_daily_tracker")
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    
+    # 4. Rollup dashboard untuk rentang yang baru dimuat
+    db = SessionLocal()
+    try:
+        daily_stats_repository.rebuild(db, start_date, end_date)
+        db.commit()
+    finally:
+        db.close()
+    
+    return counts
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Generate synthetic fleet data (COPY)")
+    parser.add_argument("--vehicles", type=int, default=500, help="Jumlah kendaraan")
+    parser.add_argument("--users", type=int, default=100, help="Jumlah user/operator")
+    parser.add_argument("--days", type=int, default=30, help="Jumlah hari riwayat P2H")
+    parser.add_argument("--details", type=int, default=10, help="Jumlah detail per laporan")
+    parser.add_argument("--compliance", type=float, default=0.9, help="Peluang shift wajib diisi (0-1)")
+    parser.add_argument("--abnormal-rate", type=float, default=0.05, help="Rasio laporan ABNORMAL")
+    parser.add_argument("--warning-rate", type=float, default=0.1, help="Rasio laporan WARNING")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--purge", action="store_true", help="Hapus data sintetis lalu keluar")
+    args = parser.parse_args()
+    
+    try:
+        if args.purge:
+            print("🧹 Removing synthetic fleet data...")
+            purge_synthetic_data()
+            print("✅ Synthetic data removed")
+            return
+        
+        print(f"🚀 Generating {args.vehicles} vehicles, {args.users} users, {args.days} days...")
+        started = datetime.now()
+        counts = generate(
+            vehicles=args.vehicles,
+            users=args.users,
+            days=args.days,
+            details_per_report=args.details,
+            compliance=args.compliance,
+            abnormal_rate=args.abnormal_rate,
+            warning_rate=args.warning_rate,
+            seed=args.seed
+        )
+        elapsed = (datetime.now() - started).total_seconds()
+        
+        for table, count in counts.items():
+            print(f"   {table}: {count}")
+        print(f"✅ Done in {elapsed:.1f}s (password user sintetis: {SYNTHETIC_PASSWORD})")
+    except Exception as e:
+        print(f"❌ Error generating data: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
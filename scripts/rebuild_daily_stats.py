@@ -0,0 +1,56 @@
+"""
+Script to rebuild the p2h_daily_stats rollup from p2h_reports.
+
+Digunakan untuk backfill histori atau memperbaiki rollup jika data
+p2h_reports diubah langsung di database.
+
+Usage:
+    python scripts/rebuild_daily_stats.py                      # Semua histori
+    python scripts/rebuild_daily_stats.py --start 2026-01-01   # Mulai tanggal tertentu
+    python scripts/rebuild_daily_stats.py --start 2026-01-01 --end 2026-01-31
+"""
+
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.repositories.daily_stats_repository import daily_stats_repository
+
+
+def parse_date(value: str):
+    """Parse YYYY-MM-DD argument into a date"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Format tanggal tidak valid: {value}. Gunakan YYYY-MM-DD")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Rebuild p2h_daily_stats rollup")
+    parser.add_argument("--start", type=parse_date, default=None, help="Tanggal awal (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, default=None, help="Tanggal akhir (YYYY-MM-DD)")
+    args = parser.parse_args()
+    
+    print("🚀 Rebuilding P2H daily stats rollup...")
+    print(f"📅 Range: {args.start or 'awal'} s/d {args.end or 'akhir'}")
+    
+    db = SessionLocal()
+    try:
+        rows = daily_stats_repository.rebuild(db, args.start, args.end)
+        db.commit()
+        print(f"✅ Rollup rebuilt: {rows} rows written")
+    except Exception as e:
+        print(f"❌ Error rebuilding rollup: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()